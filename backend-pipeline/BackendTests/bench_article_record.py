@@ -0,0 +1,118 @@
+# bench_article_record.py
+# Memory per article and per-stage CPU for the Article record type in
+# api.articles against the previous plain-dict articles (ISO date strings
+# under both published_date and publishedAt, re-parsed at storage time,
+# and a source that may be a dict or a string).
+#
+# Usage: python BackendTests/bench_article_record.py [num_articles]
+import gc
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone as dt_timezone
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoBackend.settings')
+django.setup()
+
+from django.utils import timezone
+from api.articles import Article
+from api.canonical import hash_link
+from api.ingestion import TITLE_WORDS, article_to_fields, iter_unique_articles
+
+
+def rss_entries(count):
+    # What the RSS fetcher has in hand per entry
+    return [(f"Stocks rally as the Fed signals pause {i}", f"https://news.google.com/rss/articles/CBMi{i}?oc=5",
+             '<a href="https://news.google.com/rss/articles/CBMi">Stocks rally</a>&nbsp;<font>Reuters</font>',
+             "Reuters", 1746100800 + i) for i in range(count)]
+
+
+def build_legacy(entries):
+    articles = []
+    for title, link, description, source, timestamp in entries:
+        published_date = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).replace(tzinfo=None)
+        articles.append({
+            'title': title, 'description': description, 'content': description,
+            'published_date': published_date.isoformat(), 'publishedAt': published_date.isoformat(),
+            'source': source, 'url': link, 'country': 'us', 'category': 'business',
+        })
+    return articles
+
+
+def build_records(entries):
+    return [
+        Article(title=title, description=description, content=description, source=source, link=link,
+                published_date=datetime.fromtimestamp(timestamp, tz=dt_timezone.utc),
+                country='us', category='business')
+        for title, link, description, source, timestamp in entries
+    ]
+
+
+def source_name_legacy(article):
+    source_info = article.get('source', {})
+    if isinstance(source_info, dict):
+        return source_info.get('name', '')
+    return str(source_info)
+
+
+def dedupe_legacy(articles):
+    seen = set()
+    for article in articles:
+        link_key = hash_link(article.get('url', ''))
+        title = ' '.join(TITLE_WORDS.findall((article.get('title') or '').lower()))
+        title_key = hashlib.blake2b(f"{title}\n{source_name_legacy(article).lower()}".encode(), digest_size=16).hexdigest()
+        if link_key in seen or title_key in seen:
+            continue
+        seen.update((link_key, title_key))
+        yield article
+
+
+def to_fields_legacy(article):
+    published_date = article.get('publishedAt') or article.get('published_date')
+    published_date = datetime.fromisoformat(published_date.replace('Z', '+00:00'))
+    if not timezone.is_aware(published_date):
+        published_date = timezone.make_aware(published_date)
+    link = article.get('url', '')
+    return {
+        'title': article.get('title'), 'description': article.get('description', ''),
+        'content': article.get('content', ''), 'published_date': published_date,
+        'source': source_name_legacy(article), 'category': article.get('category', 'general'),
+        'country': article.get('country', 'unknown'), 'link': link, 'link_hash': hash_link(link),
+    }
+
+
+def memory_per_article(build, entries):
+    gc.collect()
+    tracemalloc.start()
+    articles = build(entries)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del articles
+    return size / len(entries)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(label, build, dedupe, to_fields, entries):
+    articles, fetch = timed(lambda: build(entries))
+    unique, dedupe_time = timed(lambda: list(dedupe(articles)))
+    _, fields_time = timed(lambda: [to_fields(article) for article in unique])
+    per = 1e6 / len(entries)
+    print(f"{label:>8}: {memory_per_article(build, entries):6.0f} B/article  "
+          f"build {fetch * per:6.2f}us  dedupe {dedupe_time * per:6.2f}us  "
+          f"to fields {fields_time * per:6.2f}us  total {(fetch + dedupe_time + fields_time) * per:6.2f}us")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    entries = rss_entries(count)
+    run("dicts", build_legacy, dedupe_legacy, to_fields_legacy, entries)
+    run("records", build_records, iter_unique_articles, article_to_fields, entries)
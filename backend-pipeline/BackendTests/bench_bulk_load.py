@@ -0,0 +1,60 @@
+# bench_bulk_load.py
+# Compares the batched ORM write path (api.ingestion.store_articles) with
+# the COPY loader in api.bulkload, for RawData and ProcessedData.
+# Everything runs inside a transaction that is rolled back, so it is safe
+# to point at a development database. On backends other than PostgreSQL
+# the loader falls back to bulk_create and the numbers are not meaningful.
+#
+# Usage: python BackendTests/bench_bulk_load.py [num_articles] [chunk_size]
+import os
+import sys
+import time
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoBackend.settings')
+django.setup()
+
+from django.db import connection, transaction
+from api.bulkload import bulk_load_articles
+from api.ingestion import store_articles, store_processed_articles
+from api.models import ProcessedData, RawData
+
+
+def make_articles(count, prefix):
+    return [{
+        'title': f"Benchmark article {i}",
+        'description': "Benchmark description with <b>markup</b>",
+        'content': "Benchmark content. " * 20,
+        'published_date': "2025-05-01T12:00:00",
+        'source': "Benchmark",
+        'url': f"https://example.com/{prefix}/{i}",
+        'country': 'us',
+        'category': 'business',
+    } for i in range(count)]
+
+
+def run(label, load, articles):
+    with transaction.atomic():
+        start = time.perf_counter()
+        load(articles)
+        elapsed = time.perf_counter() - start
+        # Second pass: every article already exists
+        start = time.perf_counter()
+        load(articles)
+        rerun = time.perf_counter() - start
+        transaction.set_rollback(True)
+    print(f"{label:>16}: {len(articles)} articles in {elapsed:.3f}s "
+          f"({len(articles) / elapsed:.0f} articles/s), rerun {rerun:.3f}s "
+          f"({len(articles) / rerun:.0f} articles/s)")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    print(f"Database backend: {connection.vendor}")
+    run("orm raw", store_articles, make_articles(count, 'orm-raw'))
+    run("copy raw", lambda articles: bulk_load_articles(articles, RawData, chunk_size), make_articles(count, 'copy-raw'))
+    run("orm processed", store_processed_articles, make_articles(count, 'orm-processed'))
+    run("copy processed", lambda articles: bulk_load_articles(articles, ProcessedData, chunk_size),
+        make_articles(count, 'copy-processed'))
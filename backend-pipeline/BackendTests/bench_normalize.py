@@ -0,0 +1,61 @@
+# bench_normalize.py
+# Micro-benchmark for api.processing.normalize_text against the previous
+# implementation (regexes compiled per call, NFKD on every string, and
+# text.split() re-run for every word of a title).
+#
+# Usage: python BackendTests/bench_normalize.py [repeats]
+import os
+import re
+import string
+import sys
+import timeit
+import unicodedata
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoBackend.settings')
+django.setup()
+
+from api.processing import normalize_text
+
+
+def normalize_text_legacy(text, is_title=False):
+    if text is None:
+        return None
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('utf-8')
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = text.strip(string.punctuation)
+    if is_title:
+        words = [word.capitalize() if i == 0 or i == len(text.split()) - 1 else word.lower()
+                 for i, word in enumerate(text.split())]
+        text = ' '.join(words)
+    return text
+
+
+# One article as it arrives from Google News RSS: title, HTML link-list
+# description and content, plus a non-ASCII title and a long title.
+TITLE = "Stocks rally as the Federal Reserve signals a pause in rate hikes"
+TITLE_UNICODE = "Café owners in Zürich brace for a résumé of price controls"
+TITLE_LONG = " ".join(["Markets"] * 200)
+DESCRIPTION = ('<a href="https://news.google.com/rss/articles/CBMi">Stocks rally as the Fed signals a pause</a>'
+               '&nbsp;&nbsp;<font color="#6f6f6f">Reuters</font>') * 3
+CONTENT = "<p>" + "Investors cheered the decision. " * 40 + "</p>"
+
+CASES = [
+    ("title", TITLE, True),
+    ("title (non-ASCII)", TITLE_UNICODE, True),
+    ("title (200 words)", TITLE_LONG, True),
+    ("description", DESCRIPTION, False),
+    ("content", CONTENT, False),
+]
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for label, text, is_title in CASES:
+        assert normalize_text(text, is_title) == normalize_text_legacy(text, is_title)
+        legacy = min(timeit.repeat(lambda: normalize_text_legacy(text, is_title), number=repeats, repeat=3))
+        fast = min(timeit.repeat(lambda: normalize_text(text, is_title), number=repeats, repeat=3))
+        print(f"{label:>20}: legacy {legacy / repeats * 1e6:8.2f}us  new {fast / repeats * 1e6:8.2f}us  "
+              f"speedup {legacy / fast:5.1f}x")
@@ -0,0 +1,81 @@
+# bench_sentiment.py
+# Articles per second per core for the batch sentiment engine in
+# api.analytics.sentiment, against calling it once per article (what
+# analyze_sentiment_batch used to do) and against the same scoring rules
+# as a plain Python loop. Runs in one process, so the rates are per core.
+#
+# Usage: python BackendTests/bench_sentiment.py [num_articles] [batch_size]
+import os
+import random
+import sys
+import time
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoBackend.settings')
+django.setup()
+
+from api.analytics.sentiment import PUNCTUATION, SentimentEngine, get_sentiment_label, load_lexicon
+
+FILLER = ("the government said on monday that officials in the capital would meet "
+          "with regional leaders to discuss the plan for the coming year").split()
+
+
+def make_articles(lexicon, count, words=120, seed=1):
+    rng = random.Random(seed)
+    vocab = list(lexicon['words']) + list(lexicon['modifiers'])
+    articles = []
+    for _ in range(count):
+        tokens = [rng.choice(vocab) if rng.random() < 0.1 else rng.choice(FILLER) for _ in range(words)]
+        articles.append(' '.join(tokens).capitalize() + '.')
+    return articles
+
+
+def score_loop(lexicon, text):
+    # Same tokens and scoring rules, one article and one token at a time
+    words, modifiers = lexicon['words'], lexicon['modifiers']
+    tokens = text.translate(PUNCTUATION).lower().split()
+    polarity = subjectivity = magnitude = hits = 0.0
+    for i, token in enumerate(tokens):
+        if token not in words:
+            continue
+        weight = modifiers.get(tokens[i - 1], 1.0) if i > 0 else 1.0
+        if i > 1 and 0 < weight != 1 and modifiers.get(tokens[i - 2], 1.0) < 0:
+            weight *= modifiers[tokens[i - 2]]
+        p, s = words[token]
+        polarity += weight * p
+        subjectivity += abs(weight) * s
+        magnitude += abs(weight * p)
+        hits += 1
+    p = max(-1.0, min(1.0, polarity / hits)) if hits else 0.0
+    return {'polarity': p, 'subjectivity': min(1.0, subjectivity / hits) if hits else 0.0,
+            'sentiment': get_sentiment_label(p)}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    lexicon = load_lexicon()
+    engine = SentimentEngine(lexicon)
+    articles = make_articles(lexicon, count)
+
+    _, single_time = timed(lambda: [engine.analyze_batch([text]) for text in articles[:count // 10]])
+    single_time *= 10
+    looped, loop_time = timed(lambda: [score_loop(lexicon, text) for text in articles])
+    batched, batch_time = timed(lambda: [
+        result for start in range(0, count, batch_size)
+        for result in engine.analyze_batch(articles[start:start + batch_size])
+    ])
+    assert all(abs(a['polarity'] - b['polarity']) < 1e-9 for a, b in zip(looped, batched))
+
+    print(f"{count} articles of ~120 words, batches of {batch_size}")
+    print(f"  single: {count / single_time:10.0f} articles/s per core")
+    print(f"    loop: {count / loop_time:10.0f} articles/s per core")
+    print(f"   batch: {count / batch_time:10.0f} articles/s per core "
+          f"({single_time / batch_time:.1f}x single, {loop_time / batch_time:.1f}x loop)")
@@ -0,0 +1,61 @@
+# bench_store_news.py
+# Compares the per-article get_or_create loop with the batched write path
+# in api.ingestion.store_articles. Everything runs inside a transaction that
+# is rolled back, so it is safe to point at a development database.
+#
+# Usage: python BackendTests/bench_store_news.py [num_articles] [batch_size]
+import os
+import sys
+import time
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoBackend.settings')
+django.setup()
+
+from django.db import transaction
+from api.ingestion import article_to_fields, store_article, store_articles
+
+
+def make_articles(count, prefix):
+    return [{
+        'title': f"Benchmark article {i}",
+        'description': "Benchmark description",
+        'content': "Benchmark content",
+        'published_date': "2025-05-01T12:00:00",
+        'source': "Benchmark",
+        'url': f"https://example.com/{prefix}/{i}",
+        'country': 'us',
+        'category': 'business',
+    } for i in range(count)]
+
+
+def run(label, store, articles):
+    with transaction.atomic():
+        start = time.perf_counter()
+        created = store(articles)
+        elapsed = time.perf_counter() - start
+        # Second pass: every article already exists
+        start = time.perf_counter()
+        store(articles)
+        rerun = time.perf_counter() - start
+        transaction.set_rollback(True)
+    print(f"{label:>10}: {len(created)} new rows in {elapsed:.3f}s "
+          f"({len(articles) / elapsed:.0f} articles/s), rerun {rerun:.3f}s "
+          f"({len(articles) / rerun:.0f} articles/s)")
+
+
+def store_loop(articles):
+    created = []
+    for article in articles:
+        obj, was_created = store_article(article_to_fields(article))
+        if was_created:
+            created.append(obj)
+    return created
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    run("loop", store_loop, make_articles(count, 'loop'))
+    run("batched", lambda articles: store_articles(articles, batch_size=batch_size), make_articles(count, 'batched'))
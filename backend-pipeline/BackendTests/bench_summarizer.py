@@ -0,0 +1,61 @@
+# bench_summarizer.py
+# Articles per second per core for the batch TextRank summarizer in
+# api.analytics.summarizer, against summarizing one article per call (what
+# the summary job did before). Runs in one process, so the rates are per
+# core.
+#
+# Usage: python BackendTests/bench_summarizer.py [num_articles] [batch_size]
+import os
+import random
+import sys
+import time
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoBackend.settings')
+django.setup()
+
+from api.analytics.summarizer import TextRankSummarizer
+
+WORDS = ("government officials markets inflation rates bank election minister report growth energy "
+         "prices court ruling storm coast workers strike talks deal trade exports police city council "
+         "budget hospital vaccine study scientists climate emissions company shares profit quarter").split()
+FILLER = "the a of in on and to for with after as said".split()
+
+
+def make_articles(count, sentences=12, seed=1):
+    rng = random.Random(seed)
+    articles = []
+    for _ in range(count):
+        topic = rng.sample(WORDS, 8)
+        text = []
+        for _ in range(sentences):
+            words = [rng.choice(topic) if rng.random() < 0.4 else rng.choice(WORDS + FILLER) for _ in range(18)]
+            text.append(' '.join(words).capitalize() + '.')
+        articles.append(' '.join(text))
+    return articles
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    summarizer = TextRankSummarizer()
+    articles = make_articles(count)
+    summarizer.summarize_batch(articles[:batch_size])  # Warm the vocabulary
+
+    single, single_time = timed(lambda: [summarizer.summarize_batch([text])[0] for text in articles])
+    batched, batch_time = timed(lambda: [
+        summary for start in range(0, count, batch_size)
+        for summary in summarizer.summarize_batch(articles[start:start + batch_size])
+    ])
+    assert single == batched
+
+    print(f"{count} articles of 12 sentences, batches of {batch_size}")
+    print(f"  single: {count / single_time:10.0f} articles/s per core")
+    print(f"   batch: {count / batch_time:10.0f} articles/s per core ({single_time / batch_time:.1f}x single)")
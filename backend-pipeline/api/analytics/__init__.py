@@ -9,7 +9,7 @@ This package contains all analytics modules for news processing:
 
 # Make analytics functions easily importable
 # Uncomment these imports when you implement the actual functions
-# from .sentiment import analyze_sentiment
-# from .summarizer import summarize_text
+from .sentiment import analyze_sentiment, analyze_sentiment_batch
+from .summarizer import summarize_batch, summarize_text
 
-# __all__ = ['analyze_sentiment', 'summarize_text'] 
\ No newline at end of file
+__all__ = ['analyze_sentiment', 'analyze_sentiment_batch', 'summarize_batch', 'summarize_text'] 
\ No newline at end of file
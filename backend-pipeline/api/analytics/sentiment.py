@@ -3,8 +3,179 @@ Sentiment Analysis Module
 ========================
 
 This module provides sentiment analysis functionality for news articles.
-Add your sentiment analysis implementation here.
+
+Scoring is lexicon based and built for batches: a batch is tokenized once,
+tokens are mapped to lexicon ids, and the per-article scores come out of
+one sparse matrix product (article x term counts times the term x score
+lexicon), so thousands of articles are scored with a handful of NumPy and
+SciPy operations.
 """
+import hashlib
+import json
+import os
+import string
+import threading
+from itertools import repeat
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+
+DEFAULT_LEXICON_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sentiment_lexicon.json')
+
+# Everything but letters and apostrophes separates tokens
+PUNCTUATION = str.maketrans(
+    {char: ' ' for char in string.punctuation.replace("'", '') + string.digits + '\x00\u201c\u201d'}
+)
+PUNCTUATION[ord('\u2019')] = "'"
+SEPARATOR = '\x00'  # Between the texts of a batch; never part of a token
+
+# Lexicon matrix columns
+POLARITY, SUBJECTIVITY, MAGNITUDE = 0, 1, 2
+
+# Bump when the scoring rules change; cached scores of other versions are
+# then ignored and texts are re-scored as they come up
+ANALYZER_VERSION = 1
+
+CONFIDENCE_HITS = 3.0  # Sentiment words at which coverage reaches ~63%
+
+_engine = None
+_lock = threading.Lock()
+
+
+def load_lexicon(path=None):
+    """
+    Load the sentiment lexicon.
+    
+    Args:
+        path: JSON file with "words" (word -> [polarity, subjectivity]) and
+              "modifiers" (word -> multiplier for the next word; negative for
+              negations). Defaults to settings.SENTIMENT_LEXICON_FILE, then
+              api/data/sentiment_lexicon.json.
+    
+    Returns:
+        dict: {"words": ..., "modifiers": ...} with lowercase keys
+    """
+    path = path or getattr(settings, 'SENTIMENT_LEXICON_FILE', None) or DEFAULT_LEXICON_FILE
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    return {
+        'words': {word.lower(): scores for word, scores in table.get('words', {}).items()},
+        'modifiers': {word.lower(): factor for word, factor in table.get('modifiers', {}).items()},
+    }
+
+
+class SentimentEngine:
+    """
+    Lexicon sentiment scorer for batches of texts.
+    
+    A sentiment word's score is weighted by the word before it: intensifiers
+    ("very") scale it and negations ("not") flip and damp it, and a negation
+    also reaches over one intensifier ("not very good"). Per text:
+    
+    - polarity: mean weighted polarity of its sentiment words, in [-1, 1]
+    - subjectivity: mean weighted subjectivity, in [0, 1]
+    - confidence: how much evidence there is (number of sentiment words)
+      times how much of it agrees in sign with the polarity, in [0, 1]
+    """
+
+    def __init__(self, lexicon):
+        words = lexicon['words']
+        modifiers = lexicon['modifiers']
+        # Editing the lexicon changes the version as well
+        fingerprint = hashlib.blake2b(json.dumps(lexicon, sort_keys=True).encode('utf-8'), digest_size=4)
+        self.version = f"lexicon-{ANALYZER_VERSION}-{fingerprint.hexdigest()}"
+        # Id 0 is every token outside the lexicon; the last id separates texts
+        terms = list(words) + [word for word in modifiers if word not in words]
+        self.vocab = {term: i for i, term in enumerate(terms, start=1)}
+        size = len(terms) + 2
+        self.separator = size - 1
+        self.lookup = {**self.vocab, SEPARATOR: self.separator}.get
+
+        self.is_word = np.zeros(size, dtype=bool)
+        self.is_word[1:len(words) + 1] = True
+        self.modifier = np.ones(size)
+        for word, factor in modifiers.items():
+            self.modifier[self.vocab[word]] = factor
+
+        ids = np.array([self.vocab[word] for word in words], dtype=np.int64)
+        scores = np.array([words[word] for word in words], dtype=float).reshape(-1, 2)
+        values = np.column_stack([scores[:, 0], scores[:, 1], np.abs(scores[:, 0])])
+        self.lexicon = sparse.csr_matrix(
+            (values.ravel(), (np.repeat(ids, 3), np.tile([POLARITY, SUBJECTIVITY, MAGNITUDE], len(ids)))),
+            shape=(size, 3),
+        )
+        self.size = size
+
+    def token_ids(self, texts):
+        """
+        Lexicon ids of every token in the batch, with a separator id
+        between texts.
+        
+        The batch is joined into one string, so lowercasing and splitting
+        are single passes in C; only the id lookup runs per token.
+        """
+        joined = f" {SEPARATOR} ".join((text or '').translate(PUNCTUATION) for text in texts).lower()
+        tokens = joined.split()
+        return np.fromiter(map(self.lookup, tokens, repeat(0)), dtype=np.int64, count=len(tokens))
+
+    def analyze_batch(self, texts):
+        """
+        Score a list of texts.
+        
+        Returns:
+            list: One dict per text with polarity, subjectivity, sentiment
+                  and confidence, as analyze_sentiment returns
+        """
+        count = len(texts)
+        if not count:
+            return []
+        ids = self.token_ids(texts)
+
+        # Only sentiment words are scored, each with the two tokens before
+        # it. A separator has no modifier, so weights never reach across
+        # texts; at the start of the batch the word itself stands in.
+        at = np.flatnonzero(self.is_word[ids])
+        docs = np.searchsorted(np.flatnonzero(ids == self.separator), at)
+        prev = self.modifier[ids[np.maximum(at - 1, 0)]]
+        prev2 = self.modifier[ids[np.maximum(at - 2, 0)]]
+        reaches = (prev2 < 0) & (prev > 0) & (prev != 1)
+        weights = prev * np.where(reaches, prev2, 1.0)
+
+        counts = sparse.csr_matrix((weights, (docs, ids[at])), shape=(count, self.size))
+        signed = (counts @ self.lexicon).toarray()
+        unsigned = (abs(counts) @ self.lexicon).toarray()
+        hits = np.bincount(docs, minlength=count).astype(float)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            polarity = np.clip(np.where(hits > 0, signed[:, POLARITY] / hits, 0.0), -1.0, 1.0)
+            subjectivity = np.clip(np.where(hits > 0, unsigned[:, SUBJECTIVITY] / hits, 0.0), 0.0, 1.0)
+            agreement = np.where(
+                unsigned[:, MAGNITUDE] > 0, np.abs(signed[:, POLARITY]) / unsigned[:, MAGNITUDE], 0.0
+            )
+        confidence = (1.0 - np.exp(-hits / CONFIDENCE_HITS)) * agreement
+
+        return [
+            {
+                'polarity': p,
+                'subjectivity': s,
+                'sentiment': get_sentiment_label(p),
+                'confidence': c,
+            }
+            for p, s, c in zip(polarity.tolist(), subjectivity.tolist(), confidence.tolist())
+        ]
+
+
+def get_engine():
+    """
+    Return the process-wide sentiment engine, loading the lexicon on first use.
+    """
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = SentimentEngine(load_lexicon())
+    return _engine
+
 
 def analyze_sentiment(text):
     """
@@ -18,21 +189,9 @@ def analyze_sentiment(text):
             - polarity: float between -1 (negative) and 1 (positive)
             - subjectivity: float between 0 (objective) and 1 (subjective)
             - sentiment: 'positive', 'negative', or 'neutral'
+            - confidence: float between 0 and 1
     """
-    # TODO: Implement actual sentiment analysis
-    # Example using TextBlob:
-    # from textblob import TextBlob
-    # blob = TextBlob(text)
-    # polarity = blob.sentiment.polarity
-    # subjectivity = blob.sentiment.subjectivity
-    
-    # Placeholder implementation
-    return {
-        'polarity': 0.0,
-        'subjectivity': 0.0,
-        'sentiment': 'neutral',
-        'confidence': 0.0
-    }
+    return analyze_sentiment_batch([text])[0]
 
 
 def analyze_sentiment_batch(texts):
@@ -45,7 +204,12 @@ def analyze_sentiment_batch(texts):
     Returns:
         list: List of sentiment analysis results
     """
-    return [analyze_sentiment(text) for text in texts]
+    from .sentiment_cache import get_sentiment_cache
+    texts = list(texts)
+    cache = get_sentiment_cache()
+    if cache is None:
+        return get_engine().analyze_batch(texts)
+    return cache.analyze_many(texts, get_engine())
 
 
 def get_sentiment_label(polarity):
@@ -63,4 +227,4 @@ def get_sentiment_label(polarity):
     elif polarity < -0.1:
         return 'negative'
     else:
-        return 'neutral' 
\ No newline at end of file
+        return 'neutral'
@@ -0,0 +1,194 @@
+"""
+Sentiment Cache
+===============
+
+Persistent sentiment scores keyed by a hash of the text and the analyzer
+version, so reruns, backfills and stories syndicated to several countries
+score each distinct text once.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from ..models import SentimentCacheStats, SentimentScore
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+_lock = threading.Lock()
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+class SentimentCache:
+    """
+    Looks sentiment scores up in SentimentScore before running the analyzer.
+    
+    Rows are keyed by (version, text hash); a new analyzer version simply
+    misses, so texts are re-scored lazily as they come up again. Hits and
+    misses are counted in this process and added to SentimentCacheStats,
+    which is shared by all workers, at most every flush_seconds, so workers
+    do not queue on its row after every batch.
+    """
+
+    def __init__(self, batch_size=1000, flush_seconds=30.0):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+        self._pending = {}  # version -> [hits, misses] not yet in SentimentCacheStats
+        self._flushed_at = time.monotonic()
+
+    def analyze_many(self, texts, engine):
+        """
+        Score a list of texts, running the engine only on texts without a
+        cached score for its version.
+        
+        Args:
+            texts: List of strings or None
+            engine: The SentimentEngine (provides version and analyze_batch)
+        
+        Returns:
+            List of sentiment dicts in input order
+        """
+        from .sentiment import get_sentiment_label
+
+        results = [None] * len(texts)
+        by_hash = {}  # text hash -> indexes waiting for it
+        for i, text in enumerate(texts):
+            if text:
+                by_hash.setdefault(text_hash(text), []).append(i)
+            else:
+                results[i] = {'polarity': 0.0, 'subjectivity': 0.0, 'sentiment': 'neutral', 'confidence': 0.0}
+        if not by_hash:
+            return results
+
+        found = {}
+        hashes = list(by_hash)
+        for start in range(0, len(hashes), self.batch_size):
+            rows = SentimentScore.objects.filter(
+                version=engine.version, text_hash__in=hashes[start:start + self.batch_size]
+            ).values_list('text_hash', 'polarity', 'subjectivity', 'confidence')
+            for key, polarity, subjectivity, confidence in rows:
+                found[key] = {
+                    'polarity': polarity,
+                    'subjectivity': subjectivity,
+                    'sentiment': get_sentiment_label(polarity),
+                    'confidence': confidence,
+                }
+
+        missing = [key for key in hashes if key not in found]
+        if missing:
+            scored = engine.analyze_batch([texts[by_hash[key][0]] for key in missing])
+            SentimentScore.objects.bulk_create(
+                [
+                    SentimentScore(
+                        text_hash=key, version=engine.version, polarity=score['polarity'],
+                        subjectivity=score['subjectivity'], confidence=score['confidence'],
+                    )
+                    for key, score in zip(missing, scored)
+                ],
+                batch_size=self.batch_size,
+                ignore_conflicts=True,  # Another worker scored the same text
+            )
+            found.update(zip(missing, scored))
+
+        for key, indexes in by_hash.items():
+            for i in indexes:
+                results[i] = dict(found[key])
+        # Repeats of a text within the batch count as hits
+        hits = sum(len(indexes) for indexes in by_hash.values()) - len(missing)
+        self._count(engine.version, hits, len(missing))
+        return results
+
+    def _count(self, version, hits, misses):
+        with self._lock:
+            self._stats['hits'] += hits
+            self._stats['misses'] += misses
+            pending = self._pending.setdefault(version, [0, 0])
+            pending[0] += hits
+            pending[1] += misses
+            due = time.monotonic() - self._flushed_at >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Add the counts gathered since the last flush to SentimentCacheStats,
+        one UPDATE per analyzer version.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        for version, (hits, misses) in pending.items():
+            updated = SentimentCacheStats.objects.filter(version=version).update(
+                hits=F('hits') + hits, misses=F('misses') + misses
+            )
+            if not updated:
+                _, created = SentimentCacheStats.objects.get_or_create(
+                    version=version, defaults={'hits': hits, 'misses': misses}
+                )
+                if not created:
+                    SentimentCacheStats.objects.filter(version=version).update(
+                        hits=F('hits') + hits, misses=F('misses') + misses
+                    )
+
+    def snapshot(self, version):
+        """
+        Hit and miss counters of this process, and of all workers for the
+        given analyzer version (this process's pending counts are flushed
+        first; other workers' show up after their next flush).
+        """
+        self.flush()
+        with self._lock:
+            stats = dict(self._stats)
+        shared = (
+            SentimentCacheStats.objects.filter(version=version).values('hits', 'misses').first()
+            or {'hits': 0, 'misses': 0}
+        )
+        return {
+            'version': version,
+            **stats,
+            'hit_rate': hit_rate(stats),
+            'shared': {**shared, 'hit_rate': hit_rate(shared)},
+        }
+
+
+def hit_rate(stats):
+    total = stats['hits'] + stats['misses']
+    return stats['hits'] / total if total else 0.0
+
+
+def prune_sentiment_cache(version, max_age_days=None):
+    """
+    Delete cached scores of other analyzer versions, and scores older than
+    max_age_days (they are re-scored if the text comes up again).
+    
+    Returns:
+        Number of scores deleted
+    """
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'SENTIMENT_CACHE_MAX_AGE_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted_count, _ = SentimentScore.objects.exclude(version=version).delete()
+    expired_count, _ = SentimentScore.objects.filter(created_at__lt=cutoff).delete()
+    logger.info(f"Pruned {deleted_count} stale and {expired_count} expired sentiment scores")
+    return deleted_count + expired_count
+
+
+def get_sentiment_cache():
+    """
+    Return the process-wide sentiment cache, or None if it is disabled.
+    """
+    global _cache
+    if _cache is None and getattr(settings, 'SENTIMENT_CACHE_ENABLED', True):
+        with _lock:
+            if _cache is None:
+                _cache = SentimentCache(flush_seconds=getattr(settings, 'SENTIMENT_CACHE_FLUSH_SECONDS', 30.0))
+    return _cache
@@ -3,8 +3,221 @@ Text Summarization Module
 ========================
 
 This module provides text summarization functionality for news articles.
-Add your summarization implementation here.
+
+Summaries are extractive and built for batches: every sentence of the batch
+becomes a TF-IDF vector, sentences of the same article are linked by cosine
+similarity into one sparse graph, and TextRank scores all articles' graphs
+in a single power iteration. The top ranked sentences of each article, in
+their original order, make its summary.
 """
+import re
+import threading
+from itertools import repeat
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from ..stopwords import STOPWORDS
+
+# Sentence ends: ., ! or ? (plus closing quotes or brackets) and whitespace
+# before something that can start a sentence. Single initials ("U.S.",
+# "J. Smith") and common titles do not end a sentence.
+SENTENCE_END = re.compile(
+    r"(?<=[.!?])(?<!\b[A-Z]\.)(?<!\b(?:Mr|Ms|Dr|St|Jr|Sr|vs|No)\.)(?<!\bMrs\.)"
+    r"[\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-Z0-9])"
+)
+SEPARATOR = '\x00'  # Between the sentences of a batch; never part of a word
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|\x00")
+
+# Vocabulary ids with a special meaning
+STOPWORD, SEPARATOR_ID, UNSEEN = 0, -1, -2
+
+_summarizer = None
+_lock = threading.Lock()
+
+
+class SentenceVectorizer:
+    """
+    Splits texts into sentences and maps their words to vocabulary ids.
+    
+    One vectorizer is reused for every batch of the process: its patterns
+    are compiled once and its vocabulary keeps growing (up to max_terms,
+    then it starts over), so after the first batches nearly every word is
+    looked up rather than added.
+    """
+
+    def __init__(self, max_terms=500000):
+        self.max_terms = max_terms
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.vocab = dict.fromkeys(STOPWORDS, STOPWORD)
+        self.vocab[SEPARATOR] = SEPARATOR_ID
+        self.size = 1  # Next free id
+
+    def split(self, text):
+        """
+        Sentences of a text, with surrounding whitespace removed. NUL
+        characters become spaces, since NUL separates sentences in a batch.
+        """
+        text = (text or '').replace(SEPARATOR, ' ')
+        return [sentence for sentence in (part.strip() for part in SENTENCE_END.split(text)) if sentence]
+
+    def token_ids(self, sentences):
+        """
+        Vocabulary ids of every word of the sentences, with SEPARATOR_ID
+        after each sentence.
+        
+        Returns:
+            numpy int64 array
+        """
+        tokens = WORD.findall(f" {SEPARATOR} ".join(sentences).lower() + f" {SEPARATOR}")
+        ids = np.fromiter(map(self.vocab.get, tokens, repeat(UNSEEN)), dtype=np.int64, count=len(tokens))
+        unseen = np.flatnonzero(ids == UNSEEN)
+        if unseen.size:
+            with self._lock:
+                if self.size + unseen.size > self.max_terms:
+                    self._reset()
+                    ids = np.fromiter(map(self.vocab.get, tokens, repeat(UNSEEN)), dtype=np.int64, count=len(tokens))
+                    unseen = np.flatnonzero(ids == UNSEEN)
+                for i in unseen.tolist():
+                    ids[i] = self.vocab.setdefault(tokens[i], self.size)
+                    if ids[i] == self.size:
+                        self.size += 1
+        return ids
+
+
+class TextRankSummarizer:
+    """
+    Extractive TextRank summarizer for batches of texts.
+    
+    Sentences are weighted by TF-IDF with document frequencies counted over
+    the sentences of their own article, so an article's summary does not
+    depend on the rest of its batch. Edges below min_similarity are dropped
+    to keep the graph sparse; ties in rank go to the earlier sentence.
+    """
+
+    def __init__(self, vectorizer=None, damping=0.85, min_similarity=0.05, max_iterations=50, tolerance=1e-6):
+        self.vectorizer = vectorizer or SentenceVectorizer()
+        self.damping = damping
+        self.min_similarity = min_similarity
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+    def rank(self, sentence_lists):
+        """
+        TextRank score of every sentence of a batch.
+        
+        Args:
+            sentence_lists: One list of sentences per article
+        
+        Returns:
+            tuple: (scores, article of each sentence), flat over the batch
+        """
+        counts = np.fromiter(map(len, sentence_lists), dtype=np.int64, count=len(sentence_lists))
+        owner = np.repeat(np.arange(len(sentence_lists)), counts)
+        total = int(counts.sum())
+        if not total:
+            return np.zeros(0), owner
+        sentences = [sentence for sentence_list in sentence_lists for sentence in sentence_list]
+        ids = self.vectorizer.token_ids(sentences)
+        
+        # Term columns are per article, so sentences of different articles
+        # share no terms and the similarity matrix is block diagonal
+        rows = np.cumsum(ids == SEPARATOR_ID) - (ids == SEPARATOR_ID)
+        words = ids > STOPWORD
+        rows, terms = rows[words], ids[words]
+        width = int(ids.max()) + 1
+        keys, columns = np.unique(owner[rows] * width + terms, return_inverse=True)
+        tf = sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(total, len(keys)))
+        tf.sum_duplicates()
+        df = np.bincount(tf.indices, minlength=len(keys))
+        n = counts[keys // width]
+        tf.data = (1.0 + np.log(tf.data)) * (np.log((1.0 + n) / (1.0 + df)) + 1.0)[tf.indices]
+        norms = np.sqrt(np.asarray(tf.multiply(tf).sum(axis=1)).ravel())
+        vectors = sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ tf
+        
+        similarity = (vectors @ vectors.T).tocoo()
+        edges = (similarity.row != similarity.col) & (similarity.data >= self.min_similarity)
+        graph = sparse.csr_matrix(
+            (similarity.data[edges], (similarity.row[edges], similarity.col[edges])), shape=(total, total)
+        )
+        degree = np.asarray(graph.sum(axis=1)).ravel()
+        walk = (sparse.diags(np.divide(1.0, degree, out=np.zeros_like(degree), where=degree > 0)) @ graph).T.tocsr()
+        
+        teleport = (1.0 - self.damping) / counts[owner]
+        scores = 1.0 / counts[owner]
+        for _ in range(self.max_iterations):
+            updated = teleport + self.damping * (walk @ scores)
+            converged = np.abs(updated - scores).max() < self.tolerance
+            scores = updated
+            if converged:
+                break
+        return scores, owner
+
+    def summarize_batch(self, texts, sentences_count=3, ratio=None):
+        """
+        Summarize a list of texts.
+        
+        Args:
+            texts: List of strings or None
+            sentences_count: Sentences per summary
+            ratio: If given, keep this share of each text's sentences
+                   instead (at least one)
+        
+        Returns:
+            list: One summary per text ('' for empty texts)
+        """
+        split = self.vectorizer.split
+        sentence_lists = [split(text) for text in texts]
+        scores, owner = self.rank(sentence_lists)
+        if not scores.size:
+            return ['' for _ in texts]
+        
+        counts = np.bincount(owner, minlength=len(texts))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        position = np.arange(len(scores)) - starts[owner]
+        if ratio is None:
+            keep = np.full(len(texts), sentences_count)
+        else:
+            keep = np.maximum(1, (counts * ratio).astype(np.int64))
+        # Best sentences first within each article, earlier ones on ties
+        order = np.lexsort((position, -scores, owner))
+        chosen = np.sort(order[(np.arange(len(order)) - starts[owner[order]]) < keep[owner[order]]])
+        
+        summaries = [[] for _ in texts]
+        for article, at in zip(owner[chosen].tolist(), position[chosen].tolist()):
+            summaries[article].append(sentence_lists[article][at])
+        return [' '.join(sentences) for sentences in summaries]
+
+
+def get_summarizer():
+    """
+    Return the process-wide summarizer, whose vectorizer is reused across batches.
+    """
+    global _summarizer
+    if _summarizer is None:
+        with _lock:
+            if _summarizer is None:
+                _summarizer = TextRankSummarizer(
+                    SentenceVectorizer(max_terms=getattr(settings, 'SUMMARY_VOCABULARY_LIMIT', 500000))
+                )
+    return _summarizer
+
+
+def summarize_batch(texts, sentences_count=3):
+    """
+    Summarize multiple texts at once.
+    
+    Args:
+        texts (list): List of texts to summarize
+        sentences_count (int): Number of sentences in each summary
+    
+    Returns:
+        list: List of summaries
+    """
+    return get_summarizer().summarize_batch(list(texts), sentences_count)
+
 
 def summarize_text(text, sentences_count=3):
     """
@@ -13,24 +226,11 @@ def summarize_text(text, sentences_count=3):
     Args:
         text (str): The text to summarize
         sentences_count (int): Number of sentences in the summary
-        
+    
     Returns:
         str: Summarized text
     """
-    # TODO: Implement actual summarization
-    # Example using Sumy:
-    # from sumy.parsers.plaintext import PlaintextParser
-    # from sumy.nlp.tokenizers import Tokenizer
-    # from sumy.summarizers.lsa import LsaSummarizer
-    # 
-    # parser = PlaintextParser.from_string(text, Tokenizer("english"))
-    # summarizer = LsaSummarizer()
-    # summary = summarizer(parser.document, sentences_count)
-    # return ' '.join([str(sentence) for sentence in summary])
-    
-    # Placeholder implementation - returns first n sentences
-    sentences = text.split('. ')[:sentences_count]
-    return '. '.join(sentences) + '.' if sentences else text
+    return summarize_batch([text], sentences_count)[0]
 
 
 def extractive_summary(text, ratio=0.3):
@@ -40,17 +240,11 @@ def extractive_summary(text, ratio=0.3):
     Args:
         text (str): The text to summarize
         ratio (float): Ratio of original text to keep (0.0 to 1.0)
-        
+    
     Returns:
         str: Extractive summary
     """
-    # TODO: Implement extractive summarization
-    # This is where you'd rank sentences by importance
-    # and select the top ones
-    
-    sentences = text.split('. ')
-    num_sentences = max(1, int(len(sentences) * ratio))
-    return '. '.join(sentences[:num_sentences]) + '.'
+    return get_summarizer().summarize_batch([text], ratio=ratio)[0]
 
 
 def abstractive_summary(text, max_length=150):
@@ -60,7 +254,7 @@ def abstractive_summary(text, max_length=150):
     Args:
         text (str): The text to summarize
         max_length (int): Maximum length of summary in characters
-        
+    
     Returns:
         str: Abstractive summary
     """
@@ -82,7 +276,7 @@ def get_key_points(text, num_points=5):
     Args:
         text (str): The text to analyze
         num_points (int): Number of key points to extract
-        
+    
     Returns:
         list: List of key points
     """
@@ -91,4 +285,4 @@ def get_key_points(text, num_points=5):
     
     # Placeholder implementation
     sentences = text.split('. ')[:num_points]
-    return [s.strip() for s in sentences if s.strip()] 
\ No newline at end of file
+    return [s.strip() for s in sentences if s.strip()]
\ No newline at end of file
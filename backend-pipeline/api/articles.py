@@ -0,0 +1,110 @@
+from datetime import datetime
+from django.utils import timezone
+from .canonical import hash_link
+
+
+class Article:
+    """
+    One fetched news article, as produced by every fetcher and consumed by
+    dedupe and storage.
+
+    Fields are normalized once on the way in: the date is parsed into an
+    aware datetime, the source is always a name, and the link hash is
+    computed up front. __slots__ keeps each record to a fixed set of
+    attributes with no per-instance dict.
+
+    raw is the item as the source delivered it (the API's article JSON or
+    the RSS entry's fields). It travels with the record to storage, which
+    keeps it in RawPayload, and is not compared by ==.
+    """
+    __slots__ = (
+        'title', 'description', 'content', 'link', 'link_hash',
+        'source', 'country', 'category', 'published_date', 'raw',
+    )
+
+    def __init__(self, title, link='', description='', content='', source='',
+                 country='unknown', category='general', published_date=None, raw=None):
+        self.title = title
+        self.description = description
+        self.content = content
+        self.link = link or ''
+        self.link_hash = hash_link(self.link)
+        self.source = source or ''
+        self.country = country or 'unknown'
+        self.category = category or 'general'
+        self.published_date = published_date
+        self.raw = raw
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from an API payload or a dict written by to_dict.
+
+        Accepts the key variants the sources use: url/link, publishedAt,
+        published_at or published_date, and a source that is either a name
+        or a {"name": ...} dict.
+        """
+        source = data.get('source', '')
+        if isinstance(source, dict):
+            source = source.get('name', '')
+        return cls(
+            title=data.get('title'),
+            link=data.get('url') or data.get('link') or '',
+            description=data.get('description', ''),
+            content=data.get('content', ''),
+            source=str(source) if source else '',
+            country=data.get('country', 'unknown'),
+            category=data.get('category', 'general'),
+            published_date=parse_date(
+                data.get('publishedAt') or data.get('published_at') or data.get('published_date')
+            ),
+            raw=data.get('raw'),
+        )
+
+    def to_dict(self):
+        """
+        JSON-safe dict (for Celery messages and NDJSON dumps) that from_dict reads back.
+        """
+        return {
+            'title': self.title,
+            'description': self.description,
+            'content': self.content,
+            'url': self.link,
+            'source': self.source,
+            'country': self.country,
+            'category': self.category,
+            'published_date': self.published_date.isoformat() if self.published_date else None,
+            'raw': self.raw,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Article):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__ if name != 'raw')
+
+    def __repr__(self):
+        return f"Article({self.title!r}, {self.link!r})"
+
+
+def as_article(article):
+    """
+    Accept an Article or an article dict (e.g. from an archived dump).
+    """
+    return article if isinstance(article, Article) else Article.from_dict(article)
+
+
+def parse_date(value):
+    """
+    Aware datetime for an ISO string or datetime; None when missing.
+    Unparseable strings fall back to now, as the storage layer always did.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return timezone.now()
+    if not timezone.is_aware(value):
+        value = timezone.make_aware(value)
+    return value
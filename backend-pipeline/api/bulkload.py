@@ -0,0 +1,215 @@
+import json
+import logging
+from datetime import datetime
+from io import StringIO
+from itertools import islice
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+from .canonical import hash_link
+from .models import ProcessedData, ProcessedLink, RawData
+
+logger = logging.getLogger(__name__)
+
+# Escapes for COPY's text format; NULL is written as \N
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_value(field, value):
+    """
+    Encode one field value for COPY ... FROM STDIN in text format.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(field, models.JSONField):
+        value = json.dumps(value)
+    elif isinstance(field, models.BinaryField):
+        value = '\\x' + bytes(value).hex()  # bytea hex format
+    elif isinstance(field, models.BooleanField):
+        value = 't' if value else 'f'
+    elif isinstance(field, models.DateTimeField):
+        if not isinstance(value, datetime):
+            value = field.to_python(value)
+        if not timezone.is_aware(value):
+            value = timezone.make_aware(value)
+        value = value.isoformat()
+    else:
+        value = str(value)
+    # PostgreSQL text columns cannot hold NUL bytes
+    return value.replace('\x00', '').translate(COPY_ESCAPES)
+
+
+def copy_fields(model):
+    """
+    Columns written by the loader: every concrete field except the primary key.
+    """
+    return [field for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def prepare_record(model, record, now):
+    """
+    Fill the defaults the ORM would set on save() for a record dict.
+    """
+    record = dict(record)
+    if not record.get('link_hash') and record.get('link'):
+        record['link_hash'] = hash_link(record['link'])
+    for field in copy_fields(model):
+        if field.name not in record:
+            record[field.name] = now if getattr(field, 'auto_now_add', False) else field.get_default()
+    return record
+
+
+def copy_buffer(fields, records):
+    """
+    Render records as a COPY text-format buffer.
+    """
+    buffer = StringIO()
+    for record in records:
+        buffer.write('\t'.join(copy_value(field, record[field.name]) for field in fields))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def bulk_load(model, records, chunk_size=None):
+    """
+    Load record dicts into RawData or ProcessedData, skipping links that are
+    already stored.
+    
+    On PostgreSQL each chunk is streamed with COPY into a temporary staging
+    table and merged with one INSERT ... SELECT that skips stored links,
+    which avoids building model instances and per-row INSERT statements.
+    Other backends fall back to bulk_create. ProcessedData rows are written
+    together with their ProcessedLink keys.
+    
+    Args:
+        model: RawData or ProcessedData
+        records: Iterable of field value dicts (e.g. from article_to_fields).
+                 Records without a link are skipped, since the merge key is
+                 the link hash.
+        chunk_size: Records per COPY, defaults to settings.BULK_LOAD_CHUNK_SIZE
+    
+    Returns:
+        dict: rows read, rows inserted and rows skipped (no link, duplicate
+        or already stored)
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'BULK_LOAD_CHUNK_SIZE', 10000)
+    stats = {'rows': 0, 'inserted': 0, 'skipped': 0}
+    now = timezone.now()
+    records = iter(records)
+
+    with transaction.atomic():
+        loader = _CopyLoader(model) if connection.vendor == 'postgresql' else None
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            stats['rows'] += len(chunk)
+            # One row per link hash; the first copy wins, as in store_articles
+            by_hash = {}
+            for record in chunk:
+                record = prepare_record(model, record, now)
+                if record['link_hash']:
+                    by_hash.setdefault(record['link_hash'], record)
+            if loader is not None:
+                stats['inserted'] += loader.load(by_hash.values())
+            else:
+                stats['inserted'] += _orm_load(model, by_hash.values())
+        # On error the rollback drops the staging table
+        if loader is not None:
+            loader.close()
+
+    stats['skipped'] = stats['rows'] - stats['inserted']
+    logger.info(f"Bulk loaded {stats['inserted']} of {stats['rows']} rows into {model._meta.db_table}")
+    return stats
+
+
+class _CopyLoader:
+    """
+    COPY into a session-local staging table, then merge into the target table.
+    """
+
+    def __init__(self, model):
+        self.fields = copy_fields(model)
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        self.staging = quote(f"{model._meta.db_table}_staging")
+        columns = ', '.join(quote(field.column) for field in self.fields)
+        link_hash = quote(model._meta.get_field('link_hash').column)
+
+        self.cursor = connection.cursor()
+        # Same column types as the target, but no constraints or defaults
+        self.cursor.execute(
+            f"CREATE TEMPORARY TABLE {self.staging} ON COMMIT DROP AS "
+            f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        self.copy_sql = f"COPY {self.staging} ({columns}) FROM STDIN"
+        if model is ProcessedData:
+            # Partitioned ProcessedData is only unique on (link_hash,
+            # published_date). Each link first claims its ProcessedLink key
+            # with an id drawn from the table's sequence; only the rows
+            # whose key was new are inserted, under that id.
+            keys = quote(ProcessedLink._meta.db_table)
+            staged_columns = ', '.join(f"staged.{quote(field.column)}" for field in self.fields)
+            self.merge_sql = (
+                f"WITH claimed AS (INSERT INTO {keys} (link_hash, article_id) "
+                f"SELECT {link_hash}, nextval(pg_get_serial_sequence('{table}', 'id')) FROM {self.staging} "
+                f"ON CONFLICT (link_hash) DO NOTHING RETURNING link_hash, article_id) "
+                f"INSERT INTO {table} (id, {columns}) SELECT claimed.article_id, {staged_columns} "
+                f"FROM {self.staging} AS staged JOIN claimed ON claimed.link_hash = staged.{link_hash}"
+            )
+        else:
+            self.merge_sql = f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {self.staging} ON CONFLICT DO NOTHING"
+
+    def load(self, records):
+        buffer = copy_buffer(self.fields, records)
+        raw_cursor = self.cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):
+            raw_cursor.copy_expert(self.copy_sql, buffer)
+        else:
+            # psycopg 3
+            with raw_cursor.copy(self.copy_sql) as copy:
+                copy.write(buffer.getvalue())
+        self.cursor.execute(self.merge_sql)
+        inserted = self.cursor.rowcount
+        self.cursor.execute(f"TRUNCATE {self.staging}")
+        return inserted
+
+    def close(self):
+        # Drop now rather than at commit, so callers can load again in the
+        # same outer transaction
+        self.cursor.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        self.cursor.close()
+
+
+def _orm_load(model, records):
+    records = list(records)
+    keys = ProcessedLink.objects if model is ProcessedData else model.objects
+    existing = set(
+        keys.filter(link_hash__in=[record['link_hash'] for record in records])
+        .values_list('link_hash', flat=True)
+    )
+    rows = [model(**record) for record in records if record['link_hash'] not in existing]
+    if model is ProcessedData:
+        from .processing import insert_processed
+        return len(insert_processed(rows))
+    model.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def bulk_load_articles(articles, model=RawData, chunk_size=None):
+    """
+    Bulk load fetched articles: Article records, or article dicts such as
+    the lines of an NDJSON dump.
+    
+    For RawData the articles are stored as they are; for ProcessedData they
+    are normalized in memory first, as on the fused ingest path.
+    """
+    from .ingestion import article_to_fields
+    from .processing import processed_fields
+
+    records = (article_to_fields(article) for article in articles)
+    if model is ProcessedData:
+        records = (processed_fields(RawData(**fields)) for fields in records)
+    return bulk_load(model, records, chunk_size)
@@ -0,0 +1,89 @@
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from, on any host
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid',
+    'ns_source', 'ns_campaign',
+}
+TRACKING_PREFIXES = ('utm_', 'at_', 'pk_', 'mtm_')
+
+# Generic-looking keys that are tracking only on these hosts (and their
+# subdomains); elsewhere a "ref" or "src" may select the content
+HOST_TRACKING_PARAMS = {
+    'msn.com': {'ocid', 'cvid'},
+    'nytimes.com': {'smid', 'smtyp'},
+    'theguardian.com': {'cmp'},
+    'twitter.com': {'ref_src', 'ref_url'},
+    'x.com': {'ref_src', 'ref_url'},
+}
+
+# Google News wraps every story in a redirect; the article id identifies it
+GOOGLE_NEWS_ARTICLE = re.compile(r'^/(?:rss/)?articles/([^/?#]+)')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def host_tracking_params(host):
+    """
+    Tracking keys specific to a host or any domain it belongs to.
+    """
+    params = set()
+    labels = host.split(':')[0].split('.')
+    for i in range(len(labels) - 1):
+        params |= HOST_TRACKING_PARAMS.get('.'.join(labels[i:]), set())
+    return params
+
+
+def canonicalize_url(url):
+    """
+    Normalize a news URL so that copies of the same story compare equal.
+    
+    Lowercases the scheme and host, drops "www.", default ports, fragments,
+    trailing slashes and tracking parameters (generic keys such as "ref" only
+    on hosts known to use them for tracking), and sorts the remaining query
+    parameters. Google News redirect URLs are reduced to their article id.
+    
+    Args:
+        url: The article URL
+    
+    Returns:
+        str: The canonical URL, or '' for an empty URL
+    """
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    if host == 'news.google.com':
+        match = GOOGLE_NEWS_ARTICLE.match(parts.path)
+        if match:
+            return f"https://news.google.com/articles/{match.group(1)}"
+
+    path = re.sub(r'/{2,}', '/', parts.path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+    host_params = host_tracking_params(host)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and key.lower() not in host_params
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def hash_link(url):
+    """
+    Fixed-width key for a link: 32 hex chars of BLAKE2b over the canonical URL.
+    Returns None for an empty URL.
+    """
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return None
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
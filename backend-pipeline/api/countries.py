@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+from django.conf import settings
+
+DEFAULT_KEYWORDS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'country_keywords.json')
+
+_detector = None
+_lock = threading.Lock()
+
+
+def load_country_keywords(path=None):
+    """
+    Load the country keyword table.
+    
+    Args:
+        path: JSON file mapping country codes to keyword lists. Defaults to
+              settings.COUNTRY_KEYWORDS_FILE, then api/data/country_keywords.json.
+    
+    Returns:
+        dict: country code -> list of lowercase keywords, in priority order
+    """
+    path = path or getattr(settings, 'COUNTRY_KEYWORDS_FILE', None) or DEFAULT_KEYWORDS_FILE
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    return {country: [keyword.lower() for keyword in keywords] for country, keywords in table.items()}
+
+
+def _trie_pattern(words):
+    """
+    Build a regex alternation from a prefix trie of the words, so matching at
+    a position costs the length of the keyword, not the number of keywords.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not end:
+            return branches[0]
+        pattern = '(?:' + '|'.join(branches) + ')'
+        return pattern + '?' if end else pattern
+
+    return build(trie)
+
+
+class CountryDetector:
+    """
+    Detects the country an article is about from keyword mentions.
+    
+    All keywords are compiled into one word-bounded regex, so each text is
+    scanned once no matter how many countries are configured. A country's
+    score is its number of keyword hits; ties go to the country listed first.
+    """
+
+    def __init__(self, keyword_table):
+        self.countries = list(keyword_table)
+        self.keyword_countries = {}
+        for country, keywords in keyword_table.items():
+            for keyword in keywords:
+                self.keyword_countries.setdefault(keyword, []).append(country)
+        # Word keywords must match whole words ("uk" must not hit "ukraine");
+        # symbols such as "₹" are matched anywhere. Optional suffixes in the
+        # trie are greedy, so "germany" is matched whole.
+        words = [k for k in self.keyword_countries if re.match(r'\w', k) and re.search(r'\w$', k)]
+        symbols = [k for k in self.keyword_countries if k not in words]
+        alternatives = [r'(?<!\w)' + _trie_pattern(words) + r'(?!\w)'] if words else []
+        if symbols:
+            alternatives.append(_trie_pattern(symbols))
+        self.pattern = re.compile('|'.join(alternatives))
+        self.priority = {country: i for i, country in enumerate(self.countries)}
+
+    def scores(self, text):
+        """
+        Count keyword hits per country in a text.
+        """
+        counts = Counter()
+        for match in self.pattern.finditer(text.lower()):
+            for country in self.keyword_countries[match.group()]:
+                counts[country] += 1
+        return counts
+
+    def detect(self, text):
+        """
+        Return the best matching country code for a text, or "unknown".
+        """
+        counts = self.scores(text)
+        if not counts:
+            return "unknown"
+        return max(counts, key=lambda country: (counts[country], -self.priority[country]))
+
+
+def get_detector():
+    """
+    Return the process-wide detector, compiling it on first use.
+    """
+    global _detector
+    if _detector is None:
+        with _lock:
+            if _detector is None:
+                _detector = CountryDetector(load_country_keywords())
+    return _detector
@@ -0,0 +1,123 @@
+import logging
+from collections import namedtuple
+from django.conf import settings
+from .analytics.sentiment import analyze_sentiment_batch
+from .analytics.sentiment_cache import get_sentiment_cache
+from .analytics.summarizer import summarize_batch
+from .models import AnalyticsWatermark, ProcessedData
+
+logger = logging.getLogger(__name__)
+
+# A batch analytics job over stored articles: the columns it reads, the
+# columns it writes, the filter for rows it has not handled yet, and the
+# function that fills the write columns in for a list of rows
+AnalyticsJob = namedtuple('AnalyticsJob', ['read_fields', 'update_fields', 'pending', 'run'])
+
+
+def sentiment_text(article):
+    return '\n'.join(part for part in (article.title, article.description) if part)
+
+
+def score_sentiment(articles):
+    """
+    Set sentiment_score and sentiment_label for a list of articles, scoring
+    them as one batch.
+    """
+    results = analyze_sentiment_batch([sentiment_text(article) for article in articles])
+    for article, result in zip(articles, results):
+        article.sentiment_score = result['polarity']
+        article.sentiment_label = result['sentiment']
+
+
+def summarize(articles):
+    """
+    Set summary for a list of articles, summarizing them as one batch;
+    articles without text get an empty summary, so they are not picked up
+    again.
+    """
+    summaries = summarize_batch(
+        [article.content or article.description for article in articles],
+        getattr(settings, 'SUMMARY_SENTENCES', 3),
+    )
+    for article, summary in zip(articles, summaries):
+        article.summary = summary
+
+
+JOBS = {
+    'sentiment': AnalyticsJob(
+        read_fields=('title', 'description'),
+        update_fields=['sentiment_score', 'sentiment_label'],
+        pending={'sentiment_score__isnull': True},
+        run=score_sentiment,
+    ),
+    'summary': AnalyticsJob(
+        read_fields=('description', 'content'),
+        update_fields=['summary'],
+        pending={'summary__isnull': True},
+        run=summarize,
+    ),
+}
+
+
+def run_job(name, start_id=None, end_id=None, batch_size=None):
+    """
+    Run one analytics job over the ProcessedData rows it has not handled.
+    
+    Rows are read in id order, batch_size at a time with only the columns
+    the job needs, processed as a batch and written back with one
+    bulk_update per batch.
+    
+    Without an id range the job continues from its watermark, the highest
+    id it has handled. It re-reads ANALYTICS_WATERMARK_OVERLAP ids below
+    the watermark, because rows can commit out of id order; rows already
+    handled there are skipped by the pending filter.
+    
+    Args:
+        name: Key of JOBS, e.g. 'sentiment'
+        start_id: First id of an explicit range (inclusive)
+        end_id: Last id of an explicit range (inclusive)
+        batch_size: Rows per batch, defaults to settings.ANALYTICS_BATCH_SIZE
+    
+    Returns:
+        dict: rows updated and the watermark after the run (None for ranges)
+    """
+    job = JOBS[name]
+    if batch_size is None:
+        batch_size = getattr(settings, 'ANALYTICS_BATCH_SIZE', 1000)
+    since_watermark = start_id is None and end_id is None
+    watermark = None
+    if since_watermark:
+        watermark = AnalyticsWatermark.objects.get_or_create(name=name)[0].last_id
+        start_id = max(watermark - getattr(settings, 'ANALYTICS_WATERMARK_OVERLAP', 1000), 0) + 1
+
+    rows = ProcessedData.objects.filter(**job.pending).only('id', *job.read_fields).order_by('id')
+    if end_id is not None:
+        rows = rows.filter(id__lte=end_id)
+    last_id = (start_id or 1) - 1
+    updated = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        job.run(batch)
+        ProcessedData.objects.bulk_update(batch, job.update_fields)
+        updated += len(batch)
+        last_id = batch[-1].id
+        if since_watermark and last_id > watermark:
+            watermark = last_id
+            AnalyticsWatermark.objects.filter(name=name).update(last_id=watermark)
+
+    logger.info(f"Analytics job {name}: updated {updated} articles")
+    return {'updated': updated, 'watermark': watermark}
+
+
+def run_all(start_id=None, end_id=None):
+    """
+    Run every analytics job, e.g. after new articles are processed, then
+    add this worker's sentiment cache counts to the shared stats.
+    """
+    results = {name: run_job(name, start_id, end_id) for name in JOBS}
+    cache = get_sentiment_cache()
+    if cache is not None:
+        cache.flush()
+    return results
@@ -1,34 +1,53 @@
 import requests
 import logging
+import calendar
 import feedparser
-import time
-import random
-from datetime import datetime
+import hashlib
+import threading
+import re
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import urlparse
 from django.conf import settings
-from .models import RawData
-from .processing import normalize_text, clean_and_process_data
+from django.db import IntegrityError, transaction
+from .articles import Article, as_article
+from .canonical import hash_link
+from .countries import get_detector
+from .http_session import get_session
+from .ratelimit import RateLimited, blocking_waits, get_rate_limiter, rate_limit_key, retry_after_seconds
+from .models import RawData, FeedState
+from .payloads import store_payloads
+from .processing import normalize_text, iter_chunks, process_unsaved
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+_run_keys = OrderedDict()  # run id -> claimed dedupe keys, without Redis
+_run_keys_lock = threading.Lock()
+
 # Define countries to fetch news from
 COUNTRIES = ['us', 'gb', 'in', 'jp', 'fr', 'ca', 'au', 'de']
 
 # Define news categories to fetch
 CATEGORIES = ['BUSINESS', 'TECHNOLOGY', 'WORLD', 'NATION', 'SCIENCE', 'ENTERTAINMENT', 'SPORTS', 'HEALTH']
 
-def fetch_google_news_rss(country_code, category=None):
+# Word characters used to compare titles when deduplicating
+TITLE_WORDS = re.compile(r'\w+')
+
+# Fan-out runs whose dedupe keys are kept in process when Redis is down
+MAX_LOCAL_RUNS = 8
+
+# API endpoints used as backup sources
+GNEWS_URL = 'https://gnews.io/api/v4/top-headlines'
+NEWSAPI_URL = 'https://api.thenewsapi.com/v1/news/top'
+
+
+def build_google_news_rss_url(country_code, category=None):
     """
-    Fetch news from Google News RSS feeds based on country and optional category.
-    
-    Args:
-        country_code: Two-letter country code (us, gb, in, etc.)
-        category: News category (BUSINESS, TECHNOLOGY, etc.) or None for top stories
-    
-    Returns:
-        List of article dictionaries
+    Build the Google News RSS URL for a country and optional category.
     """
-    articles = []
     country = country_code.lower()
     language = 'en'  # Default to English
     
@@ -44,46 +63,125 @@ def fetch_google_news_rss(country_code, category=None):
         url = f"https://news.google.com/rss/headlines/section/topic/{category}?hl={hl_param}&gl={gl_param}&ceid={ceid_param}"
     else:
         url = f"https://news.google.com/rss?hl={hl_param}&gl={gl_param}&ceid={ceid_param}"
+    return url
+
+def fetch_google_news_rss(country_code, category=None, feed_state=None):
+    """
+    Fetch news from Google News RSS feeds based on country and optional category.
+    
+    Args:
+        country_code: Two-letter country code (us, gb, in, etc.)
+        category: News category (BUSINESS, TECHNOLOGY, etc.) or None for top stories
+        feed_state: Optional FeedState holding the validators and high-water mark
+                    from the last fetch. It is updated in place; on a 304 its
+                    not_modified flag is set and no articles are returned. Entries
+                    at or below the mark are skipped and counted in entries_skipped.
+    
+    Returns:
+        List of Article records
+    
+    Raises:
+        RateLimited: if news.google.com is out of capacity; reschedule the fetch
+    """
+    articles = []
+    country = country_code.lower()
+    url = build_google_news_rss_url(country, category)
+    limiter = get_rate_limiter()
+    key = rate_limit_key(url)
+    limiter.acquire(key)
+    
+    # Send the validators from the previous fetch so unchanged feeds answer 304
+    headers = {}
+    if feed_state is not None:
+        feed_state.not_modified = False
+        if feed_state.etag:
+            headers['If-None-Match'] = feed_state.etag
+        if feed_state.last_modified:
+            headers['If-Modified-Since'] = feed_state.last_modified
     
     try:
-        feed = feedparser.parse(url)
+        response = get_session().get(url, headers=headers, timeout=10)
+        if response.status_code == 429:
+            retry_after = retry_after_seconds(response)
+            limiter.block(key, retry_after)
+            raise RateLimited(key, retry_after)
+        if response.status_code == 304:
+            if feed_state is not None:
+                feed_state.not_modified = True
+            logger.info(f"Google News RSS not modified for {country}, category: {category or 'top stories'}")
+            return articles
+        response.raise_for_status()
+        if feed_state is not None:
+            feed_state.etag = response.headers.get('ETag')
+            feed_state.last_modified = response.headers.get('Last-Modified')
+            feed_state.content_length = len(response.content)
+        feed = feedparser.parse(response.content)
+        
+        # High-water mark: newest entry stored by an earlier run of this feed
+        mark = None
+        if feed_state is not None and feed_state.high_water_date:
+            mark = (calendar.timegm(feed_state.high_water_date.utctimetuple()), feed_state.high_water_link_hash)
+        newest = mark
+        skipped = 0
         
         for entry in feed.entries[:20]:  # Limit to 20 articles per feed
+            # Skip entries at or below the mark before any further work,
+            # using the timestamp feedparser has already parsed
+            published_parsed = entry.get('published_parsed')
+            if published_parsed is not None:
+                entry_key = (calendar.timegm(published_parsed), None)
+                if mark is not None and (entry_key[0] < mark[0] or (
+                        entry_key[0] == mark[0] and hash_link(entry.get('link')) == mark[1])):
+                    skipped += 1
+                    continue
+                if newest is None or entry_key[0] > newest[0]:
+                    newest = (entry_key[0], hash_link(entry.get('link')))
+            
             # Extract the source from the title if possible (Google format: "Title - Source")
             title_parts = entry.title.split(' - ')
             title = title_parts[0] if len(title_parts) > 1 else entry.title
             source = title_parts[-1] if len(title_parts) > 1 else "Google News"
             
-            # Parse the published date
-            try:
-                published_date = datetime.strptime(entry.published, "%a, %d %b %Y %H:%M:%S %Z")
-            except (ValueError, AttributeError):
-                published_date = datetime.now()
+            # The published date, from the same parsed timestamp
+            if published_parsed is not None:
+                published_date = datetime.fromtimestamp(entry_key[0], tz=dt_timezone.utc)
+            else:
+                published_date = timezone.now()
             
-            articles.append({
-                'title': title,
-                'description': getattr(entry, 'description', ''),
-                'content': getattr(entry, 'content', getattr(entry, 'summary', '')),
-                'published_date': published_date.isoformat(),
-                'publishedAt': published_date.isoformat(),  # For compatibility
-                'source': source,
-                'url': entry.link,
-                'country': country,
-                'category': category.lower() if category else 'general'
-            })
+            articles.append(Article(
+                title=title,
+                description=getattr(entry, 'description', ''),
+                content=getattr(entry, 'content', getattr(entry, 'summary', '')),
+                published_date=published_date,
+                source=source,
+                link=entry.link,
+                country=country,
+                category=category.lower() if category else 'general',
+                raw={key: value for key, value in entry.items() if isinstance(value, str)},
+            ))
         
-        logger.info(f"Fetched {len(feed.entries)} Google News RSS articles for {country}, category: {category or 'top stories'}")
+        if feed_state is not None:
+            feed_state.entries_skipped = skipped
+            if newest is not None and newest != mark:
+                feed_state.high_water_date = datetime.fromtimestamp(newest[0], tz=dt_timezone.utc)
+                feed_state.high_water_link_hash = newest[1]
+        logger.info(f"Fetched {len(feed.entries)} Google News RSS articles for {country}, category: {category or 'top stories'}: {len(articles)} new, {skipped} already seen")
+    except RateLimited:
+        raise
     except Exception as e:
         logger.error(f"Error fetching Google News RSS for {country}, {category}: {e}")
     
     return articles
 
-def fetch_gnews_for_country(country_code, retry_count=0, max_retries=3):
+def fetch_gnews_for_country(country_code):
     """
     Fetches the latest business news articles from GNews for a specific country.
+    
+    Raises:
+        RateLimited: if the GNews key is out of capacity; reschedule the fetch
     """
     GNEWS_API_KEY = settings.GNEWS_API_KEY
-    url = 'https://gnews.io/api/v4/top-headlines'
+    url = GNEWS_URL
     params = {
         'category': 'business',
         'lang': 'en',
@@ -91,33 +189,37 @@ def fetch_gnews_for_country(country_code, retry_count=0, max_retries=3):
         'max': 10,
         'apikey': GNEWS_API_KEY,
     }
+    limiter = get_rate_limiter()
+    key = rate_limit_key(url, GNEWS_API_KEY)
+    limiter.acquire(key)
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = get_session().get(url, params=params, timeout=10)
+        if response.status_code == 429:
+            # Block the key for every worker instead of sleeping here
+            retry_after = retry_after_seconds(response)
+            limiter.block(key, retry_after)
+            logger.info(f"Rate limited for {country_code}. Rescheduling in {retry_after:.2f} seconds")
+            raise RateLimited(key, retry_after)
         response.raise_for_status()
-        articles = response.json().get('articles', [])
-        
-        # Tag articles with country
-        for article in articles:
-            article['country'] = country_code
-            
-        return articles
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 429 and retry_count < max_retries:
-            # Exponential backoff with jitter
-            sleep_time = (2 ** retry_count) + random.uniform(0, 1)
-            logger.info(f"Rate limited for {country_code}. Retrying in {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
-            return fetch_gnews_for_country(country_code, retry_count + 1, max_retries)
+        # Tag articles with country, keeping the response item as the raw payload
+        return [
+            Article.from_dict({**article, 'country': country_code, 'raw': article})
+            for article in response.json().get('articles', [])
+        ]
+    except requests.RequestException as e:
         logger.error(f"GNews API error for country {country_code}: {e}")
         return []
 
 def fetch_newsapi_for_country(country_code):
     """
     Fetches the latest business news articles from NewsAPI for a specific country.
+    
+    Raises:
+        RateLimited: if the NewsAPI key is out of capacity; reschedule the fetch
     """
     NEWSAPI_KEY = settings.NEWSAPI_KEY
-    url = 'https://api.thenewsapi.com/v1/news/top'
+    url = NEWSAPI_URL
     
     # Map country codes to locale format
     locale_mapping = {
@@ -133,15 +235,22 @@ def fetch_newsapi_for_country(country_code):
         'language': 'en',
         'categories': 'business'
     }
+    limiter = get_rate_limiter()
+    key = rate_limit_key(url, NEWSAPI_KEY)
+    limiter.acquire(key)
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = get_session().get(url, params=params, timeout=10)
+        if response.status_code == 429:
+            retry_after = retry_after_seconds(response)
+            limiter.block(key, retry_after)
+            raise RateLimited(key, retry_after)
         response.raise_for_status()
         data = response.json()
-        articles = data.get('data', [])
-        # Tag each article with the country code
-        for article in articles:
-            article['country'] = country_code
-        return articles
+        # Tag each article with the country code, keeping the response item as the raw payload
+        return [
+            Article.from_dict({**article, 'country': country_code, 'raw': article})
+            for article in data.get('data', [])
+        ]
     except requests.RequestException as e:
         logger.error(f"NewsAPI error for country {country_code}: {e}")
         return []
@@ -150,141 +259,496 @@ def detect_country_from_content(title, content, description):
     """
     Extract country from news text using keyword matching
     """
-    country_keywords = {
-        'us': ['united states', 'america', 'biden', 'trump', 'washington', 'new york', 'california', 'florida', 'texas', 'dollar', 'usd'],
-        'in': ['india', 'mumbai', 'delhi', 'bangalore', 'rupee', '₹', 'crore', 'lakh', 'modi', 'bengaluru', 'hyderabad'],
-        'gb': ['uk', 'britain', 'london', 'england', 'british', 'scotland', 'wales', 'pound sterling', 'sunak'],
-        'jp': ['japan', 'tokyo', 'yen', 'osaka', 'japanese', 'kyoto'],
-        'fr': ['france', 'paris', 'french', 'euro', 'macron', 'lyon', 'marseille'],
-        'ca': ['canada', 'toronto', 'vancouver', 'montreal', 'canadian', 'trudeau', 'ottawa'],
-        'au': ['australia', 'sydney', 'melbourne', 'australian', 'canberra', 'brisbane'],
-        'de': ['germany', 'berlin', 'german', 'euro', 'munich', 'frankfurt', 'hamburg']
+    return get_detector().detect(f"{title} {description} {content}")
+
+class HostLimiter:
+    """
+    Caps the number of in-flight requests per host across fetch threads.
+    """
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = semaphore
+        return semaphore
+
+
+def iter_fetch_jobs(jobs, concurrent=True, max_workers=None, per_host_limit=None):
+    """
+    Run fetch jobs and yield each job's result as soon as it is available,
+    in completion order.
+    
+    At most two jobs per thread are in flight; the next jobs are submitted
+    only as results are taken, so a slow consumer never has more than that
+    many finished results waiting.
+    
+    Args:
+        jobs: List of (url, fetch_function, args) tuples. The functions
+              report their own errors (see fetch_feed_job); an exception
+              they raise stops the run.
+        concurrent: Run the jobs on a bounded thread pool instead of one at a time
+        max_workers: Size of the thread pool
+        per_host_limit: Maximum concurrent requests to any single host
+    
+    Yields:
+        Each job's return value
+    """
+    if not jobs:
+        return
+    if not concurrent:
+        # Pacing is left to the rate limiter
+        for url, fetch, args in jobs:
+            yield fetch(*args)
+        return
+
+    if max_workers is None:
+        max_workers = getattr(settings, 'INGESTION_FETCH_MAX_WORKERS', 16)
+    if per_host_limit is None:
+        per_host_limit = getattr(settings, 'INGESTION_PER_HOST_CONCURRENCY', 8)
+    limiter = HostLimiter(per_host_limit)
+    workers = max(1, min(max_workers, len(jobs)))
+
+    def run(job):
+        url, fetch, args = job
+        with limiter.for_url(url):
+            return fetch(*args)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        remaining = iter(jobs)
+        in_flight = deque()
+
+        def submit():
+            for job in islice(remaining, workers * 2 - len(in_flight)):
+                in_flight.append(executor.submit(run, job))
+
+        submit()
+        while in_flight:
+            done = list(wait(in_flight, return_when=FIRST_COMPLETED).done)
+            for future in done:
+                in_flight.remove(future)
+            # Keep the pool busy while the consumer handles these results
+            submit()
+            for future in done:
+                yield future.result()
+
+
+def load_feed_states(source='google_news'):
+    """
+    Load stored fetch state for every (country, category) feed of a source.
+    
+    Returns:
+        Dict mapping (country, category) to a FeedState (unsaved if new)
+    """
+    states = {
+        (state.country, state.category): state
+        for state in FeedState.objects.filter(source=source)
     }
+    for country in COUNTRIES:
+        for category in [None] + CATEGORIES:
+            key = (country, category.lower() if category else 'general')
+            if key not in states:
+                states[key] = FeedState(source=source, country=key[0], category=key[1])
+    return states
+
+
+def save_feed_states(states):
+    """
+    Persist feed validators in a single upsert.
+    """
+    FeedState.objects.bulk_create(
+        list(states),
+        update_conflicts=True,
+        unique_fields=['source', 'country', 'category'],
+        update_fields=['etag', 'last_modified', 'content_length',
+                       'high_water_date', 'high_water_link_hash', 'updated_at'],
+    )
+
+
+def feed_specs():
+    """
+    Every Google News RSS feed as a (source, country, category) tuple,
+    top stories first.
+    """
+    return [('google_news', country, category) for country in COUNTRIES for category in [None] + CATEGORIES]
+
+
+def backup_feed_specs(countries):
+    """
+    API backup feeds for the given countries.
+    """
+    return [(source, country, None) for country in countries for source in ('gnews', 'newsapi')]
+
+
+def feed_url(source, country, category=None):
+    """
+    URL a feed is fetched from, for the per-host limits of iter_fetch_jobs.
+    """
+    if source == 'gnews':
+        return GNEWS_URL
+    if source == 'newsapi':
+        return NEWSAPI_URL
+    return build_google_news_rss_url(country, category)
+
+
+def fetch_feed(source, country, category=None, stats=None, feed_states=None, state=None):
+    """
+    Fetch a single feed, loading its FeedState for RSS feeds.
+    
+    Args:
+        source: 'google_news', 'gnews' or 'newsapi'
+        country: Two-letter country code
+        category: News category for Google News, or None for top stories
+        stats: Optional dict that receives not_modified, bytes_saved and
+               entries_skipped for this feed
+        feed_states: Optional list that receives the updated FeedState. It
+                     is not saved here: the caller saves it with
+                     save_feed_states once the articles are stored, so a
+                     failed store fetches the same entries again.
+        state: Optional FeedState of an RSS feed, loaded by the caller
+               (see load_feed_states); otherwise it is read here
+    
+    Returns:
+        List of Article records
+    
+    Raises:
+        RateLimited: if the source is out of capacity
+    """
+    if stats is None:
+        stats = {}
+    if source == 'gnews':
+        return fetch_gnews_for_country(country)
+    if source == 'newsapi':
+        return fetch_newsapi_for_country(country)
+
+    if state is None:
+        category_key = category.lower() if category else 'general'
+        state = (
+            FeedState.objects.filter(source=source, country=country, category=category_key).first()
+            or FeedState(source=source, country=country, category=category_key)
+        )
+    articles = fetch_google_news_rss(country, category, state)
+    if feed_states is not None:
+        feed_states.append(state)
+    stats['not_modified'] = getattr(state, 'not_modified', False)
+    stats['bytes_saved'] = state.content_length if stats['not_modified'] else 0
+    stats['entries_skipped'] = getattr(state, 'entries_skipped', 0)
+    return articles
+
+
+def sparse_countries(country_counts, unchanged_countries=()):
+    """
+    Countries that need the API backups: fewer than 10 articles in their
+    feeds, counting entries skipped as already stored, unless every one of
+    their feeds answered 304 (then nothing has changed since the last run).
+    """
+    return [
+        country for country in COUNTRIES
+        if country not in unchanged_countries and country_counts.get(country, 0) < 10
+    ]
+
+
+def unchanged_countries(feeds):
+    """
+    Countries all of whose feeds answered 304.
+    
+    Args:
+        feeds: Iterable of (country, not_modified) pairs, one per feed
+    """
+    unchanged = {}
+    for country, not_modified in feeds:
+        unchanged[country] = unchanged.get(country, True) and bool(not_modified)
+    return {country for country, all_unchanged in unchanged.items() if all_unchanged}
+
+
+def fetch_feed_job(source, country, category=None, state=None):
+    """
+    Fetch one feed on an iter_fetch_jobs thread. Never raises, so one
+    failing feed does not stop the others. The thread is the caller's own,
+    so it may sleep a little for a rate limit token (see blocking_waits).
     
-    combined_text = (f"{title} {description} {content}").lower()
+    Returns:
+        ((source, country, category), articles, stats, feed_states, error),
+        where error is the exception the fetch raised, or None
+    """
+    stats = {}
+    feed_states = []
+    try:
+        with blocking_waits():
+            articles = fetch_feed(source, country, category, stats=stats, feed_states=feed_states, state=state)
+    except Exception as e:
+        return (source, country, category), [], stats, feed_states, e
+    return (source, country, category), articles, stats, feed_states, None
+
+def dedupe_articles(articles, stats=None):
+    """
+    Collapse copies of the same story before any database work.
     
-    for country_code, keywords in country_keywords.items():
-        for keyword in keywords:
-            if keyword in combined_text:
-                return country_code
+    Two articles are the same story when their canonical URLs match, or
+    when they have the same normalized title from the same source (this
+    catches a story that arrives both as a Google News redirect and as a
+    publisher URL). The first copy wins, so country top stories take
+    precedence over category feeds and API backups.
+    
+    Args:
+        articles: Iterable of Article records (or article dicts)
+        stats: Optional dict that receives the duplicates_dropped counter
     
-    return "unknown"
+    Returns:
+        List of unique Article records
+    """
+    unique = list(iter_unique_articles(articles, stats))
+    logger.info(f"{len(unique)} unique articles")
+    return unique
 
-def fetch_all_news():
+def iter_unique_articles(articles, stats=None):
     """
-    Combines articles from all sources for all countries and categories.
+    Generator version of dedupe_articles. Only fixed-width hashes of the
+    seen keys are kept, not the articles themselves.
     """
-    all_articles = []
+    if stats is not None:
+        stats.setdefault('duplicates_dropped', 0)
+    seen = set()
     
-    # 1. Fetch from Google News RSS - first priority
-    for country in COUNTRIES:
-        # Top stories for each country
-        top_stories = fetch_google_news_rss(country)
-        all_articles.extend(top_stories)
-        
-        # Category-specific stories for each country
-        for category in CATEGORIES:
-            category_stories = fetch_google_news_rss(country, category)
-            all_articles.extend(category_stories)
-            
-            # Add a small delay to avoid overwhelming servers
-            time.sleep(0.5)
+    for article in articles:
+        article = as_article(article)
+        keys = dedupe_keys(article)
+        if any(key in seen for key in keys):
+            if stats is not None:
+                stats['duplicates_dropped'] += 1
+            continue
+        seen.update(keys)
+        yield article
+
+def dedupe_keys(article):
+    """
+    The keys dedupe_articles compares: the link hash and a hash of the
+    normalized title and source, whichever the article has.
+    """
+    keys = [article.link_hash] if article.link_hash else []
+    title = ' '.join(TITLE_WORDS.findall((article.title or '').lower()))
+    if title:
+        keys.append(hashlib.blake2b(
+            f"{title}\n{article.source.lower()}".encode('utf-8'), digest_size=16
+        ).hexdigest())
+    return keys
+
+def claim_articles(run_id, articles, stats=None):
+    """
+    Dedupe across the feeds of one fan-out run.
     
-    # 2. Fetch from API sources as backup/additional
-    for country in COUNTRIES:
-        # Only fetch from APIs if we have fewer than 10 articles for this country
-        country_article_count = sum(1 for article in all_articles if article.get('country') == country)
-        
-        if country_article_count < 10:
-            gnews_articles = fetch_gnews_for_country(country)
-            newsapi_articles = fetch_newsapi_for_country(country)
-            
-            all_articles.extend(gnews_articles)
-            all_articles.extend(newsapi_articles)
-            
-            logger.info(f"Fetched {len(gnews_articles)} articles from GNews and {len(newsapi_articles)} articles from NewsAPI for {country}")
+    Each feed task dedupes its own articles, then claims their keys for the
+    run; articles with a key another feed already claimed are dropped, as
+    dedupe_articles would have dropped them in a single pass. Claims are
+    made with SET NX in the rate limiter's Redis, so every worker of the
+    run sees them, and expire after INGESTION_RUN_DEDUPE_SECONDS. Without
+    Redis they are kept in process for the last few runs.
+    
+    Args:
+        run_id: Id shared by the fetch tasks of a run
+        articles: Article records of one feed, already deduped
+        stats: Optional dict whose duplicates_dropped counter is increased
     
-    return all_articles
+    Returns:
+        List of the articles no other feed of the run has taken
+    """
+    keyed = [(article, dedupe_keys(article)) for article in map(as_article, articles)]
+    redis_client = get_rate_limiter().redis
+    claimed = None
+    if redis_client is not None:
+        ttl = int(getattr(settings, 'INGESTION_RUN_DEDUPE_SECONDS', 3600))
+        # One transaction per feed, so two feeds never split a story's keys
+        pipe = redis_client.pipeline(transaction=True)
+        for _, keys in keyed:
+            for key in keys:
+                pipe.set(f"run:{run_id}:{key}", 1, nx=True, ex=ttl)
+        try:
+            replies = iter(pipe.execute())
+            claimed = [
+                article for article, keys in keyed
+                if all([bool(next(replies)) for _ in keys])
+            ]
+        except Exception as e:
+            logger.warning(f"Could not claim dedupe keys in Redis, using in-process keys: {e}")
+    if claimed is None:
+        with _run_keys_lock:
+            seen = _run_keys.pop(run_id, None) or set()
+            _run_keys[run_id] = seen
+            while len(_run_keys) > MAX_LOCAL_RUNS:
+                _run_keys.popitem(last=False)
+            claimed = []
+            for article, keys in keyed:
+                if not any(key in seen for key in keys):
+                    seen.update(keys)
+                    claimed.append(article)
+    if stats is not None:
+        stats['duplicates_dropped'] = stats.get('duplicates_dropped', 0) + len(keyed) - len(claimed)
+    return claimed
 
-def process_and_store_news():
+def article_to_fields(article):
     """
-    Processes and stores fetched articles in the RawData model.
-    Returns a list of stored articles.
+    Map a fetched article (an Article record or dict) onto RawData field values.
     """
-    articles = fetch_all_news()
+    article = as_article(article)
+    
+    # Get country from article or try to detect from content
+    country = article.country
+    if country == 'unknown':
+        country = detect_country_from_content(article.title, article.content, article.description)
+    
+    return {
+        'title': article.title,
+        'description': article.description,
+        'content': article.content,
+        'published_date': article.published_date,
+        'source': article.source,
+        'category': article.category,
+        'country': country,
+        'link': article.link,
+        'link_hash': article.link_hash,
+    }
+
+def store_article(fields):
+    """
+    Store a single article with get_or_create.
+    Returns (obj, created).
+    """
+    fields = dict(fields)
+    # Use the link hash as unique identifier if available, otherwise use title
+    if fields.get('link_hash'):
+        link_hash = fields.pop('link_hash')
+        return RawData.objects.get_or_create(link_hash=link_hash, defaults=fields)
+    fields.pop('link_hash', None)
+    title = fields.pop('title')
+    return RawData.objects.get_or_create(title=title, defaults=fields)
+
+def store_articles(articles, batch_size=None):
+    """
+    Store articles in RawData in batches.
+    
+    For each batch the existing links are looked up in one query and the
+    new rows are written with one bulk_create, along with their raw
+    payloads in RawPayload. Articles without a link fall back to
+    get_or_create on the title.
+    
+    Args:
+        articles: Iterable of Article records as returned by fetch_feed (or article dicts)
+        batch_size: Articles per batch, defaults to settings.INGESTION_WRITE_BATCH_SIZE
+    
+    Returns:
+        List of newly created RawData objects
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'INGESTION_WRITE_BATCH_SIZE', 500)
     stored_articles = []
+    batch = []
+    payloads = {}
+    
+    for article in map(as_article, articles):
+        fields = article_to_fields(article)
+        if not fields['link_hash']:
+            obj, created = store_article(fields)
+            if created:
+                stored_articles.append(obj)
+            continue
+        batch.append(fields)
+        payloads.setdefault(fields['link_hash'], article.raw)
+        if len(batch) >= batch_size:
+            stored_articles.extend(_store_batch(batch, payloads))
+            batch, payloads = [], {}
+    if batch:
+        stored_articles.extend(_store_batch(batch, payloads))
     
-    for article in articles:
-        title = article.get('title')
-        description = article.get('description', '')
-        content = article.get('content', '')
-        published_date = article.get('publishedAt') or article.get('published_date')
-        if published_date:
-            if isinstance(published_date, str):
-                try:
-                    # Try parsing ISO format
-                    published_date = datetime.fromisoformat(published_date.replace('Z', '+00:00'))
-                except ValueError:
-                    # Fallback to now if parsing fails
-                    published_date = datetime.now()
-                    
-            # Now make it timezone aware if it's not
-            if not timezone.is_aware(published_date):
-                published_date = timezone.make_aware(published_date)
-
-        link = article.get('url', '')
-        
-        # Get country from article or try to detect from content
-        country = article.get('country', 'unknown')
-        if country == 'unknown':
-            country = detect_country_from_content(title, content, description)
-        
-        # For both APIs, the "source" field might be a dictionary or a string
-        source_info = article.get('source', {})
-        if isinstance(source_info, dict):
-            source = source_info.get('name', '')
-        else:
-            source = str(source_info)
-            
-        # Use the provided category or default to 'general'
-        category = article.get('category', 'general')
-        
-        # Use link as unique identifier if available, otherwise use title
-        if link:
-            obj, created = RawData.objects.get_or_create(
-                link=link,
-                defaults={
-                    'title': title,
-                    'description': description,
-                    'content': content,
-                    'published_date': published_date,
-                    'source': source,
-                    'category': category,
-                    'country': country,
-                }
-            )
-        else:
-            obj, created = RawData.objects.get_or_create(
-                title=title,
-                defaults={
-                    'description': description,
-                    'content': content,
-                    'published_date': published_date,
-                    'source': source,
-                    'category': category,
-                    'country': country,
-                    'link': link,
-                }
-            )
-            
-        if created:
-            stored_articles.append(obj)
-            logger.info(f"Stored new article: {title} for country {country}")
-        else:
-            logger.info(f"Article already exists: {title}")
-            
     return stored_articles
 
+def _store_batch(batch, payloads=None):
+    """
+    Insert the articles of a batch whose links are not stored yet, and the
+    raw payloads (by link hash) of the ones inserted.
+    """
+    # Keep the first copy of each link, as get_or_create would
+    by_hash = {}
+    for fields in batch:
+        by_hash.setdefault(fields['link_hash'], fields)
+    
+    existing = set(
+        RawData.objects.filter(link_hash__in=list(by_hash)).values_list('link_hash', flat=True)
+    )
+    new_fields = [fields for link_hash, fields in by_hash.items() if link_hash not in existing]
+    
+    try:
+        with transaction.atomic():
+            created = RawData.objects.bulk_create([RawData(**fields) for fields in new_fields])
+    except IntegrityError:
+        # Another writer stored some of these links since the lookup
+        logger.warning("Bulk insert conflicted, falling back to per-article writes")
+        created = []
+        for fields in new_fields:
+            obj, was_created = store_article(fields)
+            if was_created:
+                created.append(obj)
+    
+    if payloads:
+        store_payloads({obj.link_hash: payloads.get(obj.link_hash) for obj in created})
+    logger.info(f"Stored {len(created)} new articles, {len(batch) - len(created)} already existed")
+    return created
+
+def store_processed_articles(articles, batch_size=None):
+    """
+    Fused write path: normalize articles in memory and write them straight
+    to ProcessedData, one bulk insert per batch and no RawData round trip.
+    The raw payloads of the new rows go to RawPayload.
+    
+    Args:
+        articles: Iterable of Article records as returned by fetch_feed (or article dicts)
+        batch_size: Articles per batch, defaults to settings.INGESTION_WRITE_BATCH_SIZE
+    
+    Returns:
+        List of newly created ProcessedData objects
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'INGESTION_WRITE_BATCH_SIZE', 500)
+    processed_articles = []
+    for batch in iter_chunks(articles, batch_size):
+        # Keep the first copy of each link, as _store_batch does
+        by_key = {}
+        payloads = {}
+        for article in map(as_article, batch):
+            fields = article_to_fields(article)
+            by_key.setdefault(fields['link_hash'] or id(fields), fields)
+            payloads.setdefault(fields['link_hash'], article.raw)
+        created = process_unsaved([RawData(**fields) for fields in by_key.values()])
+        store_payloads({obj.link_hash: payloads.get(obj.link_hash) for obj in created if obj.link_hash})
+        logger.info(f"Stored {len(created)} new processed articles, {len(batch) - len(created)} already existed")
+        processed_articles.extend(created)
+    return processed_articles
+
+def archive_raw_articles(articles, inline=False):
+    """
+    Queue fused-path articles for storage in RawData as well. Their raw
+    payloads are already in RawPayload.
+    
+    Runs as a Celery task so archival never slows the fetch; with
+    inline=True it runs in this process instead.
+    """
+    from .tasks import archive_raw_articles_task
+    
+    # Celery messages are JSON, so records travel as dicts
+    articles = [as_article(article).to_dict() for article in articles]
+    if not articles:
+        return
+    if inline:
+        archive_raw_articles_task.apply(args=(articles,))
+    else:
+        archive_raw_articles_task.delay(articles)
+
 def delete_processed_raw_data(processed_records=None):
     """
     Deletes raw data records that have been processed.
@@ -298,20 +762,6 @@ def delete_processed_raw_data(processed_records=None):
     logger.info(f"Deleted {deleted_count} raw data records")
     return deleted_count
 
-def fetch_process_and_clean():
-    """
-    Full pipeline: fetch, process, clean
-    """
-    # Fetch and store news articles
-    stored_articles = process_and_store_news()
-    
-    # Process the articles (uncomment when ready to use)
-    # processed_articles = clean_and_process_data(stored_articles)
-    
-    # After processing, delete the raw data (uncomment when ready)
-    # delete_processed_raw_data(stored_articles)
-    
-    return stored_articles
 
 
 
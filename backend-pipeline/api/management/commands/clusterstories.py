@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.neardup import cluster_pending, prune_story_index
+
+class Command(BaseCommand):
+    help = "Assign near-duplicate story clusters to ProcessedData rows that have none"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.PROCESSING_CHUNK_SIZE,
+            help="Articles per chunk (default: PROCESSING_CHUNK_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        clustered = cluster_pending(chunk_size=options['chunk_size'])
+        pruned = prune_story_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Clustered {clustered} articles, pruned {pruned} old index entries."
+        ))
@@ -1,14 +1,28 @@
+import argparse
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from api.ingestion import fetch_process_and_clean
+from api.models import ProcessedData
+from api.tasks import fetch_and_process_news
 
 class Command(BaseCommand):
-    help = 'Fetch and store news articles from GNews and NewsAPI'
+    help = 'Fetch and store news articles from Google News RSS, GNews and NewsAPI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fused', action=argparse.BooleanOptionalAction, default=settings.INGESTION_FUSED,
+            help="Write articles straight to ProcessedData, skipping RawData, or with --no-fused go "
+                 "through RawData. Defaults to INGESTION_FUSED.",
+        )
 
     def handle(self, *args, **options):
-        stored_articles = fetch_process_and_clean()
-        self.stdout.write(self.style.SUCCESS(f"Stored {len(stored_articles)} new articles."))
+        # Run the same fan-out workflow as the scheduled task, inline
+        result = fetch_and_process_news(inline=True, fused=options['fused'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {result['fetched']} new articles, processed {result['processed']}."
+        ))
+        self.stdout.write(str({key: value for key, value in result.items() if key not in ('fetched', 'processed')}))
         # Display a sample of the stored data
-        for article in stored_articles[:3]:
+        for article in ProcessedData.objects.order_by('-created_at')[:min(3, result['processed'])]:
             self.stdout.write(str({
                 "title": article.title,
                 "published_date": article.published_date,
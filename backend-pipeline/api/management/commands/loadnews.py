@@ -0,0 +1,49 @@
+import json
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.bulkload import bulk_load_articles
+from api.models import ProcessedData, RawData
+
+class Command(BaseCommand):
+    help = "Bulk load an NDJSON dump of fetched articles (one article dict per line) with COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file, or - for stdin")
+        parser.add_argument(
+            '--model', choices=['raw', 'processed'], default='raw',
+            help="Load into RawData, or normalize and load into ProcessedData (default: raw)",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.BULK_LOAD_CHUNK_SIZE,
+            help="Rows per COPY (default: BULK_LOAD_CHUNK_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        model = ProcessedData if options['model'] == 'processed' else RawData
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        start = time.perf_counter()
+        try:
+            stats = bulk_load_articles(read_ndjson(stream), model=model, chunk_size=options['chunk_size'])
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {stats['inserted']} new rows into {model.__name__}, "
+            f"skipped {stats['skipped']} of {stats['rows']}."
+        ))
+        self.stdout.write(f"{stats['rows']} rows in {elapsed:.2f}s ({stats['rows'] / max(elapsed, 1e-9):.0f} rows/s)")
+
+
+def read_ndjson(stream):
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise CommandError(f"Line {line_number}: {e}")
@@ -1,16 +1,44 @@
+import time
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from api.normcache import get_normalize_cache
 from api.processing import clean_and_process_data
 
 class Command(BaseCommand):
     help = "Clean raw data and store it in ProcessedData table"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.PROCESSING_WORKERS,
+            help="Processes used to normalize text (default: PROCESSING_WORKERS)",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.PROCESSING_CHUNK_SIZE,
+            help="RawData rows per chunk (default: PROCESSING_CHUNK_SIZE)",
+        )
+
     def handle(self, *args, **options):
-        processed_articles = clean_and_process_data()
+        stats = {}
+        start = time.perf_counter()
+        processed_articles = clean_and_process_data(
+            chunk_size=options['chunk_size'], workers=options['workers'], stats=stats
+        )
+        elapsed = time.perf_counter() - start
         self.stdout.write(
             self.style.SUCCESS(
                 f"Successfully processed {len(processed_articles)} new articles"
             )
         )
+        self.stdout.write(
+            f"Scanned {stats['rows']} rows in {elapsed:.2f}s "
+            f"({stats['rows'] / elapsed if elapsed else 0:.0f} rows/s, {options['workers']} workers)"
+        )
+        cache = get_normalize_cache()
+        if cache is not None:
+            # Pool workers keep their own LRU; the shared counters need Redis
+            snapshot = cache.snapshot()
+            cache_stats = snapshot.get('shared', snapshot)
+            self.stdout.write(f"Normalization cache hit rate: {cache_stats['hit_rate']:.1%}")
         
         # Display sample of processed articles
         if processed_articles:
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_link_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedstate',
+            name='high_water_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedstate',
+            name='high_water_link_hash',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
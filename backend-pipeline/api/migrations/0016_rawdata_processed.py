@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_feedstate_high_water'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rawdata',
+            name='processed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='rawdata',
+            index=models.Index(condition=models.Q(('processed', False)), fields=['id'], name='rawdata_pending_idx'),
+        ),
+    ]
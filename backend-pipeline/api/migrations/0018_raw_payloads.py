@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:20
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def compress(payload):
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=3).compress(data)
+    return 'zlib', zlib.compress(data)
+
+
+def move_raw_responses(apps, schema_editor):
+    """
+    Copy inline raw_response values into RawPayload before the columns go.
+    Rows without a link hash have no key to store them under and are dropped.
+    """
+    RawPayload = apps.get_model('api', 'RawPayload')
+    for model_name in ('ProcessedData', 'RawData'):
+        model = apps.get_model('api', model_name)
+        rows = (
+            model.objects.filter(raw_response__isnull=False, link_hash__isnull=False)
+            .order_by('id').values_list('link_hash', 'raw_response')
+        )
+        batch = []
+        for link_hash, raw_response in rows.iterator(chunk_size=1000):
+            codec, data = compress(raw_response)
+            batch.append(RawPayload(link_hash=link_hash, codec=codec, data=data))
+            if len(batch) >= 1000:
+                RawPayload.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        RawPayload.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def restore_raw_responses(apps, schema_editor):
+    RawPayload = apps.get_model('api', 'RawPayload')
+    for payload in RawPayload.objects.iterator(chunk_size=1000):
+        data = bytes(payload.data)
+        if payload.codec == 'zstd':
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = zlib.decompress(data)
+        raw_response = json.loads(data)
+        for model_name in ('ProcessedData', 'RawData'):
+            apps.get_model('api', model_name).objects.filter(link_hash=payload.link_hash).update(raw_response=raw_response)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_story_clusters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawPayload',
+            fields=[
+                ('link_hash', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('codec', models.CharField(max_length=10)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(move_raw_responses, restore_raw_responses),
+        migrations.RemoveField(
+            model_name='processeddata',
+            name='raw_response',
+        ),
+        migrations.RemoveField(
+            model_name='rawdata',
+            name='raw_response',
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:24
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLE = 'api_processeddata'
+SEQUENCE = 'api_processeddata_id_part_seq'
+MONTHS_BACK = 24  # Older rows go to the default partition
+MONTHS_AHEAD = 2
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def copy_indexes(cursor, source, target):
+    """
+    Recreate the plain (non-constraint) indexes of source on target under
+    their original names, so later migrations still find them.
+    """
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint)",
+        [source],
+    )
+    for name, indexdef in cursor.fetchall():
+        create = 'CREATE UNIQUE INDEX' if indexdef.startswith('CREATE UNIQUE') else 'CREATE INDEX'
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_old"')
+        cursor.execute(f'{create} "{name}" ON "{target}" USING {indexdef.split(" USING ", 1)[1]}')
+
+
+def partition_table(apps, schema_editor):
+    """
+    Rebuild api_processeddata as a table range partitioned by published_date,
+    with monthly partitions for the stored rows and the next months.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_old"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{TABLE}_old" INCLUDING DEFAULTS) PARTITION BY RANGE (published_date)'
+        )
+        # A partitioned table cannot have a primary key on id alone; ids
+        # keep coming from a sequence and are unique per published_date
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{SEQUENCE}"\')')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT processeddata_id_uniq UNIQUE (id, published_date)')
+        copy_indexes(cursor, f"{TABLE}_old", TABLE)
+
+        cursor.execute(f'SELECT MIN(published_date) FROM "{TABLE}_old"')
+        oldest = cursor.fetchone()[0]
+        now = datetime.now(timezone.utc)
+        current = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+        month = add_months(current, -MONTHS_BACK)
+        if oldest is not None and oldest > month:
+            oldest = oldest.astimezone(timezone.utc)
+            month = datetime(oldest.year, oldest.month, 1, tzinfo=timezone.utc)
+        # The previous month too, for the country_news lookback window
+        month = min(month, add_months(current, -1))
+        while month <= add_months(current, MONTHS_AHEAD):
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [month, add_months(month, 1)],
+            )
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{TABLE}_old"')
+        cursor.execute(f'SELECT setval(\'"{SEQUENCE}"\', COALESCE(MAX(id), 0) + 1, false) FROM "{TABLE}"')
+        cursor.execute(f'DROP TABLE "{TABLE}_old"')
+
+
+def unpartition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_old"')
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{TABLE}_old")')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id)')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        copy_indexes(cursor, f"{TABLE}_old", TABLE)
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{TABLE}_old"')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{TABLE}\"', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f'FROM "{TABLE}"'
+        )
+        cursor.execute(f'DROP TABLE "{TABLE}_old"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_raw_payloads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='storyband',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='story_bands', to='api.processeddata'),
+        ),
+        migrations.AlterField(
+            model_name='processeddata',
+            name='link_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(partition_table, unpartition_table),
+        migrations.AddConstraint(
+            model_name='processeddata',
+            constraint=models.UniqueConstraint(fields=('link_hash', 'published_date'), name='processeddata_link_uniq'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_processeddata_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentimentCacheStats',
+            fields=[
+                ('version', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('hits', models.BigIntegerField(default=0)),
+                ('misses', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SentimentScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=32)),
+                ('version', models.CharField(max_length=32)),
+                ('polarity', models.FloatField()),
+                ('subjectivity', models.FloatField()),
+                ('confidence', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'unique_together': {('version', 'text_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copies of a link stored under different published dates while only
+# (link_hash, published_date) was unique: keep the first, drop the rest
+# with their story index entries, then give every link its key
+DUPLICATES = (
+    "SELECT id FROM api_processeddata WHERE link_hash IS NOT NULL AND id NOT IN "
+    "(SELECT MIN(id) FROM api_processeddata WHERE link_hash IS NOT NULL GROUP BY link_hash)"
+)
+BACKFILL = [
+    f"DELETE FROM api_storyband WHERE article_id IN ({DUPLICATES})",
+    f"DELETE FROM api_processeddata WHERE id IN ({DUPLICATES})",
+    "INSERT INTO api_processedlink (link_hash, article_id) "
+    "SELECT link_hash, MIN(id) FROM api_processeddata WHERE link_hash IS NOT NULL GROUP BY link_hash",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_batch_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedLink',
+            fields=[
+                ('link_hash', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('article', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='link_key', to='api.processeddata')),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
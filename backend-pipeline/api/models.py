@@ -1,8 +1,22 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.postgres.fields import JSONField  # For Django 3.1 use models.JSONField
+from .canonical import hash_link
 
 
-class RawData(models.Model):
+class RawPayloadMixin:
+    """
+    raw_response lives in RawPayload, keyed by link hash, and is only
+    loaded (and decompressed) when read.
+    """
+    @property
+    def raw_response(self):
+        if not hasattr(self, '_raw_response'):
+            from .payloads import load_payload
+            self._raw_response = load_payload(self.link_hash)
+        return self._raw_response
+
+
+class RawData(RawPayloadMixin, models.Model):
     title = models.TextField()
     description = models.TextField(null=True, blank=True)
     content = models.TextField(null=True, blank=True)
@@ -10,37 +24,181 @@ class RawData(models.Model):
     country = models.CharField(max_length=50)
     published_date = models.DateTimeField(null=True, blank=True)
     source = models.CharField(max_length=100, null=True, blank=True)
-    link = models.URLField(null=True, blank=True, unique=True, max_length=2000)  
+    link = models.URLField(null=True, blank=True, max_length=2000)
+    link_hash = models.CharField(max_length=32, null=True, blank=True, unique=True, editable=False)  # hash_link(link)
     created_at = models.DateTimeField(auto_now_add=True)
-    raw_response = models.JSONField(null=True, blank=True)
+    processed = models.BooleanField(default=False)  # Set once copied to ProcessedData
+
+    class Meta:
+        indexes = [
+            # Only pending rows are indexed, so the index stays small
+            models.Index(fields=['id'], condition=models.Q(processed=False), name='rawdata_pending_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.link and not self.link_hash:
+            self.link_hash = hash_link(self.link)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
 # Model definition with proper indexing
-class ProcessedData(models.Model):
+class ProcessedData(RawPayloadMixin, models.Model):
     title = models.TextField()
     description = models.TextField(null=True, blank=True)
     content = models.TextField(null=True, blank=True)
     category = models.CharField(max_length=50)
     country = models.CharField(max_length=50, db_index=True)  # Indexed for fast filtering
-    sentiment_score = models.FloatField(null=True, blank=True)
+    sentiment_score = models.FloatField(null=True, blank=True)  # Polarity, set by api.enrichment
+    sentiment_label = models.CharField(max_length=20, null=True, blank=True)  # 'positive', 'negative' or 'neutral'
+    summary = models.TextField(null=True, blank=True)  # Extractive summary, set by api.enrichment
     published_date = models.DateTimeField(null=True, blank=True, db_index=True)
     source = models.CharField(max_length=100, null=True, blank=True)
-    link = models.URLField(null=True, blank=True, unique=True, max_length=2000)
+    link = models.URLField(null=True, blank=True, max_length=2000)
+    link_hash = models.CharField(max_length=32, null=True, blank=True, db_index=True, editable=False)  # hash_link(link)
     created_at = models.DateTimeField(auto_now_add=True)
-    raw_response = models.JSONField(null=True, blank=True)  # Store raw API response if needed
+    cluster_id = models.BigIntegerField(null=True, blank=True, db_index=True)  # Story id shared by near-duplicates
+    minhash = models.BinaryField(null=True, blank=True, editable=False)  # Title MinHash signature, see api.neardup
 
     class Meta:
         indexes = [
             models.Index(fields=['country', 'category']),  # For common filtering
             models.Index(fields=['country', 'published_date']),  # For timeline queries
         ]
+        constraints = [
+            # On PostgreSQL the table is partitioned by published_date (see
+            # api.partitions), and unique constraints must include it
+            models.UniqueConstraint(fields=['link_hash', 'published_date'], name='processeddata_link_uniq'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.link and not self.link_hash:
+            self.link_hash = hash_link(self.link)
+        # A new row takes its link's ProcessedLink key in the same
+        # transaction, so saving a stored link raises IntegrityError
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding and self.link_hash:
+                ProcessedLink.objects.create(link_hash=self.link_hash, article=self)
 
     def __str__(self):
         return f"{self.title} ({self.country})"
 
 
+class ProcessedLink(models.Model):
+    """
+    One row per link stored in ProcessedData. The partitioned ProcessedData
+    table can only be unique on (link_hash, published_date); this plain
+    table keeps each link stored once whatever its published date.
+    """
+    link_hash = models.CharField(max_length=32, primary_key=True)
+    # No database constraint: the partitioned ProcessedData table has no unique id alone
+    article = models.OneToOneField(ProcessedData, on_delete=models.CASCADE, related_name='link_key', db_constraint=False)
+
+    def __str__(self):
+        return self.link_hash
+
+
+class RawPayload(models.Model):
+    """
+    Compressed raw payload of an article (the API's article JSON or the RSS
+    entry's fields, as fetched), kept out of the hot RawData and
+    ProcessedData rows. Shared by both through the link hash.
+    """
+    link_hash = models.CharField(max_length=32, primary_key=True)
+    codec = models.CharField(max_length=10)  # 'zstd' or 'zlib', see api.payloads
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.link_hash
+
+
+class SentimentScore(models.Model):
+    """
+    Cached sentiment of one text, keyed by a hash of the text and the
+    analyzer version that scored it (see api.analytics.sentiment_cache).
+    """
+    text_hash = models.CharField(max_length=32)  # BLAKE2b of the text
+    version = models.CharField(max_length=32)  # Analyzer version, see api.analytics.sentiment
+    polarity = models.FloatField()
+    subjectivity = models.FloatField()
+    confidence = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ('version', 'text_hash')
+
+    def __str__(self):
+        return f"{self.version}:{self.text_hash}"
+
+
+class SentimentCacheStats(models.Model):
+    """
+    Sentiment cache hits and misses per analyzer version, shared by all workers.
+    """
+    version = models.CharField(max_length=32, primary_key=True)
+    hits = models.BigIntegerField(default=0)
+    misses = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.version
+
+
+class StoryBand(models.Model):
+    """
+    LSH index entry for near-duplicate detection: one row per MinHash band
+    of a recent article. Only the matching window is kept (see
+    api.neardup.prune_story_index).
+    """
+    bucket = models.BigIntegerField(db_index=True)  # Hash of the band number and its rows
+    # No database constraint: the partitioned ProcessedData table has no unique id alone
+    article = models.ForeignKey(ProcessedData, on_delete=models.CASCADE, related_name='story_bands', db_constraint=False)
+    cluster_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.bucket} -> {self.cluster_id}"
+
+
+class AnalyticsWatermark(models.Model):
+    """
+    Highest ProcessedData id handled by a batch analytics job (see
+    api.enrichment), so each run only reads rows stored since the last one.
+    """
+    name = models.CharField(max_length=50, primary_key=True)  # Job name, e.g. 'sentiment'
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+
+class FeedState(models.Model):
+    """
+    Fetch state for a single news feed, e.g. Google News RSS for (us, business).
+    Stores the HTTP validators used to make conditional GET requests and the
+    high-water mark (newest entry stored) used to skip already seen entries.
+    """
+    source = models.CharField(max_length=50)
+    country = models.CharField(max_length=50)
+    category = models.CharField(max_length=50)
+    etag = models.CharField(max_length=255, null=True, blank=True)
+    last_modified = models.CharField(max_length=100, null=True, blank=True)
+    content_length = models.PositiveIntegerField(default=0)  # Size of the last full response
+    high_water_date = models.DateTimeField(null=True, blank=True)  # Newest published_date seen
+    high_water_link_hash = models.CharField(max_length=32, null=True, blank=True)  # hash_link of that entry
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('source', 'country', 'category')
+
+    def __str__(self):
+        return f"{self.source}:{self.country}:{self.category}"
+
 
 class Meta:
     indexes = [
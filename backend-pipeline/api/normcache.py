@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from .ratelimit import connect_redis
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+_lock = threading.Lock()
+
+
+def content_key(text, is_title, version):
+    """
+    Cache key for one normalization: version, mode and a BLAKE2b of the text.
+    """
+    digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+    return f"norm:v{version}:{'t' if is_title else 'b'}:{digest}"
+
+
+class NormalizeCache:
+    """
+    Memoizes normalization results by content hash.
+    
+    Lookups go to a bounded in-process LRU first, then (if configured) to
+    Redis, which is shared by all workers. Keys carry the normalization
+    version, so bumping processing.NORMALIZE_VERSION invalidates every
+    cached result; old Redis entries expire with their TTL.
+    """
+
+    def __init__(self, version, maxsize=10000, redis_client=None, ttl=86400, min_length=64):
+        self.version = version
+        self.maxsize = maxsize
+        self.redis = redis_client
+        self.ttl = ttl
+        self.min_length = min_length  # Shorter texts are cheaper to normalize than to look up
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'misses': 0}
+
+    def normalize_many(self, texts, is_title, normalize):
+        """
+        Normalize a list of texts, computing only the ones not cached.
+        
+        Args:
+            texts: List of strings or None
+            is_title: Passed through to normalize
+            normalize: The normalization function, normalize(text, is_title)
+        
+        Returns:
+            List of normalized texts in input order
+        """
+        results = [None] * len(texts)
+        missing = {}  # key -> indexes waiting for it
+        local_hits = 0
+        for i, text in enumerate(texts):
+            if text is None or len(text) < self.min_length:
+                results[i] = normalize(text, is_title)
+                continue
+            key = content_key(text, is_title, self.version)
+            with self._lock:
+                value = self._lru.get(key)
+                if value is not None:
+                    self._lru.move_to_end(key)
+            if value is not None:
+                results[i] = value
+                local_hits += 1
+            else:
+                missing.setdefault(key, []).append(i)
+
+        keys = list(missing)
+        found = self._redis_get(keys) if keys else {}
+        computed = {}
+        for key in keys:
+            value = found.get(key)
+            if value is None:
+                value = computed[key] = normalize(texts[missing[key][0]], is_title)
+            for i in missing[key]:
+                results[i] = value
+            self._remember(key, value)
+        # Repeats of a missing text within the batch count as local hits
+        local_hits += sum(len(indexes) - 1 for indexes in missing.values())
+        if local_hits or keys:
+            self._count(local_hits=local_hits, redis_hits=len(found), misses=len(computed))
+            self._redis_set(computed, local_hits=local_hits, redis_hits=len(found))
+        return results
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def _redis_get(self, keys):
+        if self.redis is None:
+            return {}
+        try:
+            values = self.redis.mget(keys)
+        except Exception as e:
+            logger.warning(f"Normalization cache lookup failed, computing locally: {e}")
+            return {}
+        return {key: value.decode('utf-8') for key, value in zip(keys, values) if value is not None}
+
+    def _redis_set(self, computed, local_hits=0, redis_hits=0):
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in computed.items():
+                pipe.set(key, value.encode('utf-8'), ex=self.ttl)
+            # Shared counters, so the hit rate covers every worker
+            stats_key = f"norm:v{self.version}:stats"
+            pipe.hincrby(stats_key, 'redis_hits', redis_hits)
+            pipe.hincrby(stats_key, 'misses', len(computed))
+            pipe.hincrby(stats_key, 'local_hits', local_hits)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not write to the normalization cache: {e}")
+
+    def _count(self, local_hits=0, redis_hits=0, misses=0):
+        with self._lock:
+            self._stats['local_hits'] += local_hits
+            self._stats['redis_hits'] += redis_hits
+            self._stats['misses'] += misses
+
+    def snapshot(self):
+        """
+        Hit and miss counters of this process, plus the counters shared by
+        all workers when Redis is in use.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._lru)
+        snapshot = {
+            'version': self.version,
+            'size': size,
+            'maxsize': self.maxsize,
+            **stats,
+            'hit_rate': hit_rate(stats),
+        }
+        if self.redis is not None:
+            try:
+                shared = self.redis.hgetall(f"norm:v{self.version}:stats")
+                shared = {
+                    (k.decode() if isinstance(k, bytes) else k): int(v) for k, v in shared.items()
+                }
+                snapshot['shared'] = {**shared, 'hit_rate': hit_rate(shared)}
+            except Exception as e:
+                logger.warning(f"Could not read normalization cache stats from Redis: {e}")
+        return snapshot
+
+
+def hit_rate(stats):
+    hits = stats.get('local_hits', 0) + stats.get('redis_hits', 0)
+    total = hits + stats.get('misses', 0)
+    return hits / total if total else 0.0
+
+
+def get_normalize_cache():
+    """
+    Return the process-wide normalization cache, or None if it is disabled.
+    """
+    global _cache
+    if _cache is None and getattr(settings, 'NORMALIZE_CACHE_SIZE', 10000) > 0:
+        with _lock:
+            if _cache is None:
+                from .processing import NORMALIZE_VERSION
+                redis_client = None
+                if getattr(settings, 'NORMALIZE_CACHE_REDIS', False):
+                    redis_client = connect_redis(
+                        db=getattr(settings, 'NORMALIZE_CACHE_REDIS_DB', 2),
+                        purpose='the normalization cache',
+                    )
+                _cache = NormalizeCache(
+                    NORMALIZE_VERSION,
+                    maxsize=getattr(settings, 'NORMALIZE_CACHE_SIZE', 10000),
+                    redis_client=redis_client,
+                    ttl=getattr(settings, 'NORMALIZE_CACHE_TTL', 86400),
+                    min_length=getattr(settings, 'NORMALIZE_CACHE_MIN_LENGTH', 64),
+                )
+    return _cache
@@ -0,0 +1,169 @@
+import logging
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError
+from django.db.models import Q
+from django.utils import timezone
+from .models import ProcessedData, ProcessedLink, RawPayload, StoryBand
+
+logger = logging.getLogger(__name__)
+
+# On PostgreSQL api_processeddata is range partitioned by published_date
+# (migration 0019): one partition per calendar month (UTC), named
+# api_processeddata_pYYYYMM, plus a default partition for rows without a
+# date or outside the monthly ranges. Other backends keep a plain table.
+PARTITION_NAME = re.compile(r'^api_processeddata_p(\d{4})(\d{2})$')
+
+
+def month_start(value):
+    """
+    First instant (UTC) of the month containing value.
+    """
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    """
+    The month start count months after (or before, if negative) month.
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f"{ProcessedData._meta.db_table}_p{month:%Y%m}"
+
+
+def partitioned():
+    return connection.vendor == 'postgresql'
+
+
+def list_partitions():
+    """
+    Monthly partitions of ProcessedData as {month start: table name}.
+    """
+    if not partitioned():
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [ProcessedData._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def create_partition(month):
+    """
+    Create the partition for one month if it does not exist.
+    
+    Returns:
+        True if the partition exists afterwards. Creating it fails if the
+        default partition already holds rows for that month; those rows
+        stay where they are and are still found by queries.
+    """
+    quote = connection.ops.quote_name
+    name = partition_name(month)
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF "
+                f"{quote(ProcessedData._meta.db_table)} FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+    except DatabaseError as e:
+        logger.warning(f"Could not create partition {name}: {e}")
+        return False
+    return True
+
+
+def ensure_partitions(months_ahead=None, now=None):
+    """
+    Create the partitions for the current month and the months_ahead months
+    after it, so rows are never routed to the default partition. Months in
+    the country_news lookback window are covered too: only a fully covered
+    date range lets PostgreSQL skip the default partition.
+    
+    Args:
+        months_ahead: Defaults to settings.PROCESSED_PARTITIONS_AHEAD
+    
+    Returns:
+        List of partitions created
+    """
+    if not partitioned():
+        return []
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'PROCESSED_PARTITIONS_AHEAD', 2)
+    now = now or timezone.now()
+    month = month_start(now - timedelta(days=getattr(settings, 'NEWS_LOOKBACK_DAYS', 30)))
+    last = add_months(month_start(now), months_ahead)
+    existing = list_partitions()
+    created = []
+    while month <= last:
+        if month not in existing and create_partition(month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    if created:
+        logger.info(f"Created partitions {', '.join(created)}")
+    return created
+
+
+def enforce_retention(retention_months=None, now=None):
+    """
+    Remove articles published more than retention_months months ago.
+    
+    Whole monthly partitions are dropped, which is a catalog operation
+    rather than a DELETE over millions of rows. Expired rows left in the
+    default partition (and on backends without partitioning, all expired
+    rows) are deleted normally; undated rows expire by created_at. The
+    compressed payloads of removed articles go with them.
+    
+    Args:
+        retention_months: Defaults to settings.PROCESSED_RETENTION_MONTHS
+    
+    Returns:
+        dict: partitions dropped and rows deleted
+    """
+    if retention_months is None:
+        retention_months = getattr(settings, 'PROCESSED_RETENTION_MONTHS', 12)
+    cutoff = add_months(month_start(now or timezone.now()), -retention_months)
+    quote = connection.ops.quote_name
+
+    dropped = []
+    for month, name in sorted(list_partitions().items()):
+        if add_months(month, 1) > cutoff:
+            continue
+        table = quote(name)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # StoryBand and ProcessedLink have no foreign key constraint to
+            # the partitioned table
+            for model in (StoryBand, ProcessedLink):
+                cursor.execute(
+                    f"DELETE FROM {quote(model._meta.db_table)} WHERE article_id IN (SELECT id FROM {table})"
+                )
+            cursor.execute(
+                f"DELETE FROM {quote(RawPayload._meta.db_table)} "
+                f"WHERE link_hash IN (SELECT link_hash FROM {table} WHERE link_hash IS NOT NULL)"
+            )
+            cursor.execute(f"DROP TABLE {table}")
+        dropped.append(name)
+
+    expired = ProcessedData.objects.filter(
+        Q(published_date__lt=cutoff) | Q(published_date__isnull=True, created_at__lt=cutoff)
+    )
+    RawPayload.objects.filter(link_hash__in=expired.values('link_hash')).delete()
+    _, deleted = expired.delete()
+    deleted_count = deleted.get(ProcessedData._meta.label, 0)
+
+    logger.info(f"Dropped {len(dropped)} partitions and deleted {deleted_count} rows older than {cutoff:%Y-%m}")
+    return {'partitions_dropped': dropped, 'rows_deleted': deleted_count}
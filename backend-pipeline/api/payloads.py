@@ -0,0 +1,70 @@
+import json
+import logging
+import zlib
+from .models import RawPayload
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available; zstd is smaller and faster
+    zstandard = None
+
+ZSTD_LEVEL = 3
+
+
+def compress_payload(payload):
+    """
+    Compress a JSON-serializable payload.
+    
+    Returns:
+        (codec, bytes)
+    """
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return 'zlib', zlib.compress(data)
+
+
+def decompress_payload(codec, data):
+    data = bytes(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd payloads")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == 'zlib':
+        data = zlib.decompress(data)
+    else:
+        raise ValueError(f"Unknown payload codec: {codec}")
+    return json.loads(data)
+
+
+def store_payloads(payloads):
+    """
+    Compress and store raw payloads, keeping the first one stored for a link.
+    
+    Args:
+        payloads: Dict of link hash -> JSON-serializable payload
+    
+    Returns:
+        Number of payloads sent to the database (links that already have
+        one keep it)
+    """
+    rows = []
+    for link_hash, payload in payloads.items():
+        if link_hash and payload is not None:
+            codec, data = compress_payload(payload)
+            rows.append(RawPayload(link_hash=link_hash, codec=codec, data=data))
+    RawPayload.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def load_payload(link_hash):
+    """
+    The raw payload stored for a link hash, or None.
+    """
+    if not link_hash:
+        return None
+    row = RawPayload.objects.filter(link_hash=link_hash).values_list('codec', 'data').first()
+    return decompress_payload(*row) if row else None
+
@@ -1,8 +1,27 @@
+import logging
+import multiprocessing
 import re
 import string
 import unicodedata
+from collections import deque
+from itertools import islice
 from typing import Optional
-from .models import RawData, ProcessedData
+from django.conf import settings
+from django.db import IntegrityError, connection, connections, transaction
+from django.utils import timezone
+from .models import RawData, ProcessedData, ProcessedLink
+from .neardup import assign_clusters
+from .normcache import get_normalize_cache
+from .trending import record_articles
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at import; normalize_text runs three times per article
+HTML_TAG = re.compile(r'<[^>]+>')
+PUNCTUATION = string.punctuation
+
+# Bump whenever normalize_text changes output, so cached results are not reused
+NORMALIZE_VERSION = 1
 
 def normalize_text(text: Optional[str], is_title: bool = False) -> Optional[str]:
     """
@@ -22,60 +41,251 @@ def normalize_text(text: Optional[str], is_title: bool = False) -> Optional[str]
         return None
     
     # Remove HTML tags
-    text = re.sub(r'<[^>]+>', ' ', text)
+    if '<' in text:
+        text = HTML_TAG.sub(' ', text)
 
-    # Normalize unicode characters (e.g., convert "café" to "cafe")
-    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('utf-8')
+    # Normalize unicode characters (e.g., convert "café" to "cafe").
+    # ASCII text is already in NFKD form, so it can skip this step.
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ascii')
 
     # Standardize whitespace (remove extra spaces/newlines/tabs)
-    text = re.sub(r'\s+', ' ', text).strip()
+    words = text.split()
 
     # Remove leading/trailing punctuation
-    text = text.strip(string.punctuation)
+    text = ' '.join(words).strip(PUNCTUATION)
 
-    # Special handling for titles (capitalize properly)
+    # Special handling for titles (capitalize first and last word, lowercase the rest)
     if is_title:
-        words = [word.capitalize() if i == 0 or i == len(text.split()) - 1 else word.lower()
-                 for i, word in enumerate(text.split())]
-        text = ' '.join(words)
+        words = text.split()
+        last = len(words) - 1
+        text = ' '.join(
+            word.capitalize() if i == 0 or i == last else word.lower()
+            for i, word in enumerate(words)
+        )
 
     return text
 
-def clean_and_process_data():
+def normalize_rows(texts):
+    """
+    Normalize (title, description, content) tuples.
+    Module-level so it can run in a worker process.
+    
+    Repeated texts (e.g. Google News link list descriptions) are served
+    from the normalization cache when it is enabled.
+    """
+    cache = get_normalize_cache()
+    if cache is not None and texts:
+        titles, descriptions, contents = (list(column) for column in zip(*texts))
+        return list(zip(
+            cache.normalize_many(titles, True, normalize_text),
+            cache.normalize_many(descriptions, False, normalize_text),
+            cache.normalize_many(contents, False, normalize_text),
+        ))
+    return [
+        (normalize_text(title, is_title=True), normalize_text(description), normalize_text(content))
+        for title, description, content in texts
+    ]
+
+def processed_fields(article, normalized=None):
+    """
+    Normalized ProcessedData field values for a RawData row.
+    
+    Args:
+        article: RawData row
+        normalized: Optional (title, description, content) already normalized
+                    by normalize_rows
+    """
+    if normalized is None:
+        normalized = normalize_rows([(article.title, article.description, article.content)])[0]
+    title, description, content = normalized
+    return {
+        'link': article.link,
+        'link_hash': article.link_hash,
+        'title': title,
+        'description': description,
+        'content': content,
+        'category': article.category,
+        'country': article.country,
+        'sentiment_score': None,  # Placeholder for sentiment analysis
+        # Undated articles count as published when processed, so they sort
+        # with the rest and land in a monthly partition
+        'published_date': article.published_date or timezone.now(),
+        'source': article.source,
+    }
+
+def store_processed(fields_list):
+    """
+    Write a chunk of processed articles with one bulk insert (see
+    insert_processed). Articles without a link hash fall back to
+    get_or_create on the title.
+    New articles are then put into near-duplicate story clusters and
+    counted in the trending-term sketches.
+    
+    Returns:
+        List of newly created ProcessedData objects
+    """
+    rows = [ProcessedData(**fields) for fields in fields_list if fields['link_hash']]
+    created = insert_processed(rows) if rows else []
+    
+    for fields in fields_list:
+        if not fields['link_hash']:
+            fields = dict(fields)
+            title = fields.pop('title')
+            obj, was_created = ProcessedData.objects.get_or_create(title=title, link_hash=None, defaults=fields)
+            if was_created:
+                created.append(obj)
+    if created and getattr(settings, 'NEAR_DUPLICATE_ENABLED', True):
+        assign_clusters(created)
+    if created:
+        record_articles(created)
+    return created
+
+def insert_processed(rows):
+    """
+    Insert unsaved ProcessedData rows (link_hash set), skipping links that are
+    already stored.
+    
+    The rows and their ProcessedLink keys are written in one transaction.
+    If a key already exists (another worker stored the link since the
+    lookup), the rows are inserted one at a time instead and the ones whose
+    key conflicts are dropped.
+    
+    Returns:
+        List of the rows inserted
+    """
+    try:
+        with transaction.atomic():
+            created = ProcessedData.objects.bulk_create(rows)
+            ProcessedLink.objects.bulk_create(
+                [ProcessedLink(link_hash=row.link_hash, article_id=row.id) for row in created]
+            )
+            return created
+    except IntegrityError:
+        logger.warning("Processed links conflicted, falling back to per-article writes")
+    created = []
+    for row in rows:
+        row.id = None
+        row._state.adding = True
+        try:
+            row.save(force_insert=True)
+        except IntegrityError:
+            continue
+        created.append(row)
+    return created
+
+def pending_in_chunk(raw_articles):
+    """
+    Rows of a chunk whose link is not in ProcessedData yet (one query on
+    the unpartitioned ProcessedLink keys).
+    """
+    link_hashes = [article.link_hash for article in raw_articles if article.link_hash]
+    existing = set(
+        ProcessedLink.objects.filter(link_hash__in=link_hashes).values_list('link_hash', flat=True)
+    )
+    return [article for article in raw_articles if not article.link_hash or article.link_hash not in existing]
+
+def write_chunk(raw_articles, pending, normalized):
+    """
+    Store the normalized pending rows of a chunk and flag the chunk as processed.
+    """
+    fields_list = [processed_fields(article, texts) for article, texts in zip(pending, normalized)]
+    created = store_processed(fields_list)
+    RawData.objects.filter(id__in=[article.id for article in raw_articles]).update(processed=True)
+    return created
+
+def article_texts(articles):
+    return [(article.title, article.description, article.content) for article in articles]
+
+def process_chunk(raw_articles):
+    """
+    Process one chunk of RawData rows and flag them as processed.
+    
+    Links already in ProcessedData are found with one query and skipped
+    before normalization.
+    """
+    pending = pending_in_chunk(raw_articles)
+    return write_chunk(raw_articles, pending, normalize_rows(article_texts(pending)))
+
+def process_unsaved(raw_articles):
+    """
+    Normalize unsaved RawData instances straight into ProcessedData.
+    Used by the fused ingest path, which never writes the RawData rows.
+    """
+    pending = pending_in_chunk(raw_articles)
+    normalized = normalize_rows(article_texts(pending))
+    return store_processed([processed_fields(article, texts) for article, texts in zip(pending, normalized)])
+
+def iter_chunks(iterable, size):
+    """
+    Split an iterable into lists of at most size items.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def clean_and_process_data(raw_articles=None, chunk_size=None, workers=1, stats=None):
     """
     Process raw data from RawData table and store cleaned versions in ProcessedData.
     Returns a list of newly created processed articles.
+    
+    Only rows not yet flagged as processed are read, streamed in chunks with
+    a server-side cursor, and each chunk is written with one bulk insert, so
+    the cost of a run scales with the number of new rows.
+    
+    Args:
+        raw_articles: Optional iterable of RawData rows to process instead of
+                      the pending rows (used by the streaming pipeline)
+        chunk_size: Rows per chunk, defaults to settings.PROCESSING_CHUNK_SIZE
+        workers: Worker processes for normalization, 1 (this process) by
+                 default. With more than one, chunks are normalized in a
+                 process pool while reads and writes stay in this process.
+                 Only the processnews command passes more (from
+                 settings.PROCESSING_WORKERS): Celery's prefork workers
+                 cannot start child processes.
+        stats: Optional dict that receives the number of rows scanned
     """
-    raw_articles = RawData.objects.all()
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'PROCESSING_CHUNK_SIZE', 1000)
+    if stats is None:
+        stats = {}
+    stats['rows'] = 0
+    
+    if workers > 1:
+        # Fork the pool before the cursor is opened. Children never touch the
+        # database, and pool workers leave via os._exit, so an inherited
+        # connection is never closed from a child.
+        if not connection.in_atomic_block:
+            connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(workers)
+    else:
+        pool = None
+    
+    if raw_articles is None:
+        raw_articles = RawData.objects.filter(processed=False).order_by('id').iterator(chunk_size=chunk_size)
     
     processed_articles = []
+    if pool is None:
+        for chunk in iter_chunks(raw_articles, chunk_size):
+            stats['rows'] += len(chunk)
+            processed_articles.extend(process_chunk(chunk))
+        return processed_articles
     
-    for article in raw_articles:
-        # Skip articles that have already been processed (checking by link)
-        if article.link and ProcessedData.objects.filter(link=article.link).exists():
-            continue
-            
-        title = normalize_text(article.title, is_title=True)
-        description = normalize_text(article.description)
-        content = normalize_text(article.content)
-        
-        # Create entry in ProcessedData table
-        obj, created = ProcessedData.objects.get_or_create(
-            link=article.link,  # Using link as unique identifier
-            defaults={
-                'title': title,
-                'description': description,
-                'content': content,
-                'category': article.category,
-                'country': article.country,
-                'sentiment_score': None,  # Placeholder for sentiment analysis
-                'published_date': article.published_date,
-                'source': article.source,
-                'raw_response': article.raw_response,
-            }
-        )
-        
-        if created:
-            processed_articles.append(obj)
+    # Keep a couple of chunks per worker in flight; write results in order
+    in_flight = deque()
+    with pool:
+        for chunk in iter_chunks(raw_articles, chunk_size):
+            stats['rows'] += len(chunk)
+            pending = pending_in_chunk(chunk)
+            in_flight.append((chunk, pending, pool.apply_async(normalize_rows, (article_texts(pending),))))
+            if len(in_flight) >= workers * 2:
+                chunk, pending, result = in_flight.popleft()
+                processed_articles.extend(write_chunk(chunk, pending, result.get()))
+        while in_flight:
+            chunk, pending, result = in_flight.popleft()
+            processed_articles.extend(write_chunk(chunk, pending, result.get()))
     
     return processed_articles
@@ -0,0 +1,295 @@
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Atomically refill a bucket, then either take tokens or report how long to
+# wait. A positive ARGV[4] blocks the bucket for that many seconds instead
+# (used when a server answers 429). Returns the wait time as a string so
+# Redis does not truncate it to an integer.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local block_for = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'blocked_until')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+local blocked_until = tonumber(state[3]) or 0
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if block_for > 0 then
+    blocked_until = math.max(blocked_until, now + block_for)
+    tokens = 0
+elseif now < blocked_until then
+    wait = blocked_until - now
+elseif tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now, 'blocked_until', blocked_until)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate + math.max(0, blocked_until - now)) + 60)
+return tostring(wait)
+"""
+
+_limiter = None
+_lock = threading.Lock()
+_waits = threading.local()  # max_wait set by blocking_waits, per thread
+
+
+class RateLimited(Exception):
+    """
+    Raised when a request cannot get capacity within the allowed wait.
+    Callers should reschedule the work after retry_after seconds.
+    """
+
+    def __init__(self, key, retry_after):
+        super().__init__(f"Rate limited on {key}, retry in {retry_after:.1f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+@contextmanager
+def blocking_waits(max_wait=None):
+    """
+    Let acquire sleep for a token in this thread, up to max_wait seconds
+    (default settings.RATE_LIMIT_MAX_WAIT), instead of raising RateLimited
+    at once. Only for callers that own their thread, such as the inline
+    fetch pool; Celery tasks reschedule rather than hold a worker slot.
+    """
+    previous = getattr(_waits, 'max_wait', None)
+    _waits.max_wait = max_wait if max_wait is not None else getattr(settings, 'RATE_LIMIT_MAX_WAIT', 5.0)
+    try:
+        yield
+    finally:
+        _waits.max_wait = previous
+
+
+def rate_limit_key(url, api_key=None):
+    """
+    Bucket key for a request: the host, plus a short hash of the API key
+    when the limit is per key. The raw key is never stored.
+    """
+    host = urlparse(url).netloc
+    if api_key:
+        return f"{host}:{hashlib.sha1(str(api_key).encode()).hexdigest()[:8]}"
+    return host
+
+
+def retry_after_seconds(response, default=60.0):
+    """
+    Read the Retry-After header of a 429 response, in seconds.
+    """
+    try:
+        return float(response.headers.get('Retry-After', default))
+    except (TypeError, ValueError):
+        return default
+
+
+class LocalBuckets:
+    """
+    In-process token buckets, used when Redis is not reachable.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity, requested=1, block_for=0):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts, blocked_until = self._buckets.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + max(0, now - ts) * rate)
+            wait = 0
+            if block_for > 0:
+                blocked_until = max(blocked_until, now + block_for)
+                tokens = 0
+            elif now < blocked_until:
+                wait = blocked_until - now
+            elif tokens >= requested:
+                tokens -= requested
+            else:
+                wait = (requested - tokens) / rate
+            self._buckets[key] = (tokens, now, blocked_until)
+        return wait
+
+    def state(self, key):
+        with self._lock:
+            tokens, ts, blocked_until = self._buckets.get(key, (None, None, 0))
+        return {'tokens': tokens, 'blocked_for': max(0, blocked_until - time.monotonic())}
+
+
+class RedisBuckets:
+    """
+    Token buckets stored in Redis, shared by every worker process.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, rate, capacity, requested=1, block_for=0):
+        return float(self.script(keys=[f"ratelimit:{key}"], args=[rate, capacity, requested, block_for]))
+
+    def state(self, key):
+        tokens, blocked_until = self.client.hmget(f"ratelimit:{key}", 'tokens', 'blocked_until')
+        seconds, micros = self.client.time()
+        now = seconds + micros / 1000000
+        return {
+            'tokens': float(tokens) if tokens is not None else None,
+            'blocked_for': max(0, float(blocked_until or 0) - now),
+        }
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter keyed by host or API key.
+    
+    Limits come from settings.RATE_LIMITS, a dict of host -> {'rate': requests
+    per second, 'burst': bucket size}. Buckets live in Redis when it is
+    reachable so all worker processes share them, otherwise in this process.
+    """
+
+    def __init__(self, limits=None, redis_client=None):
+        self.limits = limits if limits is not None else getattr(settings, 'RATE_LIMITS', {})
+        self.default_limit = getattr(settings, 'RATE_LIMIT_DEFAULT', {'rate': 5.0, 'burst': 5})
+        self.redis = redis_client
+        self.buckets = RedisBuckets(redis_client) if redis_client is not None else LocalBuckets()
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def limit_for(self, key):
+        host = key.split(':', 1)[0]
+        limit = self.limits.get(host, self.default_limit)
+        return float(limit['rate']), float(limit['burst'])
+
+    def _take(self, key, block_for=0):
+        rate, capacity = self.limit_for(key)
+        try:
+            return self.buckets.take(key, rate, capacity, block_for=block_for)
+        except Exception as e:
+            # Redis went away; keep limiting within this process
+            logger.warning(f"Rate limiter falling back to in-process buckets: {e}")
+            self.buckets = LocalBuckets()
+            self.redis = None
+            return self.buckets.take(key, rate, capacity, block_for=block_for)
+
+    def acquire(self, key, max_wait=None):
+        """
+        Take one token for key, waiting up to max_wait seconds for capacity.
+        By default it does not wait at all, unless the thread is inside
+        blocking_waits.
+        
+        Raises:
+            RateLimited: if the bucket will not have capacity within max_wait
+        """
+        if max_wait is None:
+            max_wait = getattr(_waits, 'max_wait', None) or 0.0
+        waited = 0.0
+        while True:
+            wait = self._take(key)
+            if wait <= 0:
+                self._record(key, acquired=1, wait_seconds=waited)
+                return waited
+            if waited + wait > max_wait:
+                self._record(key, throttled=1, wait_seconds=waited)
+                raise RateLimited(key, wait)
+            time.sleep(wait)
+            waited += wait
+
+    def block(self, key, seconds):
+        """
+        Stop handing out tokens for key for the given number of seconds.
+        """
+        self._take(key, block_for=seconds)
+        self._record(key, throttled=1)
+
+    def _record(self, key, acquired=0, throttled=0, wait_seconds=0.0):
+        with self._metrics_lock:
+            metrics = self._metrics.setdefault(key, {'acquired': 0, 'throttled': 0, 'wait_seconds': 0.0})
+            metrics['acquired'] += acquired
+            metrics['throttled'] += throttled
+            metrics['wait_seconds'] += wait_seconds
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.sadd('ratelimit:keys', key)
+                pipe.hincrby(f"ratelimit:metrics:{key}", 'acquired', acquired)
+                pipe.hincrby(f"ratelimit:metrics:{key}", 'throttled', throttled)
+                pipe.hincrbyfloat(f"ratelimit:metrics:{key}", 'wait_seconds', wait_seconds)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Could not record rate limit metrics: {e}")
+
+    def snapshot(self):
+        """
+        Bucket state and counters for every key seen, for the metrics endpoint.
+        Counters are shared across workers when Redis is in use.
+        """
+        if self.redis is not None:
+            try:
+                keys = sorted(k.decode() if isinstance(k, bytes) else k for k in self.redis.smembers('ratelimit:keys'))
+                snapshot = {}
+                for key in keys:
+                    counters = self.redis.hgetall(f"ratelimit:metrics:{key}")
+                    counters = {
+                        (k.decode() if isinstance(k, bytes) else k): float(v) for k, v in counters.items()
+                    }
+                    snapshot[key] = {
+                        'acquired': int(counters.get('acquired', 0)),
+                        'throttled': int(counters.get('throttled', 0)),
+                        'wait_seconds': counters.get('wait_seconds', 0.0),
+                        **self.buckets.state(key),
+                    }
+                return snapshot
+            except Exception as e:
+                logger.warning(f"Could not read rate limit metrics from Redis: {e}")
+        with self._metrics_lock:
+            metrics = {key: dict(values) for key, values in self._metrics.items()}
+        return {key: {**values, **self.buckets.state(key)} for key, values in metrics.items()}
+
+
+def connect_redis(db=None, purpose='rate limiting'):
+    """
+    Connect to the Redis instance from settings, or return None if it is down.
+    
+    Args:
+        db: Redis database number, defaults to settings.RATE_LIMIT_REDIS_DB
+        purpose: What the connection is for, used in the warning
+    """
+    if db is None:
+        db = getattr(settings, 'RATE_LIMIT_REDIS_DB', 1)
+    try:
+        import redis
+        client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=int(settings.REDIS_PORT),
+            db=db,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+        )
+        client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Redis unavailable for {purpose}, using in-process state only: {e}")
+        return None
+
+
+def get_rate_limiter():
+    """
+    Return the process-wide rate limiter, connecting to Redis on first use.
+    """
+    global _limiter
+    if _limiter is None:
+        with _lock:
+            if _limiter is None:
+                _limiter = RateLimiter(redis_client=connect_redis())
+    return _limiter
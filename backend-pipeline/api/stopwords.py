@@ -0,0 +1,16 @@
+"""
+English stopwords shared by the summarizer and the trending terms.
+
+Kept apart from the analytics package so the ingest path can use them
+without importing the summarizer.
+"""
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it it's its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own said same says she
+should so some such than that that's the their theirs them themselves then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would
+you your yours yourself yourselves
+""".split())
@@ -1,94 +1,345 @@
-from celery import shared_task
+from celery import chord, group, shared_task
 import logging
+import uuid
 from datetime import timedelta
+from django.conf import settings
+from django.db.models import Max, Min
 from django.utils import timezone
 from .models import RawData
-from .ingestion import process_and_store_news, delete_processed_raw_data
+from .ingestion import (
+    archive_raw_articles, backup_feed_specs, claim_articles, dedupe_articles, delete_processed_raw_data,
+    feed_specs, feed_url, fetch_feed, fetch_feed_job, iter_fetch_jobs, load_feed_states, save_feed_states,
+    sparse_countries, store_articles, store_processed_articles, unchanged_countries,
+)
+from . import enrichment, neardup, partitions
+from .analytics import sentiment_cache
+from .analytics.sentiment import get_engine
+from .ratelimit import RateLimited
 from .processing import clean_and_process_data
 
-# TODO: Import your analytics functions here
-# from .analytics.sentiment import analyze_sentiment
-# from .analytics.summarizer import summarize_text
-
 logger = logging.getLogger(__name__)
 
 @shared_task
-def delete_old_raw_data():
+def delete_old_raw_data(batch_size=None):
     """
     Delete raw data older than 1 hour to keep the database clean.
+    
+    RawData is not partitioned like ProcessedData: it only holds rows on
+    their way to processing, so there is no month of it to drop. Old rows
+    are deleted one id range at a time instead, so no single statement
+    holds locks on a large backlog.
+    
+    Args:
+        batch_size: Ids per delete, defaults to settings.RAW_DATA_DELETE_BATCH_SIZE
     """
+    if batch_size is None:
+        batch_size = getattr(settings, 'RAW_DATA_DELETE_BATCH_SIZE', 5000)
     # Get the cutoff time (1 hour ago)
     cutoff_time = timezone.now() - timedelta(hours=1)
     
-    # Delete records older than cutoff_time
-    deleted_count, _ = RawData.objects.filter(created_at__lt=cutoff_time).delete()
+    # Delete records older than cutoff_time, by id range
+    old_rows = RawData.objects.filter(created_at__lt=cutoff_time)
+    bounds = old_rows.aggregate(first=Min('id'), last=Max('id'))
+    deleted_count = 0
+    if bounds['first'] is not None:
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            deleted, _ = old_rows.filter(id__gte=start, id__lt=start + batch_size).delete()
+            deleted_count += deleted
     
     logger.info(f"Deleted {deleted_count} old raw data records")
     return deleted_count
 
 @shared_task
-def fetch_and_process_news():
+def prune_story_index():
+    """
+    Drop near-duplicate index entries older than the matching window.
+    """
+    return neardup.prune_story_index()
+
+@shared_task
+def prune_sentiment_cache():
+    """
+    Drop cached sentiment scores of old analyzer versions or past their age.
+    """
+    return sentiment_cache.prune_sentiment_cache(get_engine().version)
+
+@shared_task
+def maintain_partitions():
+    """
+    Create upcoming ProcessedData partitions and drop the expired ones.
+    """
+    created = partitions.ensure_partitions()
+    retention = partitions.enforce_retention()
+    return {'partitions_created': created, **retention}
+
+@shared_task
+def archive_raw_articles_task(articles):
+    """
+    Keep RawData rows of articles ingested on the fused path.
+    The rows are flagged as processed, so they are never processed twice;
+    their raw payloads were stored in RawPayload when they were fetched.
+    """
+    stored_articles = store_articles(articles)
+    RawData.objects.filter(id__in=[article.id for article in stored_articles]).update(processed=True)
+    return len(stored_articles)
+
+@shared_task
+def fetch_and_process_news(inline=False, fused=None):
     """
     Fetch fresh news data, process it, and clean up old raw data.
     This keeps the country data up-to-date.
+    
+    Runs as a Celery chord: one fetch_feed task per Google News feed, each
+    storing and processing its own articles, with process_fetched_news as
+    the callback, which adds up the counters and fans out the API backups
+    for sparse countries. The feeds of a run share one run id, under which
+    they dedupe against each other. With inline=True the feeds are fetched
+    on a thread pool in this process instead (see run_feeds) and the run
+    result is returned; otherwise the run result is the callback's return
+    value.
+    
+    With fused=True (default settings.INGESTION_FUSED) the fetch tasks
+    normalize their articles and write them straight to ProcessedData;
+    raw payloads are archived asynchronously only if
+    settings.INGESTION_ARCHIVE_RAW is set.
     """
-    # Step 1: Fetch and store new articles
     logger.info("Starting scheduled news fetch and processing")
-    stored_articles = process_and_store_news()
-    logger.info(f"Fetched and stored {len(stored_articles)} new articles")
-    
-    # Step 2: Process the raw data into processed data
-    processed_articles = clean_and_process_data()
-    logger.info(f"Processed {len(processed_articles)} articles")
+    if fused is None:
+        fused = getattr(settings, 'INGESTION_FUSED', False)
+    run_id = uuid.uuid4().hex
+    if inline:
+        results = run_feeds(feed_specs(), fused=fused, run_id=run_id)
+        return process_fetched_news(results, phase='rss', inline=True, fused=fused, run_id=run_id)
+    result = news_workflow(feed_specs(), phase='rss', fused=fused, run_id=run_id).apply_async()
+    return {'workflow_id': result.id}
+
+
+def news_workflow(specs, phase, fused=False, run_id=None, processed_before=0):
+    """
+    Build the fan-out canvas: a group of per-feed fetches feeding one
+    callback that collects their results.
+    """
+    return chord(
+        group(fetch_feed_task.s(*spec, fused=fused, run_id=run_id) for spec in specs),
+        process_fetched_news.s(phase=phase, fused=fused, run_id=run_id, processed_before=processed_before),
+    )
+
+
+def run_feeds(specs, fused=False, run_id=None):
+    """
+    Inline chord header: fetch the feeds on the ingestion thread pool
+    (iter_fetch_jobs, one at a time unless settings.INGESTION_CONCURRENT_FETCH)
+    and store and process each one in this process as soon as it arrives.
+    Only the fetches run on the threads; the database work stays on this
+    process's connection.
     
-    # Step 3: Clean up raw data that has been processed
-    delete_processed_raw_data(stored_articles)
+    Returns:
+        list: One fetch_feed_task result per feed, in completion order
+    """
+    # Loaded here, so the fetch threads never touch the database
+    states = load_feed_states() if any(source == 'google_news' for source, _, _ in specs) else {}
+    jobs = []
+    for source, country, category in specs:
+        state = states.get((country, category.lower() if category else 'general')) if source == 'google_news' else None
+        jobs.append((feed_url(source, country, category), fetch_feed_job, (source, country, category, state)))
     
+    results = []
+    concurrent = getattr(settings, 'INGESTION_CONCURRENT_FETCH', True)
+    for (source, country, category), articles, feed_stats, feed_states, error in iter_fetch_jobs(jobs, concurrent):
+        result = feed_result(source, country, category)
+        try:
+            if error is not None:
+                raise error
+            store_feed(result, articles, feed_stats, feed_states, fused=fused, run_id=run_id, archive_inline=True)
+        except RateLimited:
+            result['deferred'] = True
+        except Exception as e:
+            logger.error(f"Feed {source}/{country}/{category} failed: {e}")
+            result['error'] = str(e)
+        results.append(result)
+    return results
+
+
+def feed_result(source, country, category=None):
+    """
+    Empty result of one feed, as returned by fetch_feed_task.
+    """
     return {
-        'fetched': len(stored_articles),
-        'processed': len(processed_articles)
+        'source': source, 'country': country, 'category': category,
+        'articles': 0, 'stored': 0, 'processed': 0, 'duplicates_dropped': 0,
+        'not_modified': False, 'bytes_saved': 0, 'entries_skipped': 0,
+        'deferred': False, 'error': None,
     }
 
 
-# ==================== ANALYTICS TASKS ====================
-# Add your analytics tasks below this line
+def store_feed(result, articles, feed_stats, feed_states, fused=False, run_id=None, archive_inline=False):
+    """
+    Store and process the articles of one fetched feed, saving its feed
+    states once they are stored, and fill in its result counters.
+    
+    Args:
+        result: The feed's result dict (see feed_result), updated in place
+        articles: Article records returned by fetch_feed
+        feed_stats: Counters fetch_feed filled in
+        feed_states: FeedStates fetch_feed returned, saved after the store
+        fused: Write straight to ProcessedData instead of through RawData
+        run_id: Run whose other feeds' articles are dropped (see claim_articles)
+        archive_inline: Archive fused-path payloads in this process
+    """
+    unique_articles = dedupe_articles(articles, feed_stats)
+    if run_id:
+        unique_articles = claim_articles(run_id, unique_articles, feed_stats)
+    if fused:
+        processed_articles = store_processed_articles(unique_articles)
+        save_feed_states(feed_states)
+        if getattr(settings, 'INGESTION_ARCHIVE_RAW', False):
+            archive_raw_articles(unique_articles, inline=archive_inline)
+        result['stored'] = result['processed'] = len(processed_articles)
+    else:
+        stored_articles = store_articles(unique_articles)
+        save_feed_states(feed_states)
+        result['stored'] = len(stored_articles)
+        if stored_articles:
+            result['processed'] = len(clean_and_process_data(stored_articles))
+            delete_processed_raw_data(stored_articles)
+    result.update({
+        'articles': len(articles),
+        'duplicates_dropped': feed_stats.get('duplicates_dropped', 0),
+        'not_modified': feed_stats.get('not_modified', False),
+        'bytes_saved': feed_stats.get('bytes_saved', 0),
+        'entries_skipped': feed_stats.get('entries_skipped', 0),
+    })
+
+
+@shared_task(bind=True, max_retries=5)
+def fetch_feed_task(self, source, country, category=None, fused=False, run_id=None):
+    """
+    Fetch one feed, store its new articles in RawData and process them into
+    ProcessedData, or with fused=True normalize them and store them directly
+    in ProcessedData. Each feed is processed as soon as it is stored, so a
+    feed waiting on a rate limit retry holds back nobody else's articles.
+    
+    With a run_id, articles another feed of the run already took are
+    dropped (see claim_articles).
+    
+    Never raises, so a slow or failing feed cannot fail the chord; errors
+    are reported in the result instead. Rate limited fetches are retried
+    after the bucket's wait time (or reported as deferred when run inline).
+    The feed's validators and high-water mark are saved only once its
+    articles are stored.
+    """
+    feed_stats = {}
+    feed_states = []
+    result = feed_result(source, country, category)
+    try:
+        articles = fetch_feed(source, country, category, stats=feed_stats, feed_states=feed_states)
+        store_feed(result, articles, feed_stats, feed_states, fused=fused, run_id=run_id,
+                   archive_inline=self.request.is_eager)
+    except RateLimited as e:
+        if not self.request.is_eager and self.request.retries < self.max_retries:
+            raise self.retry(countdown=max(1, int(e.retry_after + 0.999)))
+        result['deferred'] = True
+    except Exception as e:
+        logger.error(f"Feed {source}/{country}/{category} failed: {e}")
+        result['error'] = str(e)
+    return result
+
 
 @shared_task
-def analyze_news_sentiment(article_id):
+def process_fetched_news(results, phase='rss', inline=False, fused=False, run_id=None, processed_before=0):
     """
-    Example task to analyze sentiment of a news article.
+    Chord callback: add up the counters of the fetch tasks, which have
+    already stored and processed their articles, fan out the API backups
+    after the RSS phase and queue the analytics.
     
-    TODO: Implement this with your sentiment analysis logic
+    The analytics are queued once per run, by its last callback: the
+    backup phase's when the run needs backups (processed_before carries
+    the RSS phase's count there), otherwise the RSS phase's. Two jobs of
+    one run would otherwise work on the same watermarks at once.
+    
+    Returns:
+        dict: Run result with fetched/processed counts and feed counters
     """
-    # from .models import NewsData
-    # from .analytics.sentiment import analyze_sentiment
-    # 
-    # article = NewsData.objects.get(id=article_id)
-    # sentiment_result = analyze_sentiment(article.description)
-    # 
-    # # Update the article with sentiment data
-    # article.sentiment_score = sentiment_result['polarity']
-    # article.sentiment_label = sentiment_result['sentiment']
-    # article.save()
+    processed = sum(result['processed'] for result in results)
+    run_result = {
+        'fetched': sum(result['stored'] for result in results),
+        'processed': processed,
+        'duplicates_dropped': sum(result['duplicates_dropped'] for result in results),
+        'feeds_not_modified': sum(1 for result in results if result['not_modified']),
+        'bytes_saved': sum(result['bytes_saved'] for result in results),
+        'entries_skipped': sum(result['entries_skipped'] for result in results),
+        'deferred': sum(1 for result in results if result['deferred']),
+        'failed_feeds': [
+            f"{result['source']}/{result['country']}/{result['category']}"
+            for result in results if result['error']
+        ],
+    }
+    logger.info(f"News {phase} phase: fetched {run_result['fetched']}, processed {processed}")
     
-    pass
+    if phase == 'rss':
+        # Entries skipped as already stored count too: a quiet feed still has stories
+        country_counts = {}
+        for result in results:
+            country_counts[result['country']] = (
+                country_counts.get(result['country'], 0) + result['articles'] + result['entries_skipped']
+            )
+        unchanged = unchanged_countries((result['country'], result['not_modified']) for result in results)
+        countries = sparse_countries(country_counts, unchanged)
+        if countries:
+            if inline:
+                backup_result = process_fetched_news(
+                    run_feeds(backup_feed_specs(countries), fused=fused, run_id=run_id),
+                    phase='backup', inline=True, fused=fused, run_id=run_id, processed_before=processed,
+                )
+                for key in ('fetched', 'processed', 'duplicates_dropped', 'deferred'):
+                    run_result[key] += backup_result[key]
+                run_result['failed_feeds'] += backup_result['failed_feeds']
+                if 'analytics' in backup_result:
+                    run_result['analytics'] = backup_result['analytics']
+            else:
+                news_workflow(
+                    backup_feed_specs(countries), phase='backup', fused=fused, run_id=run_id,
+                    processed_before=processed,
+                ).apply_async()
+            return run_result
+    
+    # Score and summarize the new articles of the run in batches
+    if processed + processed_before and getattr(settings, 'ANALYTICS_AFTER_FETCH', True):
+        if inline:
+            run_result['analytics'] = run_analytics.apply().get()
+        else:
+            run_analytics.delay()
+    
+    return run_result
 
 
-@shared_task 
-def generate_article_summary(article_id):
+# ==================== ANALYTICS TASKS ====================
+# Add your analytics tasks below this line
+
+@shared_task
+def analyze_news_sentiment(start_id=None, end_id=None):
     """
-    Example task to generate summary of a news article.
+    Score sentiment for ProcessedData rows without a score, in batches.
     
-    TODO: Implement this with your summarization logic
+    With start_id/end_id only that id range is scored; otherwise the task
+    continues from its watermark (all rows stored since the last run).
+    """
+    return enrichment.run_job('sentiment', start_id, end_id)
+
+
+@shared_task
+def generate_article_summary(start_id=None, end_id=None):
     """
-    # from .models import NewsData
-    # from .analytics.summarizer import summarize_text
-    # 
-    # article = NewsData.objects.get(id=article_id)
-    # summary = summarize_text(article.description)
-    # 
-    # # Update the article with summary
-    # article.summary = summary
-    # article.save()
+    Summarize ProcessedData rows without a summary, in batches.
     
-    pass 
\ No newline at end of file
+    Takes an id range, or continues from the watermark like analyze_news_sentiment.
+    """
+    return enrichment.run_job('summary', start_id, end_id)
+
+
+@shared_task
+def run_analytics(start_id=None, end_id=None):
+    """
+    Run every batch analytics job; queued after each news fetch.
+    """
+    return enrichment.run_all(start_id, end_id)
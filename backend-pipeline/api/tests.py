@@ -1,7 +1,39 @@
 # api/tests.py
-from django.test import TestCase
+import json
+from importlib import import_module
+from io import StringIO
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+import time
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
-from .models import SampleModel
+from . import enrichment, http_session, ingestion, partitions, tasks, views
+from .canonical import canonicalize_url, hash_link
+from .countries import CountryDetector, get_detector
+from .neardup import minhash, similarity
+from .normcache import NormalizeCache
+from .payloads import store_payloads
+from .analytics.sentiment import analyze_sentiment, analyze_sentiment_batch, get_engine, get_sentiment_label
+from .analytics.sentiment_cache import SentimentCache, prune_sentiment_cache
+from .analytics.summarizer import TextRankSummarizer, extractive_summary, summarize_batch, summarize_text
+from .articles import Article
+from .bulkload import bulk_load_articles, copy_buffer, copy_fields
+from .processing import clean_and_process_data, insert_processed, normalize_text
+from .trending import LocalSketches, RedisSketches, TrendingEngine, article_terms
+from .views import recent_country_news
+from .ratelimit import RateLimited, RateLimiter, blocking_waits
+from .models import (
+    AnalyticsWatermark, FeedState, ProcessedData, RawData, RawPayload, SampleModel, SentimentCacheStats,
+    SentimentScore,
+)
 
 class SampleModelTests(TestCase):
     def setUp(self):
@@ -18,3 +50,1028 @@ class SampleModelTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"message": "Hello, World!"})
+
+
+class ConcurrentFetchTests(TestCase):
+    def fake_rss(self, country, category=None, feed_state=None):
+        return [{'title': f"{country} {category} {n}", 'url': f"https://example.com/{country}/{category}/{n}",
+                 'published_date': '2025-05-01T12:00:00', 'source': 'Wire',
+                 'country': country, 'category': (category or 'general').lower()} for n in range(3)]
+
+    def test_concurrent_fetch_matches_sequential(self):
+        results = {}
+        with patch('api.ingestion.fetch_google_news_rss', side_effect=self.fake_rss):
+            for concurrent in (False, True):
+                ProcessedData.objects.all().delete()
+                with self.settings(INGESTION_CONCURRENT_FETCH=concurrent):
+                    results[concurrent] = sorted(
+                        tasks.run_feeds(ingestion.feed_specs()),
+                        key=lambda result: (result['country'], result['category'] or ''),
+                    )
+        self.assertEqual(results[True], results[False])
+        self.assertEqual(sum(result['processed'] for result in results[True]), 8 * 9 * 3)
+
+    def test_each_feed_is_stored_as_it_arrives(self):
+        specs = ingestion.feed_specs()
+        release = threading.Event()
+        released = []
+        stored = []
+        store_feed = tasks.store_feed
+
+        def slow_rss(country, category=None, feed_state=None):
+            if (country, category) == ('us', None):
+                released.append(release.wait(5))
+            return self.fake_rss(country, category)
+
+        def store(result, *args, **kwargs):
+            store_feed(result, *args, **kwargs)
+            stored.append(result)
+            if len(stored) == len(specs) - 1:
+                release.set()
+
+        with patch('api.ingestion.fetch_google_news_rss', side_effect=slow_rss), \
+                patch('api.tasks.store_feed', side_effect=store):
+            results = tasks.run_feeds(specs)
+        # Every other feed was stored and processed while the slow one was still fetching
+        self.assertEqual(released, [True])
+        self.assertEqual((results[-1]['country'], results[-1]['category']), ('us', None))
+        self.assertEqual(ProcessedData.objects.count(), len(specs) * 3)
+
+    def test_per_host_limit(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def fetch(n):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return [n]
+
+        jobs = [('https://news.google.com/rss', fetch, (n,)) for n in range(12)]
+        results = ingestion.iter_fetch_jobs(jobs, max_workers=8, per_host_limit=2)
+        self.assertEqual(sorted(results), [[n] for n in range(12)])
+        self.assertLessEqual(peak[0], 2)
+
+    def test_fetches_in_flight_are_bounded(self):
+        started = []
+
+        def fetch(n):
+            started.append(n)
+            return [n]
+
+        jobs = [('https://news.google.com/rss', fetch, (n,)) for n in range(20)]
+        results = ingestion.iter_fetch_jobs(jobs, max_workers=2)
+        taken = next(results)
+        time.sleep(0.05)
+        # Two jobs per thread in flight, plus at most as many finished ones
+        self.assertLessEqual(len(started), 8)
+        self.assertEqual(sorted(taken + [n for result in results for n in result]), list(range(20)))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        unlimited = RateLimiter(limits={'news.google.com': {'rate': 1000, 'burst': 1000}})
+        patcher = patch('api.ingestion.get_rate_limiter', return_value=unlimited)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_modified_feed_is_skipped(self):
+        state = FeedState(source='google_news', country='us', category='general',
+                          etag='"abc"', content_length=5000)
+        response = Mock(status_code=304)
+        with patch('api.ingestion.get_session') as session:
+            session.return_value.get.return_value = response
+            articles = ingestion.fetch_google_news_rss('us', feed_state=state)
+        self.assertEqual(articles, [])
+        self.assertTrue(state.not_modified)
+        get = session.return_value.get
+        self.assertEqual(get.call_args.kwargs['headers']['If-None-Match'], '"abc"')
+
+    def test_stats_report_skipped_feeds(self):
+        FeedState.objects.create(source='google_news', country='us', category='general',
+                                 etag='"abc"', content_length=5000)
+        ok = Mock(status_code=200, content=b'<rss><channel></channel></rss>',
+                  headers={'ETag': '"new"'})
+        not_modified = Mock(status_code=304)
+
+        def fake_get(url, headers=None, **kwargs):
+            return not_modified if headers.get('If-None-Match') == '"abc"' else ok
+
+        specs = [('google_news', 'us', None), ('google_news', 'gb', None)]
+        with patch('api.ingestion.get_session') as session:
+            session.return_value.get.side_effect = fake_get
+            with patch('api.tasks.store_articles', side_effect=DatabaseError("write failed")):
+                results = tasks.run_feeds(specs)
+            self.assertEqual([result['error'] for result in results], ["write failed"] * 2)
+            # Nothing was stored, so the validators are not saved either
+            self.assertFalse(FeedState.objects.filter(country='gb').exists())
+            results = tasks.run_feeds(specs)
+        by_country = {result['country']: result for result in results}
+        self.assertTrue(by_country['us']['not_modified'])
+        self.assertEqual(by_country['us']['bytes_saved'], 5000)
+        self.assertFalse(by_country['gb']['not_modified'])
+        self.assertEqual(FeedState.objects.get(country='gb', category='general').etag, '"new"')
+
+    def test_backups_skip_only_fully_unchanged_countries(self):
+        feeds = [('us', True), ('us', False), ('gb', True), ('gb', True)]
+        self.assertEqual(ingestion.unchanged_countries(feeds), {'gb'})
+        self.assertEqual(
+            ingestion.sparse_countries({'us': 3, 'gb': 0, 'in': 12}, {'gb'}),
+            ['us', 'jp', 'fr', 'ca', 'au', 'de'],
+        )
+
+    def test_entries_below_high_water_mark_are_skipped(self):
+        def item(n, hour):
+            return (f"<item><title>Story {n} - Wire</title><link>https://example.com/{n}</link>"
+                    f"<pubDate>Thu, 01 May 2025 {hour:02d}:00:00 GMT</pubDate></item>")
+        body = f"<rss><channel>{item(3, 12)}{item(2, 11)}{item(1, 10)}</channel></rss>".encode()
+        state = FeedState(source='google_news', country='us', category='general',
+                          high_water_date=datetime(2025, 5, 1, 11, tzinfo=dt_timezone.utc),
+                          high_water_link_hash=hash_link('https://example.com/2'))
+        response = Mock(status_code=200, content=body, headers={})
+        with patch('api.ingestion.get_session') as session:
+            session.return_value.get.return_value = response
+            articles = ingestion.fetch_google_news_rss('us', feed_state=state)
+        self.assertEqual([article.link for article in articles], ['https://example.com/3'])
+        self.assertEqual(articles[0].raw['title'], 'Story 3 - Wire')
+        self.assertEqual(articles[0].published_date, datetime(2025, 5, 1, 12, tzinfo=dt_timezone.utc))
+        self.assertEqual(state.entries_skipped, 2)
+        self.assertEqual(state.high_water_date, datetime(2025, 5, 1, 12, tzinfo=dt_timezone.utc))
+        self.assertEqual(state.high_water_link_hash, hash_link('https://example.com/3'))
+
+
+class HttpSessionTests(SimpleTestCase):
+    def tearDown(self):
+        http_session.close_session()
+
+    def test_session_is_shared_and_pooled(self):
+        with self.settings(HTTP_POOL_MAXSIZE=4, HTTP_MAX_RETRIES=2):
+            http_session.close_session()
+            session = http_session.get_session()
+        self.assertIs(http_session.get_session(), session)
+        adapter = session.get_adapter('https://news.google.com/rss')
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+
+
+class ArticleRecordTests(SimpleTestCase):
+    def test_payload_variants_are_normalized_once(self):
+        gnews = Article.from_dict({'title': 'Story', 'url': 'https://example.com/a',
+                                   'publishedAt': '2025-05-01T12:00:00Z', 'source': {'name': 'Wire'}})
+        newsapi = Article.from_dict({'title': 'Story', 'url': 'https://example.com/a',
+                                     'published_at': '2025-05-01T12:00:00.000000Z', 'source': 'Wire'})
+        self.assertEqual(gnews, newsapi)
+        self.assertEqual(gnews.published_date, datetime(2025, 5, 1, 12, tzinfo=dt_timezone.utc))
+        self.assertEqual(gnews.link_hash, hash_link('https://example.com/a?utm_source=x'))
+        self.assertEqual((gnews.country, gnews.category), ('unknown', 'general'))
+        self.assertEqual(Article.from_dict(gnews.to_dict()), gnews)
+        self.assertFalse(hasattr(gnews, '__dict__'))
+
+
+class StoreArticlesTests(TestCase):
+    def article(self, n):
+        return {'title': f"Story {n}", 'url': f"https://example.com/{n}",
+                'published_date': '2025-05-01T12:00:00', 'source': 'Wire',
+                'country': 'us', 'category': 'business'}
+
+    def test_batched_store_returns_only_new_rows(self):
+        RawData.objects.create(title='Story 0', link='https://example.com/0',
+                               category='business', country='us')
+        articles = [self.article(n) for n in range(5)] + [self.article(3)]
+        created = ingestion.store_articles(articles, batch_size=2)
+        self.assertEqual(sorted(obj.link for obj in created),
+                         [f"https://example.com/{n}" for n in range(1, 5)])
+        self.assertTrue(all(obj.pk for obj in created))
+        self.assertEqual(RawData.objects.count(), 5)
+
+    def test_old_rows_are_deleted_in_id_batches(self):
+        rows = ingestion.store_articles([self.article(n) for n in range(5)])
+        RawData.objects.filter(id__in=[row.id for row in rows[:4]]).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(tasks.delete_old_raw_data(batch_size=2), 4)
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 2)
+        self.assertEqual(list(RawData.objects.values_list('id', flat=True)), [rows[4].id])
+
+
+class CanonicalUrlTests(SimpleTestCase):
+    def test_tracking_params_and_formatting_are_dropped(self):
+        self.assertEqual(
+            canonicalize_url('https://www.Reuters.com/world/story/?utm_source=rss&b=2&a=1#top'),
+            'https://reuters.com/world/story?a=1&b=2',
+        )
+        # Generic keys are tracking only on hosts known to use them that way
+        self.assertEqual(
+            canonicalize_url('https://example.com/story?src=feed&ref=2&fbclid=x'),
+            'https://example.com/story?ref=2&src=feed',
+        )
+        self.assertEqual(
+            canonicalize_url('https://amp.theguardian.com/world/story?CMP=share_btn_tw'),
+            'https://amp.theguardian.com/world/story',
+        )
+
+    def test_google_news_redirects_share_a_key(self):
+        self.assertEqual(
+            hash_link('https://news.google.com/rss/articles/CBMiXYZ?oc=5'),
+            hash_link('https://news.google.com/articles/CBMiXYZ?hl=en-US&gl=US'),
+        )
+        self.assertEqual(len(hash_link('https://example.com/a')), 32)
+
+    def test_dedupe_articles(self):
+        articles = [
+            {'title': 'Markets rally', 'url': 'https://news.google.com/rss/articles/A?oc=5', 'source': 'Reuters'},
+            {'title': 'Markets rally', 'url': 'https://news.google.com/rss/articles/A?oc=5&hl=en-GB', 'source': 'Reuters'},
+            {'title': 'Markets Rally!', 'url': 'https://reuters.com/markets-rally', 'source': {'name': 'Reuters'}},
+            {'title': 'Markets rally', 'url': 'https://apnews.com/markets-rally', 'source': 'AP'},
+        ]
+        stats = {}
+        unique = ingestion.dedupe_articles(articles, stats)
+        self.assertEqual([article.source for article in unique], ['Reuters', 'AP'])
+        self.assertEqual(stats['duplicates_dropped'], 2)
+
+
+class LinkHashMigrationTests(TestCase):
+    def test_canonical_duplicates_are_deleted(self):
+        migration = import_module('api.migrations.0014_link_hash')
+        links = ['https://example.com/a?utm_source=x', 'https://www.example.com/a', 'https://example.com/b']
+        RawData.objects.bulk_create([
+            RawData(title=f"Story {n}", link=link, category='world', country='us') for n, link in enumerate(links)
+        ])
+        migration.fill_link_hashes(django_apps, None)
+        # The first copy of a story keeps its row; the frozen hash matches today's
+        self.assertEqual(
+            list(RawData.objects.order_by('id').values_list('link', 'link_hash')),
+            [(links[0], hash_link(links[0])), (links[2], hash_link(links[2]))],
+        )
+
+
+class CountryDetectorTests(SimpleTestCase):
+    def test_keywords_match_whole_words_only(self):
+        detector = get_detector()
+        self.assertEqual(detector.detect("Ukraine talks continue"), "unknown")
+        self.assertEqual(detector.detect("Markets in the UK slip"), "gb")
+        self.assertEqual(detector.detect("Prices rise to ₹500"), "in")
+        self.assertEqual(detector.detect("Stocks close higher in New York"), "us")
+
+    def test_scores_by_hit_count(self):
+        detector = CountryDetector({'fr': ['paris', 'euro'], 'de': ['berlin', 'germany', 'euro']})
+        self.assertEqual(
+            [detector.detect(text) for text in ["The euro fell", "Berlin and Germany weigh the euro", "Nothing here"]],
+            ['fr', 'de', 'unknown'],
+        )
+        self.assertEqual(detector.scores("Berlin and Germany weigh the euro"), {'de': 3, 'fr': 1})
+
+
+class RateLimiterTests(SimpleTestCase):
+    def test_bucket_throttles_instead_of_sleeping(self):
+        limiter = RateLimiter(limits={'gnews.io': {'rate': 0.1, 'burst': 2}})
+        limiter.acquire('gnews.io:abc', max_wait=0)
+        limiter.acquire('gnews.io:abc', max_wait=0)
+        with self.assertRaises(RateLimited) as raised:
+            limiter.acquire('gnews.io:abc', max_wait=0)
+        self.assertGreater(raised.exception.retry_after, 9)
+        metrics = limiter.snapshot()['gnews.io:abc']
+        self.assertEqual((metrics['acquired'], metrics['throttled']), (2, 1))
+
+    def test_waits_only_in_blocking_callers(self):
+        limiter = RateLimiter(limits={'gnews.io': {'rate': 50, 'burst': 1}})
+        limiter.acquire('gnews.io:abc')
+        # Task code is rescheduled rather than put to sleep
+        with self.assertRaises(RateLimited):
+            limiter.acquire('gnews.io:abc')
+        with blocking_waits(1):
+            self.assertGreater(limiter.acquire('gnews.io:abc'), 0)
+        with self.assertRaises(RateLimited):
+            limiter.acquire('gnews.io:abc')
+
+    def test_feed_task_reschedules_when_throttled(self):
+        with patch('api.ingestion.fetch_gnews_for_country', side_effect=RateLimited('gnews.io:abc', 12.5)), \
+                patch.object(tasks.fetch_feed_task, 'retry', side_effect=RuntimeError("retry")) as retry:
+            tasks.fetch_feed_task.push_request(is_eager=False, retries=0)
+            self.addCleanup(tasks.fetch_feed_task.pop_request)
+            with self.assertRaises(RuntimeError):
+                tasks.fetch_feed_task.run('gnews', 'us')
+        self.assertEqual(retry.call_args.kwargs['countdown'], 13)
+
+    def test_rate_limited_jobs_are_deferred(self):
+        limiter = RateLimiter(limits={'gnews.io': {'rate': 1, 'burst': 1}})
+        limiter.block('gnews.io:abc', 30)
+
+        def fetch(country):
+            limiter.acquire('gnews.io:abc', max_wait=0)
+            return [country]
+
+        with patch('api.ingestion.fetch_gnews_for_country', side_effect=fetch):
+            spec, articles, _, _, error = ingestion.fetch_feed_job('gnews', 'us')
+        self.assertEqual((spec, articles), (('gnews', 'us', None), []))
+        self.assertIsInstance(error, RateLimited)
+        self.assertGreater(error.retry_after, 29)
+
+
+class NewsWorkflowTests(TestCase):
+    def fake_rss(self, country, category=None, feed_state=None):
+        if country == 'jp' and category == 'SPORTS':
+            raise RuntimeError("feed down")
+        if country == 'de':
+            return []
+        return [{'title': f"{country} {category} {n}", 'url': f"https://example.com/{country}/{category}/{n}",
+                 'published_date': '2025-05-01T12:00:00', 'source': 'Wire',
+                 'country': country, 'category': (category or 'general').lower()} for n in range(2)]
+
+    def fake_gnews(self, country):
+        raise RateLimited('gnews.io:abc', 60)
+
+    def test_inline_workflow_isolates_failing_feeds(self):
+        with patch('api.ingestion.fetch_google_news_rss', side_effect=self.fake_rss), \
+                patch('api.ingestion.fetch_gnews_for_country', side_effect=self.fake_gnews), \
+                patch('api.ingestion.fetch_newsapi_for_country', return_value=[]):
+            result = tasks.fetch_and_process_news(inline=True)
+        self.assertEqual(result['fetched'], 7 * 9 * 2 - 2)
+        self.assertEqual(result['processed'], result['fetched'])
+        self.assertEqual(result['failed_feeds'], ['google_news/jp/SPORTS'])
+        self.assertEqual(result['deferred'], 1)  # GNews backup for de
+        self.assertEqual(RawData.objects.count(), 0)
+        self.assertEqual(ProcessedData.objects.filter(country='us').count(), 18)
+        self.assertEqual(result['analytics']['sentiment']['updated'], result['processed'])
+        self.assertFalse(ProcessedData.objects.filter(sentiment_label__isnull=True).exists())
+
+    def test_analytics_are_queued_once_per_run(self):
+        with patch('api.ingestion.fetch_google_news_rss', side_effect=self.fake_rss), \
+                patch('api.ingestion.fetch_gnews_for_country', side_effect=self.fake_gnews), \
+                patch('api.ingestion.fetch_newsapi_for_country', return_value=[]), \
+                patch('api.tasks.run_analytics') as analytics:
+            analytics.apply.return_value.get.return_value = {}
+            tasks.fetch_and_process_news(inline=True)
+            analytics.apply.assert_called_once()
+            
+            # Queued: the RSS callback leaves the analytics to the backup callback
+            results = [dict(tasks.feed_result('google_news', 'us'), articles=2, stored=2, processed=2)]
+            with patch('api.tasks.news_workflow') as workflow:
+                tasks.process_fetched_news(results)
+            analytics.delay.assert_not_called()
+            self.assertEqual(workflow.call_args.kwargs['processed_before'], 2)
+            tasks.process_fetched_news([], phase='backup', processed_before=2)
+            analytics.delay.assert_called_once()
+
+    def test_feeds_of_already_stored_entries_need_no_backups(self):
+        def seen_rss(country, category=None, feed_state=None):
+            feed_state.entries_skipped = 2  # Every entry is below the high-water mark
+            return []
+
+        with patch('api.ingestion.fetch_google_news_rss', side_effect=seen_rss), \
+                patch('api.ingestion.fetch_gnews_for_country', return_value=[]) as gnews, \
+                patch('api.ingestion.fetch_newsapi_for_country', return_value=[]) as newsapi:
+            result = tasks.fetch_and_process_news(inline=True)
+        self.assertEqual(result['fetched'], 0)
+        self.assertEqual(result['entries_skipped'], 8 * 9 * 2)
+        gnews.assert_not_called()
+        newsapi.assert_not_called()
+
+    def test_feeds_are_processed_and_deduped_within_a_run(self):
+        def rss_with_shared_story(country, category=None, feed_state=None):
+            shared = {'title': 'Shared story', 'url': 'https://example.com/shared',
+                      'published_date': '2025-05-01T12:00:00', 'source': 'Wire', 'country': 'us'}
+            return self.fake_rss(country, category) + ([shared] if country == 'us' else [])
+
+        with patch('api.ingestion.fetch_google_news_rss', side_effect=rss_with_shared_story):
+            result = tasks.fetch_feed_task.apply(args=('google_news', 'us'), kwargs={'run_id': 'a'}).get()
+            self.assertEqual((result['stored'], result['processed']), (3, 3))
+            self.assertEqual(RawData.objects.count(), 0)
+            result = tasks.fetch_feed_task.apply(args=('google_news', 'us', 'WORLD'), kwargs={'run_id': 'a'}).get()
+            self.assertEqual((result['processed'], result['duplicates_dropped']), (2, 1))
+            # A new run takes the story again; the store then finds it exists
+            result = tasks.fetch_feed_task.apply(args=('google_news', 'us', 'WORLD'), kwargs={'run_id': 'b'}).get()
+            self.assertEqual(result['duplicates_dropped'], 0)
+        self.assertEqual(ProcessedData.objects.filter(link='https://example.com/shared').count(), 1)
+
+    def test_fetchnews_fused_flag_overrides_setting(self):
+        result = {'fetched': 0, 'processed': 0}
+        with patch('api.management.commands.fetchnews.fetch_and_process_news', return_value=result) as run:
+            with self.settings(INGESTION_FUSED=True):
+                call_command('fetchnews', '--no-fused', stdout=StringIO())
+                call_command('fetchnews', stdout=StringIO())
+            call_command('fetchnews', '--fused', stdout=StringIO())
+        self.assertEqual([call.kwargs['fused'] for call in run.call_args_list], [False, True, True])
+
+    def test_fused_workflow_skips_raw_data(self):
+        with patch('api.ingestion.fetch_google_news_rss', side_effect=self.fake_rss), \
+                patch('api.ingestion.fetch_gnews_for_country', side_effect=self.fake_gnews), \
+                patch('api.ingestion.fetch_newsapi_for_country', return_value=[]):
+            result = tasks.fetch_and_process_news(inline=True, fused=True)
+            self.assertEqual(result['processed'], 7 * 9 * 2 - 2)
+            self.assertEqual(RawData.objects.count(), 0)
+            self.assertEqual(ProcessedData.objects.filter(link='https://example.com/us/None/0').count(), 1)
+            
+            ProcessedData.objects.all().delete()
+            with self.settings(INGESTION_ARCHIVE_RAW=True):
+                result = tasks.fetch_and_process_news(inline=True, fused=True)
+        self.assertEqual(RawData.objects.filter(processed=True).count(), result['processed'])
+        self.assertEqual(RawData.objects.filter(processed=False).count(), 0)
+
+
+# Golden outputs of normalize_text: (input, normalized, normalized as title)
+NORMALIZE_GOLDEN = [
+    (None, None, None),
+    ('', '', ''),
+    ('   ', '', ''),
+    ('...', '', ''),
+    ('Hello world', 'Hello world', 'Hello World'),
+    ('  Hello   world  ', 'Hello world', 'Hello World'),
+    ('Caf\xe9 au lait \u2014 r\xe9sum\xe9', 'Cafe au lait resume', 'Cafe au lait Resume'),
+    ('<p>Markets <b>rally</b> as&nbsp;rates fall</p>', 'Markets rally as&nbsp;rates fall', 'Markets rally as&nbsp;rates Fall'),
+    ('<a href="https://news.google.com/x">Stocks rise</a>&nbsp;&nbsp;<font color="#6f6f6f">Reuters</font>', 'Stocks rise &nbsp;&nbsp; Reuters', 'Stocks rise &nbsp;&nbsp; Reuters'),
+    ('"Quoted headline!"', 'Quoted headline', 'Quoted Headline'),
+    ('  "  spaced quote  "  ', ' spaced quote ', 'Spaced Quote'),
+    ('Tokyo\u3000stocks\xa0climb', 'Tokyo stocks climb', 'Tokyo stocks Climb'),
+    ('Prices hit \u20b9500 crore', 'Prices hit 500 crore', 'Prices hit 500 Crore'),
+    ('\xc9COLE Normale sup\xe9rieure', 'ECOLE Normale superieure', 'Ecole normale Superieure'),
+    ('a', 'a', 'A'),
+    ('one two', 'one two', 'One Two'),
+    ('THE FED RAISES RATES AGAIN', 'THE FED RAISES RATES AGAIN', 'The fed raises rates Again'),
+    ('iPhone sales beat estimates in Q3', 'iPhone sales beat estimates in Q3', 'Iphone sales beat estimates in Q3'),
+    ('Tabs\tand\nnewlines\r\nhere', 'Tabs and newlines here', 'Tabs and newlines Here'),
+    ('Emoji \U0001f680 launch', 'Emoji launch', 'Emoji Launch'),
+    ('\u65e5\u672c\u306e\u682a\u4fa1', '', ''),
+    ("l'\xe9conomie fran\xe7aise", "l'economie francaise", "L'economie Francaise"),
+    ('x < y and y > z', 'x z', 'X Z'),
+    ('<<broken tag', 'broken tag', 'Broken Tag'),
+    ('--dash-wrapped--', 'dash-wrapped', 'Dash-wrapped'),
+    ('\u216b \ufb01nance \xbd', 'XII finance 12', 'Xii finance 12'),
+    ('Ogham\u1680space', 'Oghamspace', 'Oghamspace'),
+    ('zero\u200bwidth', 'zerowidth', 'Zerowidth'),
+    ("[{'type': 'text/html', 'value': '<p>Body</p>'}]", "type': 'text/html', 'value': ' Body ", "Type': 'text/html', 'value': ' Body"),
+    ('word', 'word', 'Word'),
+    ('Ends with period.', 'Ends with period', 'Ends with Period'),
+]
+
+
+class SentimentTests(TestCase):
+    def test_lexicon_scores(self):
+        positive = analyze_sentiment("Stocks surge as markets rally on strong earnings")
+        self.assertEqual(set(positive), {'polarity', 'subjectivity', 'sentiment', 'confidence'})
+        self.assertEqual(positive['sentiment'], 'positive')
+        self.assertEqual(analyze_sentiment("Deadly earthquake kills dozens")['sentiment'], 'negative')
+        neutral = analyze_sentiment("The committee meets on Tuesday")
+        self.assertEqual((neutral['polarity'], neutral['confidence'], neutral['sentiment']), (0.0, 0.0, 'neutral'))
+
+    def test_modifiers(self):
+        good = analyze_sentiment("Results were good")['polarity']
+        self.assertGreater(analyze_sentiment("Results were very good")['polarity'], good)
+        self.assertLess(analyze_sentiment("Results were not good")['polarity'], 0)
+        self.assertLess(analyze_sentiment("Results were not very good")['polarity'], 0)
+        # Modifiers apply within one text only
+        self.assertEqual(analyze_sentiment_batch(["Prices did not", "Good news"])[1]['polarity'],
+                         analyze_sentiment("Good news")['polarity'])
+
+    def test_batch_matches_single_texts(self):
+        texts = ["Strong growth lifts shares", None, "", "Floods leave thousands without power",
+                 "Peace deal welcomed, but fears of new violence remain"]
+        self.assertEqual(analyze_sentiment_batch(texts), [analyze_sentiment(text) for text in texts])
+        for result in analyze_sentiment_batch(texts):
+            self.assertEqual(result['sentiment'], get_sentiment_label(result['polarity']))
+            self.assertTrue(-1 <= result['polarity'] <= 1)
+            self.assertTrue(0 <= result['subjectivity'] <= 1 and 0 <= result['confidence'] <= 1)
+        self.assertEqual(analyze_sentiment_batch([]), [])
+
+
+class SentimentCacheTests(TestCase):
+    TEXTS = ["Strong growth lifts shares", "Floods leave thousands without power", "Strong growth lifts shares"]
+
+    def test_texts_are_scored_once_per_version(self):
+        engine = get_engine()
+        cache = SentimentCache(flush_seconds=3600)
+        with patch.object(engine, 'analyze_batch', wraps=engine.analyze_batch) as scored:
+            first = cache.analyze_many(self.TEXTS, engine)
+            # Counts stay in process until the next flush
+            self.assertFalse(SentimentCacheStats.objects.exists())
+            self.assertEqual(scored.call_args.args[0], self.TEXTS[:2])
+            self.assertEqual(cache.analyze_many(self.TEXTS, engine), first)
+            self.assertEqual(scored.call_count, 1)
+        self.assertEqual(first, engine.analyze_batch(self.TEXTS))
+        snapshot = cache.snapshot(engine.version)
+        self.assertEqual((snapshot['hits'], snapshot['misses']), (4, 2))
+        self.assertEqual(snapshot['shared']['hit_rate'], 4 / 6)
+
+        # A new analyzer version re-scores lazily, and the old scores can be pruned
+        with patch.object(engine, 'version', 'lexicon-test'):
+            cache.analyze_many(self.TEXTS[:1], engine)
+            self.assertEqual(SentimentScore.objects.filter(version='lexicon-test').count(), 1)
+        self.assertEqual(prune_sentiment_cache(engine.version), 1)
+        self.assertEqual(SentimentScore.objects.count(), 2)
+
+    def test_metrics_endpoint(self):
+        # A fresh cache, without counts left over from other tests
+        with patch('api.analytics.sentiment_cache._cache', None):
+            analyze_sentiment_batch(self.TEXTS)
+            response = self.client.get(reverse('sentiment_cache_metrics'))
+        self.assertEqual(response.json()['shared']['misses'], 2)
+        self.assertEqual(response.json()['version'], get_engine().version)
+
+
+class SummarizerTests(SimpleTestCase):
+    ARTICLE = (
+        "The U.S. central bank raised interest rates on Tuesday. Mr. Powell said inflation remains too high. "
+        "Markets fell after the interest rate decision. The weather in Washington was sunny. "
+        "Analysts expect another interest rate rise as inflation persists."
+    )
+
+    def test_top_ranked_sentences_in_order(self):
+        self.assertEqual(
+            summarize_text(self.ARTICLE, sentences_count=2),
+            "Markets fell after the interest rate decision. "
+            "Analysts expect another interest rate rise as inflation persists.",
+        )
+        self.assertNotIn('weather', extractive_summary(self.ARTICLE, ratio=0.8))
+        self.assertEqual(summarize_text("Only one sentence here."), "Only one sentence here.")
+
+    def test_batch_matches_single_articles(self):
+        summarizer = TextRankSummarizer()
+        texts = [self.ARTICLE, None, '', "Short text. With two sentences.", self.ARTICLE.replace('rate', 'tax')]
+        batch = summarizer.summarize_batch(texts)
+        self.assertEqual(batch, [summarizer.summarize_batch([text])[0] for text in texts])
+        self.assertEqual(batch[1:4], ['', '', "Short text. With two sentences."])
+
+    def test_nul_in_text_is_not_a_sentence_break(self):
+        self.assertEqual(summarize_batch(['A b\x00c. Dd ee.', 'x y z. w q.']), ['A b c. Dd ee.', 'x y z. w q.'])
+
+
+class EnrichmentTests(TestCase):
+    def make_articles(self, count, start=0):
+        return [
+            ProcessedData.objects.create(
+                title=f"Strong growth lifts shares {n}", description="Markets rally. Investors cheer the news.",
+                link=f"https://example.com/enrich/{n}", link_hash=hash_link(f"https://example.com/enrich/{n}"),
+                published_date=timezone.now(),
+            )
+            for n in range(start, start + count)
+        ]
+
+    def test_jobs_continue_from_watermark(self):
+        articles = self.make_articles(5)
+        result = enrichment.run_job('sentiment', batch_size=2)
+        self.assertEqual(result, {'updated': 5, 'watermark': articles[-1].id})
+        self.assertFalse(ProcessedData.objects.filter(sentiment_label__isnull=True).exists())
+        self.assertEqual(ProcessedData.objects.get(id=articles[0].id).sentiment_label, 'positive')
+        self.assertEqual(AnalyticsWatermark.objects.get(name='sentiment').last_id, articles[-1].id)
+
+        self.assertEqual(enrichment.run_job('sentiment')['updated'], 0)
+        newer = self.make_articles(2, start=5)
+        self.assertEqual(enrichment.run_job('sentiment'), {'updated': 2, 'watermark': newer[-1].id})
+
+    def test_id_range_leaves_watermark(self):
+        articles = self.make_articles(4)
+        result = tasks.generate_article_summary(articles[1].id, articles[2].id)
+        self.assertEqual(result, {'updated': 2, 'watermark': None})
+        self.assertEqual(
+            list(ProcessedData.objects.filter(summary__isnull=False).values_list('id', flat=True).order_by('id')),
+            [articles[1].id, articles[2].id],
+        )
+        self.assertFalse(AnalyticsWatermark.objects.filter(name='summary').exists())
+        self.assertEqual(ProcessedData.objects.get(id=articles[1].id).summary, "Markets rally. Investors cheer the news.")
+        self.assertEqual(tasks.run_analytics()['summary']['updated'], 2)
+
+
+class FakeSketchRedis:
+    """
+    The few Redis commands RedisSketches uses: BITFIELD on u32 counters and
+    sorted sets, always through a pipeline.
+    """
+    def __init__(self):
+        self.counters = {}
+        self.zsets = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return FakeSketchPipeline(self)
+
+
+class FakeSketchPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def bitfield(self, key, default_overflow=None):
+        return FakeBitfield(self, key)
+
+    def expire(self, key, ttl):
+        self.commands.append(lambda: self.client.ttls.__setitem__(key, ttl))
+
+    def zadd(self, key, mapping, gt=False):
+        def run():
+            zset = self.client.zsets.setdefault(key, {})
+            for member, score in mapping.items():
+                member = member.encode('utf-8')
+                if member not in zset or not gt or score > zset[member]:
+                    zset[member] = float(score)
+        self.commands.append(run)
+
+    def ranked(self, key, start, end):
+        """
+        Members from rank start to end inclusive, negative ranks counting
+        from the highest score as in Redis.
+        """
+        ranked = sorted(self.client.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        start, end = (rank + len(ranked) if rank < 0 else rank for rank in (start, end))
+        return ranked[max(start, 0):max(end + 1, 0)]
+
+    def zremrangebyrank(self, key, start, end):
+        def run():
+            for member, _ in self.ranked(key, start, end):
+                del self.client.zsets[key][member]
+        self.commands.append(run)
+
+    def zrange(self, key, start, end, withscores=False):
+        self.commands.append(lambda: self.ranked(key, start, end))
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [command() for command in commands]
+
+
+class FakeBitfield:
+    def __init__(self, pipe, key):
+        self.pipe = pipe
+        self.key = key
+        self.operations = []
+
+    def incrby(self, fmt, offset, increment):
+        self.operations.append((int(offset[1:]), increment))
+        return self
+
+    def get(self, fmt, offset):
+        self.operations.append((int(offset[1:]), None))
+        return self
+
+    def execute(self):
+        def run():
+            counters = self.pipe.client.counters.setdefault(self.key, {})
+            values = []
+            for offset, increment in self.operations:
+                if increment is not None:
+                    counters[offset] = min(counters.get(offset, 0) + increment, 2 ** 32 - 1)  # SAT
+                values.append(counters.get(offset, 0))
+            return values
+        self.pipe.commands.append(run)
+
+
+class TrendingTests(TestCase):
+    NOW = datetime(2025, 5, 1, 12, 30, tzinfo=dt_timezone.utc)
+
+    def make_engine(self):
+        return TrendingEngine(LocalSketches(), width=256, depth=3, window_buckets=2, baseline_buckets=4)
+
+    def article(self, title, hours_ago, category='world'):
+        return ProcessedData(title=title, country='us', category=category,
+                             published_date=self.NOW - timedelta(hours=hours_ago))
+
+    def record_stories(self, engine):
+        articles = [self.article("Markets steady in early trading", hours) for hours in (0, 1, 2, 3, 4, 5) * 2]
+        articles += [self.article(f"Earthquake strikes northern coast {n}", 0) for n in range(5)]
+        articles += [self.article("Old earthquake report", 48)]
+        return engine.record(articles, now=self.NOW)
+
+    def test_terms_above_baseline_trend(self):
+        engine = self.make_engine()
+        self.assertEqual(article_terms("The Fed and the FED: rates rise"), ['fed', 'rates', 'rise'])
+        self.assertEqual(self.record_stories(engine), 17)  # The 48 hour old article is past the baseline
+        terms = engine.trending('us', limit=3, now=self.NOW)
+        self.assertEqual([term['term'] for term in terms], ['coast', 'earthquake', 'northern'])
+        self.assertEqual(terms[0]['count'], 5)
+        # Steady terms do not trend, other categories and countries see nothing
+        self.assertNotIn('markets', [term['term'] for term in engine.trending('us', now=self.NOW)])
+        self.assertEqual(engine.trending('us', 'business', now=self.NOW), [])
+        self.assertEqual(engine.trending('gb', now=self.NOW), [])
+
+    def test_redis_sketches_match_local(self):
+        client = FakeSketchRedis()
+        engine = TrendingEngine(RedisSketches(client), width=256, depth=3, window_buckets=2, baseline_buckets=4)
+        self.assertEqual(self.record_stories(engine), 17)
+        local = self.make_engine()
+        self.record_stories(local)
+        for category in (None, 'world', 'business'):
+            self.assertEqual(engine.trending('us', category, now=self.NOW), local.trending('us', category, now=self.NOW))
+        key = local.key('us', 'world', local.bucket(self.NOW))
+        self.assertEqual(client.zsets[f"{key}:top"][b'earthquake'], 5)
+        self.assertEqual(client.ttls[f"{key}:cms"], 6 * 3600)
+
+        # Top-terms sets are trimmed to the highest estimates
+        engine.capacity = 1
+        engine.record([self.article("Earthquake aid flows", 0)], now=self.NOW)
+        self.assertEqual(client.zsets[f"{key}:top"], {b'earthquake': 6})
+
+    def test_endpoint_reads_sketches(self):
+        engine = self.make_engine()
+        with patch('api.trending.get_trending_engine', return_value=engine):
+            ingestion.store_processed_articles([
+                {'title': f"Storm hits coast {n}", 'url': f"https://example.com/storm/{n}",
+                 'published_date': timezone.now().isoformat(), 'country': 'us', 'category': 'world'}
+                for n in range(3)
+            ])
+        with patch('api.views.get_trending_engine', return_value=engine):
+            response = self.client.get(reverse('trending_terms'), {'country': 'us', 'category': 'world'})
+        self.assertEqual([term['term'] for term in response.json()['terms']], ['coast', 'hits', 'storm'])
+        self.assertEqual(response.json()['terms'][0]['count'], 3)
+
+
+class NormalizeTextTests(SimpleTestCase):
+    def test_golden_outputs(self):
+        for text, expected, expected_title in NORMALIZE_GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(normalize_text(text), expected)
+                self.assertEqual(normalize_text(text, is_title=True), expected_title)
+
+
+class FakeRedis:
+    """
+    The few Redis commands the normalization cache uses.
+    """
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def hincrby(self, key, field, amount):
+        self.hashes.setdefault(key, {})[field] = self.hashes.get(key, {}).get(field, 0) + amount
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def execute(self):
+        pass
+
+
+class NormalizeCacheTests(SimpleTestCase):
+    LINKS = '<ol><li><a href="https://news.google.com/x">Stocks rise</a>&nbsp;<font>Reuters</font></li></ol>'
+
+    def test_repeated_texts_are_normalized_once(self):
+        normalize = Mock(side_effect=normalize_text)
+        cache = NormalizeCache(version=1, maxsize=2, min_length=10)
+        texts = [self.LINKS, self.LINKS, 'short', None, self.LINKS]
+        self.assertEqual(cache.normalize_many(texts, False, normalize), [normalize_text(text) for text in texts])
+        self.assertEqual(cache.normalize_many([self.LINKS], False, normalize), [normalize_text(self.LINKS)])
+        self.assertEqual(normalize.call_count, 3)  # One miss, plus the two texts too short to cache
+        snapshot = cache.snapshot()
+        self.assertEqual((snapshot['local_hits'], snapshot['misses']), (3, 1))
+        self.assertEqual(snapshot['hit_rate'], 0.75)
+
+        cache.normalize_many([f"{self.LINKS} {n}" for n in range(3)], False, normalize)
+        self.assertEqual(cache.snapshot()['size'], 2)
+
+    def test_redis_tier_is_shared_and_versioned(self):
+        redis = FakeRedis()
+        NormalizeCache(version=1, redis_client=redis, min_length=0).normalize_many([self.LINKS], True, normalize_text)
+        other_worker = NormalizeCache(version=1, redis_client=redis, min_length=0)
+        normalize = Mock(side_effect=normalize_text)
+        self.assertEqual(other_worker.normalize_many([self.LINKS], True, normalize), [normalize_text(self.LINKS, True)])
+        normalize.assert_not_called()
+        self.assertEqual(other_worker.snapshot()['shared'], {'local_hits': 0, 'redis_hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+        NormalizeCache(version=2, redis_client=redis, min_length=0).normalize_many([self.LINKS], True, normalize)
+        normalize.assert_called_once()
+
+
+class IncrementalProcessingTests(TestCase):
+    def raw(self, n, **extra):
+        return RawData.objects.create(title=f"story {n}", link=f"https://example.com/{n}",
+                                      category='business', country='us', **extra)
+
+    def test_only_pending_rows_are_processed(self):
+        for n in range(5):
+            self.raw(n)
+        ProcessedData.objects.create(title='Story 0', link='https://example.com/0', category='business', country='us')
+        self.raw(5, processed=True)
+
+        # PROCESSING_WORKERS is for processnews only; callers inside Celery
+        # workers must not fork a pool
+        with self.settings(PROCESSING_WORKERS=4), patch('api.processing.multiprocessing') as mp:
+            created = clean_and_process_data(chunk_size=2)
+        mp.get_context.assert_not_called()
+        self.assertEqual(sorted(obj.title for obj in created), ['Story 1', 'Story 2', 'Story 3', 'Story 4'])
+        self.assertFalse(RawData.objects.filter(processed=False).exists())
+        self.assertEqual(clean_and_process_data(), [])
+
+    def test_links_stay_unique_across_published_dates(self):
+        def row(n, published_date):
+            link = f"https://example.com/{n}"
+            return ProcessedData(title=f"Story {n}", link=link, link_hash=hash_link(link), category='business',
+                                 country='us', published_date=published_date)
+
+        first = row(1, timezone.now())
+        self.assertEqual(insert_processed([first]), [first])
+        # A worker that missed the first copy in its lookup, with another date
+        later, other = row(1, timezone.now() + timedelta(days=40)), row(2, timezone.now())
+        self.assertEqual(insert_processed([later, other]), [other])
+        self.assertEqual(ProcessedData.objects.filter(link='https://example.com/1').count(), 1)
+        with self.assertRaises(IntegrityError):
+            row(1, None).save()
+        ProcessedData.objects.filter(link='https://example.com/1').delete()
+        self.assertEqual(insert_processed([row(1, None)])[0].link_key.link_hash, hash_link('https://example.com/1'))
+
+    def test_parallel_normalization_matches_serial(self):
+        for n in range(7):
+            self.raw(n, description=f"<p>Caf\xe9 story {n}</p>")
+        stats = {}
+        created = clean_and_process_data(chunk_size=2, workers=2, stats=stats)
+        self.assertEqual(stats['rows'], 7)
+        self.assertEqual(sorted(obj.description for obj in created),
+                         [f"Cafe story {n}" for n in range(7)])
+
+
+class BulkLoadTests(TestCase):
+    def articles(self, count, prefix='a'):
+        return [{'title': f"story {n}", 'description': "<b>Tab\there</b>", 'url': f"https://example.com/{prefix}/{n}",
+                 'published_date': '2025-05-01T12:00:00', 'source': 'Wire',
+                 'country': 'us', 'category': 'business'} for n in range(count)]
+
+    def test_copy_buffer_escapes_text_format(self):
+        fields = [field for field in copy_fields(ProcessedData) if field.name in ('title', 'description', 'published_date', 'minhash')]
+        record = {'title': 'a\tb\nc\\d', 'description': None, 'minhash': b'\x01\xff',
+                  'published_date': datetime(2025, 5, 1, 12, tzinfo=dt_timezone.utc)}
+        self.assertEqual(copy_buffer(fields, [record]).getvalue(), 'a\\tb\\nc\\\\d\t\\N\t2025-05-01T12:00:00+00:00\t\\\\x01ff\n')
+
+    def test_loader_skips_stored_and_duplicate_links(self):
+        articles = self.articles(5)
+        ingestion.store_articles(articles[:2])
+        stats = bulk_load_articles(articles + articles[:1] + [{'title': 'no link'}], chunk_size=2)
+        self.assertEqual(stats, {'rows': 7, 'inserted': 3, 'skipped': 4})
+        self.assertEqual(RawData.objects.count(), 5)
+
+        stats = bulk_load_articles(articles, model=ProcessedData)
+        self.assertEqual(stats['inserted'], 5)
+        self.assertEqual(ProcessedData.objects.get(title='Story 3').description, 'Tab here')
+
+    def test_loadnews_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as dump:
+            dump.write('\n'.join(json.dumps(article) for article in self.articles(3)) + '\n\n')
+            dump.flush()
+            call_command('loadnews', dump.name, '--model', 'processed', stdout=StringIO())
+        self.assertEqual(ProcessedData.objects.count(), 3)
+
+
+class NearDuplicateTests(TestCase):
+    WIRE = "Federal Reserve raises interest rates by a quarter point to fight inflation"
+
+    def article(self, n, title, country='us'):
+        return {'title': title, 'url': f"https://example{n}.com/story", 'published_date': f"2025-05-01T1{n}:00:00",
+                'source': f"Paper {n}", 'country': country, 'category': 'business'}
+
+    def test_signatures_estimate_similarity(self):
+        edited = "Federal Reserve raises interest rates by quarter point to fight inflation"
+        self.assertGreater(similarity(minhash(self.WIRE), minhash(edited)), 0.6)
+        self.assertLess(similarity(minhash(self.WIRE), minhash("Apple unveils a new iPhone with a faster chip")), 0.2)
+        self.assertIsNone(minhash("Stocks"))
+
+    def test_syndicated_copies_share_a_cluster(self):
+        ingestion.store_processed_articles([
+            self.article(1, self.WIRE),
+            self.article(2, "Apple unveils a new iPhone with a faster chip"),
+        ])
+        # A later batch, as another feed picks up the wire story
+        ingestion.store_processed_articles([
+            self.article(3, self.WIRE + " - live updates"),
+            self.article(4, "Federal Reserve raises interest rates by quarter point to fight inflation", country='gb'),
+        ])
+        clusters = dict(ProcessedData.objects.values_list('link', 'cluster_id'))
+        wire = clusters['https://example1.com/story']
+        self.assertEqual(clusters['https://example3.com/story'], wire)
+        self.assertEqual(clusters['https://example4.com/story'], wire)
+        self.assertNotEqual(clusters['https://example2.com/story'], wire)
+
+        response = self.client.get(reverse('country_news'), {'country': 'us'})
+        self.assertEqual([story['link'] for story in response.json()],
+                         ['https://example3.com/story', 'https://example2.com/story'])
+        response = self.client.get(reverse('country_news'), {'country': 'us', 'collapse': 'false'})
+        self.assertEqual(len(response.json()), 3)
+
+    @tag('postgresql')
+    @skipUnless(connection.vendor == 'postgresql', "Advisory locks are PostgreSQL only")
+    def test_clustering_holds_the_index_lock(self):
+        with CaptureQueriesContext(connection) as queries:
+            ingestion.store_processed_articles([self.article(1, self.WIRE)])
+        self.assertTrue(any('pg_advisory_xact_lock' in query['sql'] for query in queries.captured_queries))
+
+
+class RawPayloadTests(TestCase):
+    def test_payloads_are_compressed_and_loaded_lazily(self):
+        payload = {'title': 'Story', 'content': 'Body ' * 500, 'source': {'name': 'Wire'}}
+        link_hash = hash_link('https://example.com/1')
+        self.assertEqual(store_payloads({link_hash: payload, None: payload}), 1)
+        stored = RawPayload.objects.get(link_hash=link_hash)
+        self.assertLess(len(bytes(stored.data)), 200)
+
+        ProcessedData.objects.create(title='Story', link='https://example.com/1', category='business', country='us')
+        article = ProcessedData.objects.get()
+        with self.assertNumQueries(1):
+            self.assertEqual(article.raw_response, payload)
+            self.assertEqual(article.raw_response, payload)
+        self.assertIsNone(ProcessedData(title='No link').raw_response)
+
+    def test_fetched_payloads_are_stored_on_every_path(self):
+        items = [{'title': f"Story {n}", 'url': f"https://example.com/{n}", 'publishedAt': '2025-05-01T12:00:00Z',
+                  'source': {'name': 'Wire', 'url': 'https://wire.example'}} for n in range(4)]
+        response = Mock(status_code=200)
+        response.json.return_value = {'totalArticles': 4, 'articles': items}
+        with patch('api.ingestion.get_session') as session, patch('api.ingestion.get_rate_limiter'), \
+                self.settings(GNEWS_API_KEY='abc'):
+            session.return_value.get.return_value = response
+            articles = ingestion.fetch_gnews_for_country('us')
+        ingestion.store_articles(articles[:2])
+        ingestion.store_processed_articles(articles[2:])
+        self.assertEqual(RawData.objects.get(link='https://example.com/0').raw_response, items[0])
+        self.assertEqual(ProcessedData.objects.get(link='https://example.com/3').raw_response, items[3])
+
+        # The fused-path archive shares the payloads through the link hash
+        tasks.archive_raw_articles_task([article.to_dict() for article in articles[2:]])
+        self.assertEqual(RawData.objects.get(link='https://example.com/3').raw_response, items[3])
+
+
+@tag('postgresql')
+class PartitionTests(TestCase):
+    def store(self, n, published_date, country='us'):
+        return ProcessedData.objects.create(
+            title=f"Story {n}", link=f"https://example.com/{n}", category='business',
+            country=country, published_date=published_date,
+        )
+
+    def test_month_arithmetic(self):
+        month = partitions.month_start(datetime(2026, 11, 30, 23, 30, tzinfo=dt_timezone(timedelta(hours=-5))))
+        self.assertEqual(month, datetime(2026, 12, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.add_months(month, 1), datetime(2027, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.add_months(month, -12), datetime(2025, 12, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.partition_name(month), 'api_processeddata_p202612')
+
+    def test_country_news_reads_past_the_lookback_window_only_when_short(self):
+        now = timezone.now()
+        self.store(1, now - timedelta(days=2))
+        self.store(2, now - timedelta(days=400))
+        self.store(3, now + timedelta(days=30))
+        self.store(4, now - timedelta(days=1), country='gb')
+        self.store(5, now - timedelta(days=3))
+        self.store(6, None)
+        with self.assertNumQueries(1):
+            self.assertEqual([article.title for article in recent_country_news('us', 2)], ['Story 1', 'Story 5'])
+        titles = [article.title for article in recent_country_news('us', 10, collapse=False)]
+        self.assertEqual(titles, ['Story 1', 'Story 5', 'Story 3', 'Story 2', 'Story 6'])
+        with self.settings(NEWS_LOOKBACK_DAYS=0):
+            titles = [article.title for article in recent_country_news('us', 10)]
+        self.assertEqual(titles, ['Story 3', 'Story 1', 'Story 5', 'Story 2', 'Story 6'])
+
+    def test_retention_removes_expired_articles_and_payloads(self):
+        now = timezone.now()
+        old = self.store(1, now - timedelta(days=500))
+        self.store(2, now - timedelta(days=2))
+        store_payloads({old.link_hash: {'title': 'Story 1'}})
+        result = partitions.enforce_retention(retention_months=12)
+        self.assertEqual(result['rows_deleted'], 1)
+        self.assertEqual(list(ProcessedData.objects.values_list('title', flat=True)), ['Story 2'])
+        self.assertFalse(RawPayload.objects.exists())
+
+    @skipUnless(connection.vendor == 'postgresql', "Partitioning is PostgreSQL only")
+    def test_migration_partitions_by_month(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT partstrat FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid "
+                "WHERE relname = 'api_processeddata'"
+            )
+            self.assertEqual(cursor.fetchone(), ('r',))
+        month = partitions.month_start(timezone.now())
+        self.assertTrue(
+            {partitions.add_months(month, n) for n in range(-1, 3)} <= set(partitions.list_partitions())
+        )
+        dated = self.store(1, month + timedelta(days=1))
+        undated = self.store(2, None)
+        self.assertLess(dated.id, undated.id)  # Ids still come from the sequence
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, tableoid::regclass::text FROM api_processeddata WHERE id IN (%s, %s)",
+                [dated.id, undated.id],
+            )
+            tables = dict(cursor.fetchall())
+        self.assertEqual(tables, {dated.id: partitions.partition_name(month), undated.id: 'api_processeddata_default'})
+
+    @skipUnless(connection.vendor == 'postgresql', "Partitioning is PostgreSQL only")
+    def test_country_news_prunes_partitions(self):
+        now = timezone.now()
+        old_month = partitions.add_months(partitions.month_start(now), -6)
+        partitions.create_partition(old_month)
+        partitions.ensure_partitions()
+        self.store(1, now - timedelta(days=2))
+        self.store(2, old_month + timedelta(days=3))
+
+        plan = views.country_news_ranges('us', now=now)[0].explain()
+        self.assertIn(partitions.partition_name(partitions.month_start(now)), plan)
+        self.assertNotIn(partitions.partition_name(old_month), plan)
+        self.assertNotIn('api_processeddata_default', plan)
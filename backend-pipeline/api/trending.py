@@ -0,0 +1,333 @@
+"""
+Streaming trending terms per country and category.
+
+Every stored article adds its title terms to a Count-Min Sketch (fixed
+width x depth counters) and to a top-terms set capped at a fixed capacity,
+one of each per country, category and time bucket. Buckets expire once
+they leave the baseline, so memory per bucket is fixed however many
+articles arrive. A term trends when its count over the last few buckets
+is well above what the baseline buckets before them predict.
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+from datetime import datetime, timezone as dt_timezone
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .ratelimit import connect_redis
+from .stopwords import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+TERM = re.compile(r"[a-z][a-z0-9]*(?:['-][a-z0-9]+)*")
+ALL_CATEGORIES = '*'  # Per-country sketches over every category
+MAX_TERMS_PER_ARTICLE = 12
+MIN_COUNT = 2  # Window count a term needs before it can trend
+
+_engine = None
+_lock = threading.Lock()
+
+
+def article_terms(title):
+    """
+    Distinct terms of a title worth counting: words of three or more
+    letters that are not stopwords, in order of appearance.
+    """
+    terms = dict.fromkeys(
+        term for term in TERM.findall((title or '').lower()) if len(term) > 2 and term not in STOPWORDS
+    )
+    return list(terms)[:MAX_TERMS_PER_ARTICLE]
+
+
+class LocalSketches:
+    """
+    In-process sketch storage, used when Redis is unavailable (a single
+    worker then only sees its own articles).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sketches = {}  # key -> flat uint32 counters
+        self.tops = {}  # key -> {term: estimate}
+        self.expires = {}  # key -> unix time
+
+    def add(self, updates, size, capacity, ttl, now):
+        """
+        Count term occurrences and refresh the top-terms sets.
+        
+        Args:
+            updates: {key: [(term, counter offsets), ...]}, one entry per occurrence
+            size: Counters per sketch
+            capacity: Terms kept per top-terms set
+            ttl: Seconds the keys live
+            now: Current unix time
+        """
+        with self._lock:
+            for key in [key for key, expires in self.expires.items() if expires <= now]:
+                self.sketches.pop(key, None)
+                self.tops.pop(key, None)
+                del self.expires[key]
+            for key, occurrences in updates.items():
+                sketch = self.sketches.get(key)
+                if sketch is None:
+                    sketch = self.sketches[key] = np.zeros(size, dtype=np.uint32)
+                offsets = np.array([cells for _, cells in occurrences], dtype=np.int64)
+                np.add.at(sketch, offsets.ravel(), 1)
+                estimates = sketch[offsets].min(axis=1).tolist()
+                top = self.tops.setdefault(key, {})
+                for (term, _), estimate in zip(occurrences, estimates):
+                    top[term] = max(top.get(term, 0), estimate)
+                if len(top) > capacity:
+                    kept = sorted(top.items(), key=lambda item: -item[1])[:capacity]
+                    self.tops[key] = dict(kept)
+                self.expires[key] = now + ttl
+
+    def top(self, keys, limit):
+        """
+        The limit terms with the highest summed estimates over the
+        top-terms sets of keys.
+        """
+        totals = {}
+        with self._lock:
+            for key in keys:
+                for term, estimate in self.tops.get(key, {}).items():
+                    totals[term] = totals.get(term, 0) + estimate
+        return [term for term, _ in sorted(totals.items(), key=lambda item: -item[1])[:limit]]
+
+    def estimate(self, keys, offsets):
+        """
+        Sketch estimates of terms summed over keys.
+        
+        Args:
+            keys: Sketch keys
+            offsets: Counter offsets per term, a (terms, depth) array
+        
+        Returns:
+            numpy array of one count per term
+        """
+        totals = np.zeros(len(offsets), dtype=np.int64)
+        with self._lock:
+            for key in keys:
+                sketch = self.sketches.get(key)
+                if sketch is not None:
+                    totals += sketch[offsets].min(axis=1)
+        return totals
+
+
+class RedisSketches:
+    """
+    Sketches shared by all workers through Redis: each sketch is a string
+    of 32-bit counters updated with BITFIELD, each top-terms set a sorted
+    set trimmed to capacity. Both expire with their bucket.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, updates, size, capacity, ttl, now):
+        pipe = self.client.pipeline(transaction=False)
+        for key, occurrences in updates.items():
+            counters = pipe.bitfield(f"{key}:cms", default_overflow='SAT')
+            for _, cells in occurrences:
+                for offset in cells:
+                    counters.incrby('u32', f"#{offset}", 1)
+            counters.execute()
+            pipe.expire(f"{key}:cms", ttl)
+        counts = pipe.execute()[::2]
+
+        pipe = self.client.pipeline(transaction=False)
+        for (key, occurrences), values in zip(updates.items(), counts):
+            depth = len(occurrences[0][1])
+            estimates = {}
+            for i, (term, _) in enumerate(occurrences):
+                estimates[term] = min(values[i * depth:(i + 1) * depth])
+            pipe.zadd(f"{key}:top", estimates, gt=True)
+            pipe.zremrangebyrank(f"{key}:top", 0, -capacity - 1)
+            pipe.expire(f"{key}:top", ttl)
+        pipe.execute()
+
+    def top(self, keys, limit):
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.zrange(f"{key}:top", 0, -1, withscores=True)
+        totals = {}
+        for members in pipe.execute():
+            for term, estimate in members:
+                term = term.decode('utf-8')
+                totals[term] = totals.get(term, 0) + estimate
+        return [term for term, _ in sorted(totals.items(), key=lambda item: -item[1])[:limit]]
+
+    def estimate(self, keys, offsets):
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            counters = pipe.bitfield(f"{key}:cms")
+            for offset in offsets.ravel().tolist():
+                counters.get('u32', f"#{offset}")
+            counters.execute()
+        totals = np.zeros(len(offsets), dtype=np.int64)
+        for values in pipe.execute():
+            totals += np.array(values, dtype=np.int64).reshape(offsets.shape).min(axis=1)
+        return totals
+
+
+class TrendingEngine:
+    """
+    Counts title terms per country and category in time buckets and ranks
+    terms by how far their recent count exceeds the baseline.
+    
+    The recent window is the last window_buckets buckets, the baseline the
+    baseline_buckets before it. Per bucket and country/category, memory is
+    depth x width counters plus capacity top terms.
+    """
+
+    def __init__(self, store, width=2048, depth=4, capacity=200, bucket_seconds=3600,
+                 window_buckets=6, baseline_buckets=24):
+        self.store = store
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.baseline_buckets = baseline_buckets
+
+    def cells(self, term):
+        """
+        Counter offsets of a term, one per sketch row.
+        """
+        digest = hashlib.blake2b(term.encode('utf-8'), digest_size=4 * self.depth).digest()
+        return [
+            row * self.width + int.from_bytes(digest[4 * row:4 * row + 4], 'little') % self.width
+            for row in range(self.depth)
+        ]
+
+    def bucket(self, moment):
+        return int(moment.timestamp() // self.bucket_seconds)
+
+    def key(self, country, category, bucket):
+        return f"trend:{country}:{category}:{bucket}"
+
+    def record(self, articles, now=None):
+        """
+        Count the title terms of freshly stored articles.
+        
+        Articles are bucketed by published date (future dates count now);
+        articles older than the baseline are ignored.
+        
+        Args:
+            articles: ProcessedData rows (or anything with title, country,
+                      category and published_date)
+        
+        Returns:
+            Number of articles counted
+        """
+        now = now or timezone.now()
+        current = self.bucket(now)
+        oldest = current - self.window_buckets - self.baseline_buckets + 1
+        updates = {}
+        cells = {}
+        counted = 0
+        for article in articles:
+            bucket = min(self.bucket(article.published_date), current) if article.published_date else current
+            terms = article_terms(article.title)
+            if bucket < oldest or not terms or not article.country:
+                continue
+            counted += 1
+            occurrences = [(term, cells.get(term) or cells.setdefault(term, self.cells(term))) for term in terms]
+            for category in {(article.category or 'general').lower(), ALL_CATEGORIES}:
+                updates.setdefault(self.key(article.country, category, bucket), []).extend(occurrences)
+        if updates:
+            ttl = (self.window_buckets + self.baseline_buckets) * self.bucket_seconds
+            self.store.add(updates, self.depth * self.width, self.capacity, ttl, now.timestamp())
+        return counted
+
+    def trending(self, country, category=None, limit=10, now=None):
+        """
+        Top trending terms of a country, optionally within one category.
+        
+        The cost depends only on the window sizes, sketch depth and
+        capacity, never on the number of articles.
+        
+        Returns:
+            list: Dicts with term, count (recent window), baseline (count
+                  over the baseline, scaled to the window) and score
+        """
+        current = self.bucket(now or timezone.now())
+        category = (category or ALL_CATEGORIES).lower()
+        window = [self.key(country, category, b) for b in range(current - self.window_buckets + 1, current + 1)]
+        baseline = [
+            self.key(country, category, b)
+            for b in range(current - self.window_buckets - self.baseline_buckets + 1, current - self.window_buckets + 1)
+        ]
+        candidates = self.store.top(window, limit * 4)
+        if not candidates:
+            return []
+        offsets = np.array([self.cells(term) for term in candidates], dtype=np.int64)
+        counts = self.store.estimate(window, offsets).tolist()
+        expected = (self.store.estimate(baseline, offsets) * (self.window_buckets / self.baseline_buckets)).tolist()
+
+        terms = [
+            {
+                'term': term,
+                'count': count,
+                'baseline': round(base, 2),
+                # Excess over the baseline in Poisson standard deviations
+                'score': round((count - base) / math.sqrt(base + 1.0), 3),
+            }
+            for term, count, base in zip(candidates, counts, expected)
+            if count >= MIN_COUNT and count > base
+        ]
+        terms.sort(key=lambda item: (-item['score'], -item['count'], item['term']))
+        return terms[:limit]
+
+    def window_bounds(self, now=None):
+        """
+        Start and end of the recent window as datetimes.
+        """
+        current = self.bucket(now or timezone.now())
+        start = (current - self.window_buckets + 1) * self.bucket_seconds
+        end = (current + 1) * self.bucket_seconds
+        return (datetime.fromtimestamp(start, tz=dt_timezone.utc), datetime.fromtimestamp(end, tz=dt_timezone.utc))
+
+
+def record_articles(articles):
+    """
+    Count freshly stored articles in the trending sketches; never fails
+    the caller.
+    """
+    engine = get_trending_engine()
+    if engine is None:
+        return 0
+    try:
+        return engine.record(articles)
+    except Exception as e:
+        logger.warning(f"Could not update trending terms: {e}")
+        return 0
+
+
+def get_trending_engine():
+    """
+    Return the process-wide trending engine, or None if it is disabled.
+    """
+    global _engine
+    if _engine is None and getattr(settings, 'TRENDING_ENABLED', True):
+        with _lock:
+            if _engine is None:
+                redis_client = None
+                if getattr(settings, 'TRENDING_REDIS', True):
+                    redis_client = connect_redis(
+                        db=getattr(settings, 'TRENDING_REDIS_DB', 3),
+                        purpose='trending terms',
+                    )
+                _engine = TrendingEngine(
+                    RedisSketches(redis_client) if redis_client is not None else LocalSketches(),
+                    width=getattr(settings, 'TRENDING_SKETCH_WIDTH', 2048),
+                    depth=getattr(settings, 'TRENDING_SKETCH_DEPTH', 4),
+                    capacity=getattr(settings, 'TRENDING_TOP_CAPACITY', 200),
+                    bucket_seconds=getattr(settings, 'TRENDING_BUCKET_SECONDS', 3600),
+                    window_buckets=getattr(settings, 'TRENDING_WINDOW_BUCKETS', 6),
+                    baseline_buckets=getattr(settings, 'TRENDING_BASELINE_BUCKETS', 24),
+                )
+    return _engine
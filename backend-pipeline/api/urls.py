@@ -4,4 +4,8 @@ from . import views
 
 urlpatterns = [
     path('news/country/', views.country_news, name='country_news'),
+    path('trending/', views.trending_terms, name='trending_terms'),
+    path('metrics/rate-limits/', views.rate_limit_metrics, name='rate_limit_metrics'),
+    path('metrics/normalize-cache/', views.normalize_cache_metrics, name='normalize_cache_metrics'),
+    path('metrics/sentiment-cache/', views.sentiment_cache_metrics, name='sentiment_cache_metrics'),
 ]
\ No newline at end of file
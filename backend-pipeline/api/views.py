@@ -1,17 +1,35 @@
 # api/views.py
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from .analytics.sentiment import get_engine
+from .analytics.sentiment_cache import get_sentiment_cache
 from .models import ProcessedData
+from .normcache import get_normalize_cache
+from .ratelimit import get_rate_limiter
+from .trending import get_trending_engine
+
+logger = logging.getLogger(__name__)
+
+COUNTRY_NEWS_FIELDS = (
+    'title', 'description', 'source', 'published_date', 'link', 'sentiment_score', 'sentiment_label', 'summary',
+    'cluster_id',
+)
 
 @api_view(['GET'])
 def country_news(request):
     country_code = request.GET.get('country', '').lower()
-    print(f"Country code received: {country_code}")
+    logger.debug(f"Country code received: {country_code}")
     #country_code = 'us'
     limit = int(request.GET.get('limit', 10))  # Default to 10 articles
+    # One article per story unless ?collapse=false
+    collapse = request.GET.get('collapse', 'true').lower() != 'false'
     
-    articles = ProcessedData.objects.filter(country=country_code)\
-                           .order_by('-published_date')[:limit]
+    articles = recent_country_news(country_code, limit, collapse)
     
     data = [{
         "title": article.title,
@@ -19,7 +37,131 @@ def country_news(request):
         "source": article.source,
         "published_date": article.published_date,
         "link": article.link,
-        "sentiment_score": article.sentiment_score
+        "sentiment_score": article.sentiment_score,
+        "sentiment_label": article.sentiment_label,
+        "summary": article.summary,  # Stored by the analytics jobs, never computed here
+        "cluster_id": article.cluster_id,
     } for article in articles]
     
     return Response(data)
+
+
+def recent_country_news(country_code, limit, collapse=True, now=None):
+    """
+    A country's newest limit articles (one per story with collapse).
+    
+    The articles of the last NEWS_LOOKBACK_DAYS days are read first, a date
+    range that lets PostgreSQL prune ProcessedData partitions; the rest of
+    the table is only read when the window holds fewer than limit articles
+    (see country_news_ranges).
+    
+    Returns:
+        list: ProcessedData rows, newest first within each range
+    """
+    articles = []
+    seen = set()
+    if limit <= 0:
+        return articles
+    for queryset in country_news_ranges(country_code, now):
+        if collapse:
+            articles += first_per_story(queryset, limit - len(articles), seen)
+        else:
+            articles += queryset[:limit - len(articles)]
+        if len(articles) >= limit:
+            break
+    return articles
+
+
+def country_news_ranges(country_code, now=None):
+    """
+    A country's articles as ordered querysets to read in turn: the lookback
+    window (with a day of slack for feeds whose clocks run ahead), then
+    everything outside it, undated articles last. With NEWS_LOOKBACK_DAYS
+    set to 0 the whole table is one range.
+    """
+    # Only the columns the response uses; content and payloads stay on disk
+    articles = ProcessedData.objects.filter(country=country_code).only(*COUNTRY_NEWS_FIELDS)
+    newest_first = articles.order_by(F('published_date').desc(nulls_last=True))
+    lookback_days = getattr(settings, 'NEWS_LOOKBACK_DAYS', 30)
+    if lookback_days <= 0:
+        return [newest_first]
+    now = now or timezone.now()
+    window = Q(published_date__gte=now - timedelta(days=lookback_days), published_date__lt=now + timedelta(days=1))
+    return [newest_first.filter(window), newest_first.exclude(window)]
+
+
+def first_per_story(articles, limit, seen=None):
+    """
+    Newest article of each story cluster, reading the ordered queryset in
+    pages and stopping as soon as limit stories are found.
+    
+    Args:
+        seen: Optional set of stories already taken from an earlier
+              range; updated in place
+    """
+    stories = []
+    if seen is None:
+        seen = set()
+    if limit <= 0:
+        return stories
+    for article in articles.iterator(chunk_size=limit * 4):
+        key = article.cluster_id if article.cluster_id is not None else ('article', article.id)
+        if key in seen:
+            continue
+        seen.add(key)
+        stories.append(article)
+        if len(stories) >= limit:
+            break
+    return stories
+
+
+@api_view(['GET'])
+def rate_limit_metrics(request):
+    """
+    Token bucket state and limiter counters (acquired, throttled, seconds
+    spent waiting) for each rate limited host or API key.
+    """
+    return Response(get_rate_limiter().snapshot())
+
+
+@api_view(['GET'])
+def normalize_cache_metrics(request):
+    """
+    Normalization cache size and hit rate (this process, and all workers
+    when the Redis tier is enabled).
+    """
+    cache = get_normalize_cache()
+    return Response(cache.snapshot() if cache is not None else {'enabled': False})
+
+
+@api_view(['GET'])
+def sentiment_cache_metrics(request):
+    """
+    Sentiment cache hits and misses for the current analyzer version (this
+    process, and all workers).
+    """
+    cache = get_sentiment_cache()
+    return Response(cache.snapshot(get_engine().version) if cache is not None else {'enabled': False})
+
+
+@api_view(['GET'])
+def trending_terms(request):
+    """
+    Top trending title terms of a country (?country=us), optionally within
+    one ?category=, read from the trending sketches without touching
+    ProcessedData.
+    """
+    country_code = request.GET.get('country', '').lower()
+    category = request.GET.get('category') or None
+    limit = min(int(request.GET.get('limit', 10)), 50)
+    engine = get_trending_engine()
+    if engine is None:
+        return Response({'enabled': False})
+    start, end = engine.window_bounds()
+    return Response({
+        'country': country_code,
+        'category': category,
+        'window_start': start,
+        'window_end': end,
+        'terms': engine.trending(country_code, category, limit),
+    })
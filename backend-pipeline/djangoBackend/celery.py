@@ -24,6 +24,18 @@ app.conf.beat_schedule = {
         'task': 'api.tasks.fetch_and_process_news',
         'schedule': crontab(minute=30),  # Run every hour at XX:30
     },
+    'prune-story-index-hourly': {
+        'task': 'api.tasks.prune_story_index',
+        'schedule': crontab(minute=15),  # Run every hour at XX:15
+    },
+    'maintain-partitions-daily': {
+        'task': 'api.tasks.maintain_partitions',
+        'schedule': crontab(hour=3, minute=45),  # Run every day at 03:45
+    },
+    'prune-sentiment-cache-daily': {
+        'task': 'api.tasks.prune_sentiment_cache',
+        'schedule': crontab(hour=4, minute=15),  # Run every day at 04:15
+    },
 }
 
 @app.task(bind=True, ignore_result=True)
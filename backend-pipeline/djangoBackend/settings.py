@@ -83,6 +83,66 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Ingestion Configuration
+INGESTION_CONCURRENT_FETCH = os.environ.get('INGESTION_CONCURRENT_FETCH', 'true').lower() == 'true'  # Inline runs (fetchnews): fetch feeds on a thread pool
+INGESTION_FETCH_MAX_WORKERS = int(os.environ.get('INGESTION_FETCH_MAX_WORKERS', '16'))
+INGESTION_PER_HOST_CONCURRENCY = int(os.environ.get('INGESTION_PER_HOST_CONCURRENCY', '8'))
+INGESTION_WRITE_BATCH_SIZE = int(os.environ.get('INGESTION_WRITE_BATCH_SIZE', '500'))
+INGESTION_RUN_DEDUPE_SECONDS = int(os.environ.get('INGESTION_RUN_DEDUPE_SECONDS', '3600'))  # How long a fan-out run's cross-feed dedupe keys live in Redis
+INGESTION_FUSED = os.environ.get('INGESTION_FUSED', 'false').lower() == 'true'  # Write fetched articles straight to ProcessedData
+INGESTION_ARCHIVE_RAW = os.environ.get('INGESTION_ARCHIVE_RAW', 'false').lower() == 'true'  # Fused mode: also archive raw payloads in RawData, asynchronously
+BULK_LOAD_CHUNK_SIZE = int(os.environ.get('BULK_LOAD_CHUNK_SIZE', '10000'))  # Rows per COPY in api.bulkload
+PROCESSING_CHUNK_SIZE = int(os.environ.get('PROCESSING_CHUNK_SIZE', '1000'))  # RawData rows per processing chunk
+RAW_DATA_DELETE_BATCH_SIZE = int(os.environ.get('RAW_DATA_DELETE_BATCH_SIZE', '5000'))  # Ids per delete when old RawData rows are cleaned up
+PROCESSING_WORKERS = int(os.environ.get('PROCESSING_WORKERS', '1'))  # Normalization processes for processnews backfills
+NEAR_DUPLICATE_ENABLED = os.environ.get('NEAR_DUPLICATE_ENABLED', 'true').lower() == 'true'  # Cluster near-duplicate stories at processing time
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', '0.6'))  # Min estimated title similarity to join a story
+NEAR_DUPLICATE_WINDOW_HOURS = int(os.environ.get('NEAR_DUPLICATE_WINDOW_HOURS', '72'))  # How long stories stay in the LSH index
+NORMALIZE_CACHE_SIZE = int(os.environ.get('NORMALIZE_CACHE_SIZE', '10000'))  # In-process LRU entries, 0 disables the cache
+NORMALIZE_CACHE_MIN_LENGTH = int(os.environ.get('NORMALIZE_CACHE_MIN_LENGTH', '64'))  # Shorter texts are always normalized directly
+NORMALIZE_CACHE_REDIS = os.environ.get('NORMALIZE_CACHE_REDIS', 'false').lower() == 'true'  # Share results across workers through Redis
+NORMALIZE_CACHE_REDIS_DB = int(os.environ.get('NORMALIZE_CACHE_REDIS_DB', '2'))
+NORMALIZE_CACHE_TTL = int(os.environ.get('NORMALIZE_CACHE_TTL', '86400'))  # Seconds a Redis entry lives
+PROCESSED_PARTITIONS_AHEAD = int(os.environ.get('PROCESSED_PARTITIONS_AHEAD', '2'))  # Monthly ProcessedData partitions created ahead of time
+PROCESSED_RETENTION_MONTHS = int(os.environ.get('PROCESSED_RETENTION_MONTHS', '12'))  # Older partitions are dropped
+NEWS_LOOKBACK_DAYS = int(os.environ.get('NEWS_LOOKBACK_DAYS', '30'))  # country_news reads this window first, older articles only if it runs short; 0 reads the table as one range
+COUNTRY_KEYWORDS_FILE = os.environ.get('COUNTRY_KEYWORDS_FILE')  # Defaults to api/data/country_keywords.json
+SENTIMENT_LEXICON_FILE = os.environ.get('SENTIMENT_LEXICON_FILE')  # Defaults to api/data/sentiment_lexicon.json
+ANALYTICS_AFTER_FETCH = os.environ.get('ANALYTICS_AFTER_FETCH', 'true').lower() == 'true'  # Queue the batch analytics jobs after each fetch
+ANALYTICS_BATCH_SIZE = int(os.environ.get('ANALYTICS_BATCH_SIZE', '1000'))  # ProcessedData rows per analytics batch
+ANALYTICS_WATERMARK_OVERLAP = int(os.environ.get('ANALYTICS_WATERMARK_OVERLAP', '1000'))  # Ids re-read below the watermark for late commits
+SUMMARY_SENTENCES = int(os.environ.get('SUMMARY_SENTENCES', '3'))  # Sentences per stored article summary
+SUMMARY_VOCABULARY_LIMIT = int(os.environ.get('SUMMARY_VOCABULARY_LIMIT', '500000'))  # Words the summarizer's vectorizer keeps before starting over
+SENTIMENT_CACHE_ENABLED = os.environ.get('SENTIMENT_CACHE_ENABLED', 'true').lower() == 'true'  # Reuse stored scores of identical texts
+SENTIMENT_CACHE_MAX_AGE_DAYS = int(os.environ.get('SENTIMENT_CACHE_MAX_AGE_DAYS', '90'))  # Older cached scores are pruned daily
+SENTIMENT_CACHE_FLUSH_SECONDS = float(os.environ.get('SENTIMENT_CACHE_FLUSH_SECONDS', '30'))  # How often each process adds its hit/miss counts to the shared stats
+TRENDING_ENABLED = os.environ.get('TRENDING_ENABLED', 'true').lower() == 'true'  # Count title terms of stored articles for /api/trending/
+TRENDING_REDIS = os.environ.get('TRENDING_REDIS', 'true').lower() == 'true'  # Share the sketches across workers through Redis
+TRENDING_REDIS_DB = int(os.environ.get('TRENDING_REDIS_DB', '3'))
+TRENDING_BUCKET_SECONDS = int(os.environ.get('TRENDING_BUCKET_SECONDS', '3600'))  # Length of one time bucket
+TRENDING_WINDOW_BUCKETS = int(os.environ.get('TRENDING_WINDOW_BUCKETS', '6'))  # Buckets in the recent window
+TRENDING_BASELINE_BUCKETS = int(os.environ.get('TRENDING_BASELINE_BUCKETS', '24'))  # Buckets before the window that set the baseline
+TRENDING_SKETCH_WIDTH = int(os.environ.get('TRENDING_SKETCH_WIDTH', '2048'))  # Count-Min Sketch counters per row
+TRENDING_SKETCH_DEPTH = int(os.environ.get('TRENDING_SKETCH_DEPTH', '4'))  # Count-Min Sketch rows
+TRENDING_TOP_CAPACITY = int(os.environ.get('TRENDING_TOP_CAPACITY', '200'))  # Terms kept per bucket's top-terms set
+
+# Token-bucket rate limits per host: requests per second and burst size.
+# Buckets are shared through Redis (RATE_LIMIT_REDIS_DB) across workers.
+RATE_LIMITS = {
+    'news.google.com': {'rate': 10.0, 'burst': 10},
+    'gnews.io': {'rate': 1.0, 'burst': 5},
+    'api.thenewsapi.com': {'rate': 1.0, 'burst': 5},
+}
+RATE_LIMIT_DEFAULT = {'rate': 5.0, 'burst': 5}
+RATE_LIMIT_MAX_WAIT = float(os.environ.get('RATE_LIMIT_MAX_WAIT', '5'))  # Longest sleep for a token in inline runs; Celery tasks reschedule instead
+RATE_LIMIT_REDIS_DB = int(os.environ.get('RATE_LIMIT_REDIS_DB', '1'))
+
+# Shared HTTP session used by the ingestion fetchers
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '10'))  # Number of hosts to keep pools for
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '16'))  # Keep-alive connections per host
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', '0.5'))
+
 # CORS settings - allow frontend to connect
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React frontend